@@ -0,0 +1,29 @@
+"""Builds columnar chunks from the metadata in preprocessed/games.
+
+ChunkMeta.save keeps columnar chunks current for new writes, so this
+only needs to run once on an existing corpus or after editing metadata
+files by hand.
+"""
+
+from os import path
+from tqdm import tqdm
+from hanabdata.tools.io import read
+from hanabdata.tools.structures import ChunkColumns, ChunkMeta
+
+def build_columns(rebuild=False):
+    """Writes a columnar chunk for every metadata chunk. Skips chunks
+    whose columnar file is newer than the metadata unless rebuild."""
+    chunk_list = sorted(ChunkMeta.list_ids())
+    num_built = 0
+    for chunk in tqdm(chunk_list):
+        meta_path = f'{ChunkMeta.basepath}/{chunk}.json'
+        col_path = f'{ChunkColumns.basepath}/{chunk}.{ChunkColumns.extension}'
+        if not rebuild and read.file_exists(col_path) \
+                and path.getmtime(col_path) >= path.getmtime(meta_path):
+            continue
+        ChunkColumns.from_meta(ChunkMeta.load(chunk)).save()
+        num_built += 1
+    print(f"Built {num_built} of {len(chunk_list)} columnar chunks.")
+
+if __name__ == "__main__":
+    build_columns()
@@ -0,0 +1,15 @@
+"""Copies game metadata into the SQLite store used for selective queries.
+
+Only chunks changed since the last run are copied, so run this after
+each download.
+"""
+
+from datetime import datetime
+from hanabdata.tools.io.database import MetaStore
+
+if __name__ == "__main__":
+    start = datetime.now()
+    with MetaStore() as store:
+        num_copied = store.populate()
+        print(f"Copied {num_copied} chunks; {store.count()} games stored.")
+    print(f"Took {(datetime.now() - start).total_seconds():.02f} seconds.")
@@ -0,0 +1,25 @@
+"""Builds the indexes in tools.io.indexes from preprocessed/games.
+
+ChunkMeta.save keeps built indexes current, so this only needs to run
+once, or again after editing metadata files by hand.
+"""
+
+from tqdm import tqdm
+from hanabdata.tools.io.indexes import INDEXES
+from hanabdata.tools.structures import ChunkMeta
+
+def build_indexes(index_types=None):
+    """Rebuilds each index (all by default) with one metadata scan."""
+    if index_types is None:
+        index_types = INDEXES
+    built = [index_type() for index_type in index_types]
+    for chunk in tqdm(sorted(ChunkMeta.list_ids())):
+        data = ChunkMeta.load(chunk, use_cache=False).data
+        for index in built:
+            index.add_chunk(chunk, data)
+    for index in built:
+        index.save()
+        print(f"Indexed {len(index.keys())} keys in {index.path}.")
+
+if __name__ == "__main__":
+    build_indexes()
@@ -0,0 +1,40 @@
+"""Builds the manifests in tools.io.manifest for raw and preprocessed
+game chunks.
+
+Saves keep a built manifest current, so this only needs to run once,
+or again after editing chunk files by hand.
+"""
+
+from tqdm import tqdm
+from hanabdata.tools.io import read
+from hanabdata.tools.io.manifest import Manifest
+from hanabdata.tools.structures import Chunk, ChunkMeta
+
+def build_manifest(chunk_type, rebuild=False):
+    """Records every chunk of chunk_type that changed since the manifest
+    was last built (or every chunk if rebuild)."""
+    chunk_manifest = None if rebuild else chunk_type.get_manifest()
+    if chunk_manifest is None:
+        chunk_manifest = Manifest(chunk_type.basepath)
+    chunk_list = sorted(chunk_type.scan_ids())
+    for chunk_id in set(chunk_manifest.chunks) - set(chunk_list):
+        del chunk_manifest.chunks[chunk_id]
+    num_recorded = 0
+    for chunk in tqdm(chunk_list):
+        chunk_path = f'{chunk_type.basepath}/{chunk}.{chunk_type.extension}'
+        segment_path = next(iter(chunk_type._related_paths(chunk_path)), None)
+        if chunk_manifest.is_current(chunk, chunk_path, segment_path):
+            continue
+        data = chunk_type.load(chunk, use_cache=False).data
+        if read.file_exists(chunk_path):
+            chunk_manifest.record(chunk, data, chunk_path, segment_path)
+        else:
+            chunk_manifest.chunks.pop(chunk, None)
+            chunk_manifest.record_entries(chunk, dict(enumerate(data)), segment_path)
+        num_recorded += 1
+    chunk_manifest.save()
+    print(f"Recorded {num_recorded} of {len(chunk_list)} chunks in {chunk_manifest.path}.")
+
+if __name__ == "__main__":
+    build_manifest(Chunk)
+    build_manifest(ChunkMeta)
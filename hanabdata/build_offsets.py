@@ -0,0 +1,27 @@
+"""Rewrites raw game chunks so each has an offset table.
+
+Chunk.save writes offset tables for new chunks. This only needs to run
+once on chunks saved before offset tables existed.
+"""
+
+from os import path
+from tqdm import tqdm
+from hanabdata.tools.io import read
+from hanabdata.tools.io.offsets import index_path
+from hanabdata.tools.structures import Chunk
+
+def build_offsets(rebuild=False):
+    """Saves every raw chunk lacking a current offset table."""
+    chunk_list = sorted(Chunk.list_ids())
+    num_built = 0
+    for chunk in tqdm(chunk_list):
+        chunk_path = f'{Chunk.basepath}/{chunk}.json'
+        if not rebuild and path.isfile(index_path(chunk_path)) \
+                and read.read_indexed_json(chunk_path, []) is not None:
+            continue
+        Chunk.load(chunk).save()
+        num_built += 1
+    print(f"Indexed {num_built} of {len(chunk_list)} chunks.")
+
+if __name__ == "__main__":
+    build_offsets()
@@ -0,0 +1,94 @@
+"""Builds, verifies and prunes the pickled sidecars of chunks.
+
+Loads write sidecars themselves once Data.sidecars is set (see
+tools.io.sidecar); building ahead of time moves the decoding cost out
+of the first analysis run. Verifying reports how many sidecars are
+current, and pruning deletes those that are stale, unreadable or left
+behind by a deleted chunk.
+"""
+
+import pathlib
+import sys
+from collections import Counter
+from tqdm import tqdm
+from hanabdata.tools.io import cache, read, sidecar
+from hanabdata.tools.structures import Chunk, ChunkMeta
+
+CHUNK_TYPES = [Chunk, ChunkMeta]
+
+def _chunk_path(chunk_type, chunk):
+    return f'{chunk_type.basepath}/{chunk}.{chunk_type.extension}'
+
+def _current_stamp(chunk_type, path):
+    related = chunk_type._related_paths(path)  # pylint: disable=protected-access
+    return cache.stamp(path, related), related
+
+def sidecar_status(chunk_type, chunk):
+    """Returns "current", "stale", "unreadable" or "missing" for the
+    sidecar of a chunk. A current sidecar must also unpickle."""
+    path = _chunk_path(chunk_type, chunk)
+    if not read.file_exists(sidecar.sidecar_path(path)):
+        return "missing"
+    recorded = sidecar.read_stamp(path)
+    if recorded is None:
+        return "unreadable"
+    file_stamp, related = _current_stamp(chunk_type, path)
+    if recorded != file_stamp:
+        return "stale"
+    return "current" if sidecar.load(path, related) is not None else "unreadable"
+
+def build_sidecars(rebuild=False):
+    """Writes a sidecar for every chunk lacking a current one. Returns
+    the number written."""
+    num_built = 0
+    for chunk_type in CHUNK_TYPES:
+        sidecars, chunk_type.sidecars = chunk_type.sidecars, True
+        try:
+            for chunk in tqdm(sorted(chunk_type.list_ids())):
+                path = _chunk_path(chunk_type, chunk)
+                if not rebuild and sidecar.read_stamp(path) == _current_stamp(chunk_type, path)[0]:
+                    continue
+                read.remove_file(sidecar.sidecar_path(path))
+                chunk_type.load(chunk, use_cache=False)
+                num_built += 1
+        finally:
+            chunk_type.sidecars = sidecars
+    print(f"Built {num_built} sidecars.")
+    return num_built
+
+def verify_sidecars():
+    """Returns the count of sidecars of each status (see sidecar_status)
+    over every chunk."""
+    statuses = Counter()
+    for chunk_type in CHUNK_TYPES:
+        for chunk in tqdm(sorted(chunk_type.list_ids())):
+            statuses[sidecar_status(chunk_type, chunk)] += 1
+    print(f"Sidecars: {dict(statuses)}.")
+    return statuses
+
+def prune_sidecars():
+    """Deletes every sidecar that is not current, including those of
+    deleted chunks. Returns the number deleted."""
+    num_pruned = 0
+    for chunk_type in CHUNK_TYPES:
+        chunks = chunk_type.list_ids()
+        for sidecar_file in pathlib.Path(chunk_type.basepath).glob(f'*.{sidecar.EXTENSION}'):
+            stem = sidecar_file.stem
+            if stem.isdigit() and int(stem) in chunks and sidecar_status(chunk_type, int(stem)) == "current":
+                continue
+            read.remove_file(str(sidecar_file))
+            num_pruned += 1
+    print(f"Pruned {num_pruned} sidecars.")
+    return num_pruned
+
+if __name__ == "__main__":
+    # usage: python -m hanabdata.build_sidecars [build|rebuild|verify|prune]
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command in ("build", "rebuild"):
+        build_sidecars(command == "rebuild")
+    elif command == "verify":
+        verify_sidecars()
+    elif command == "prune":
+        prune_sidecars()
+    else:
+        sys.exit(f"unknown command {command}")
@@ -0,0 +1,20 @@
+"""Folds pending append segments into their raw game chunks.
+
+Game.save and Games.save append to segments, and Chunk.append compacts
+a segment once it outgrows its chunk. Run this after a bulk download
+to leave every chunk as a single file.
+"""
+
+from tqdm import tqdm
+from hanabdata.tools.io import read
+from hanabdata.tools.structures import Chunk
+
+def compact_all():
+    """Compacts every chunk that has a segment."""
+    segment_ids = sorted(int(y) for y in read.get_file_names(Chunk.basepath, Chunk.segment_extension))
+    for chunk in tqdm(segment_ids):
+        Chunk.compact(chunk)
+    print(f"Compacted {len(segment_ids)} chunks.")
+
+if __name__ == "__main__":
+    compact_all()
@@ -0,0 +1,33 @@
+"""Rewrites stored chunks with a different compression.
+
+Set Chunk.compression (or ChunkMeta.compression) to keep new chunks
+compressed; this converts chunks that were saved before the change.
+"""
+
+import sys
+from tqdm import tqdm
+from hanabdata.tools.io import compression, read
+from hanabdata.tools.structures import Chunk, ChunkMeta
+
+def recompress(chunk_type=Chunk, codec="zlib"):
+    """Saves every chunk of chunk_type compressed with codec, or as
+    plain JSON if codec is None. Returns bytes on disk before and after."""
+    chunk_type.compression = codec
+    before, after = 0, 0
+    for chunk in tqdm(sorted(chunk_type.list_ids())):
+        path = f'{chunk_type.basepath}/{chunk}.{chunk_type.extension}'
+        if read.file_exists(path):
+            with open(path, 'rb') as chunk_file:
+                if compression.detect(chunk_file.read(8)) == codec:
+                    continue
+        before += read.file_size(path) or 0
+        chunk_type.load(chunk, use_cache=False).save()
+        after += read.file_size(path)
+    print(f"Rewrote {before} bytes as {after} bytes.")
+    return before, after
+
+if __name__ == "__main__":
+    # usage: python -m hanabdata.compress_chunks [zlib|lzma|none] [meta]
+    new_codec = sys.argv[1] if len(sys.argv) > 1 else "zlib"
+    store = ChunkMeta if sys.argv[2:] == ["meta"] else Chunk
+    recompress(store, None if new_codec == "none" else new_codec)
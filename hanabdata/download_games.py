@@ -1,6 +1,5 @@
 """Downloads games."""
 
-from hanabdata.tools.io.read import get_file_names
 from hanabdata.tools.io.update import update_game, update_chunk2
 from hanabdata.tools.structures import Chunk
 
@@ -17,18 +16,18 @@ def download_all(game_id: int, stop=False):
 
 def download_new():
     """Downloads all games newer than the newest game saved to file."""
-    chunks = [int(f) for f in get_file_names("./data/raw/games")]
+    chunks = Chunk.list_ids()
     last_game_id = 0
-    if chunks != []:
+    if chunks:
         last_game_id = 1000 * max(chunks)
     download_all(last_game_id, False)
 
 def get_last_game():
     """Returns last downloaded game in chunk."""
-    chunk_path = "./data/raw/games"
-    print(get_file_names)
-
-    chunk_num = max(int(f) for f in get_file_names(chunk_path))
+    chunk_manifest = Chunk.get_manifest()
+    if chunk_manifest is not None:
+        return chunk_manifest.newest_game() or 0
+    chunk_num = max(Chunk.list_ids())
     chunk_data = Chunk.load(chunk_num).data
     max_game_id = 0
     for game in chunk_data:
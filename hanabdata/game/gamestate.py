@@ -1,9 +1,16 @@
 """Tools to anaylze Hanabi Games"""
+from hanabdata.game.packed import PackedActions, PackedDeck
+
+
 class GameState:
     """
     Gamestate is a class to handle what an ongoing game of hanabi looks like on a specific turn.
     It is initialized with JSON data and the turn number, then
     contains methods to provide information about the game on that turn.
+
+    data may hold the deck and actions as dicts or packed (see
+    game.packed). Hands, stacks and the discard pile hold cards by
+    order, their index in the deck; card returns one as a dict.
     """
 
     def __init__(self, data, turn):
@@ -12,13 +19,19 @@ class GameState:
 
         self.data = data
         self.deck = data["deck"]
-
-        for i, card in enumerate(self.deck):
-            card["order"] = i
+        if isinstance(self.deck, str):
+            self.deck = PackedDeck.from_text(self.deck)
+        if isinstance(self.deck, PackedDeck):
+            self.suits, self.ranks = self.deck.suits(), self.deck.ranks()
+        else:
+            self.suits = [card["suitIndex"] for card in self.deck]
+            self.ranks = [card["rank"] for card in self.deck]
 
         self.players = data["players"]
         self.actions = data["actions"]
-        self.suit_count = 1 + max([card["suitIndex"] for card in self.deck])
+        if isinstance(self.actions, str):
+            self.actions = PackedActions.from_text(self.actions)
+        self.suit_count = 1 + max(self.suits)
         try:
             self.variant = data["options"]["variant"]
         except KeyError:
@@ -34,10 +47,10 @@ class GameState:
         self.play_stacks = [[] for _ in range(self.suit_count)]
         self.score = 0
         self.hands = _get_starting_hands(
-            self.deck, self.player_count, self.hand_size)
+            len(self.suits), self.player_count, self.hand_size)
         self.current_player_index = 0
         self.strike_count = 0
-        self.draw_pile_size = len(self.deck) - \
+        self.draw_pile_size = len(self.suits) - \
             self.player_count * self.hand_size
 
         # progress to current turn
@@ -48,46 +61,38 @@ class GameState:
 
     def _remove_from_hand(self, player_index, order):
 
-        found = False
-        for i, card in enumerate(self.hands[player_index]):
-            if card["order"] == order:
-                found = True
-                found_slot = i
-                real_card = card
-                break
-
-        if not found:
+        if order not in self.hands[player_index]:
             print(f'could not find card {order}!')
-            return self.deck[order]
+            return order
 
-        remains = self.hands[player_index][:found_slot] + \
-            self.hands[player_index][found_slot + 1:]
-        self.hands[player_index] = remains
-        return real_card
+        self.hands[player_index].remove(order)
+        return order
 
     def _draw_card(self):
         if self.draw_pile_size == 0:
             return
-        card = self.deck[- self.draw_pile_size]
+        card = len(self.suits) - self.draw_pile_size
         self.hands[self.current_player_index] = [
             card] + self.hands[self.current_player_index]
         self.draw_pile_size -= 1
 
-    def _get_type(self, action):
-        i = action["type"]
-        if i == 3:
+    def _get_type(self, action_type, target):
+        if action_type == 3:
             return "rank"
-        if i == 2:
+        if action_type == 2:
             return "color"
-        if i == 1:
+        if action_type == 1:
             return "discard"
-        if i == 4 or i == 5:
+        if action_type == 4 or action_type == 5:
             return "vtk"
-        card = self.deck[action["target"]]
-        if len(self.play_stacks[card["suitIndex"]]) == card["rank"] - 1:
+        if len(self.play_stacks[self.suits[target]]) == self.ranks[target] - 1:
             return "play"
         return "bomb"
 
+    def card(self, order):
+        """Returns the card with the given order as a dict."""
+        return {"suitIndex": self.suits[order], "rank": self.ranks[order], "order": order}
+
     def _increment_clue_count(self):
         if self.variant[0:12] == "Clue starved":
             inc = 0.5
@@ -97,8 +102,14 @@ class GameState:
 
 
     def implement_action(self, action):
-        """Increments the gamestate for when an action plays"""
-        action_type = self._get_type(action)
+        """Increments the gamestate for when an action plays. action is
+        a dict or a (type, target, value) tuple from PackedActions."""
+        if isinstance(action, dict):
+            target = action["target"]
+            action_type = self._get_type(action["type"], target)
+        else:
+            target = action[1]
+            action_type = self._get_type(action[0], target)
 
         if action_type == "rank":
             self.clue_token_count -= 1
@@ -108,24 +119,24 @@ class GameState:
 
         elif action_type == "discard":
             card = self._remove_from_hand(
-                self.current_player_index, action["target"])
+                self.current_player_index, target)
             self._increment_clue_count()
             self.discard_pile.append(card)
             self._draw_card()
 
         elif action_type == "play":
             card = self._remove_from_hand(
-                self.current_player_index, action["target"])
-            self.play_stacks[card["suitIndex"]].append(card)
+                self.current_player_index, target)
+            self.play_stacks[self.suits[card]].append(card)
             self._draw_card()
             self.score += 1
 
-            if self.deck[action["target"]]["rank"] == 5:
+            if self.ranks[target] == 5:
                 self._increment_clue_count()
 
         elif action_type == "bomb":
             card = self._remove_from_hand(
-                self.current_player_index, action["target"])
+                self.current_player_index, target)
             self.discard_pile.append(card)
             self.strike_count += 1
             self._draw_card()
@@ -149,8 +160,8 @@ class GameState:
         for hand in self.hands:
             hand_repr = []
             for card in hand:
-                rank = card["rank"]
-                suit = "RYGBKM"[card["suitIndex"]]
+                rank = self.ranks[card]
+                suit = "RYGBKM"[self.suits[card]]
                 hand_repr.append(suit + str(rank))
             hands_repr.append(hand_repr)
 
@@ -177,9 +188,9 @@ def _get_hand_size(data):
     return hand_size
 
 
-def _get_starting_hands(deck, player_count, hand_size):
+def _get_starting_hands(deck_size, player_count, hand_size):
     hands = []
-    pile = iter(deck)
+    pile = iter(range(deck_size))
     for _ in range(player_count):
         hand = []
         for __ in range(hand_size):
@@ -0,0 +1,191 @@
+"""
+Compact encodings of decks and action lists.
+
+Exports list the deck as {"suitIndex", "rank"} dicts and the actions as
+{"type", "target", "value"} dicts. PackedDeck stores each card in one
+byte and PackedActions each action in four, and both convert back to
+the original dicts exactly.
+
+Games come in three forms: as exported (dicts), packed (deck and
+actions are PackedDeck and PackedActions) and stored (deck and actions
+are the base64 text of the packed bytes, for JSON files). Decks and
+action lists that cannot be packed losslessly stay as dicts in every
+form.
+"""
+
+import base64
+import struct
+
+_CARD_KEYS = {"suitIndex", "rank"}
+_ACTION_KEYS = {"type", "target", "value"}
+# big-endian, so packed action lists sort like lists of tuples
+_ACTION = struct.Struct(">BHB")
+
+
+def _is_small_int(value, limit):
+    return type(value) is int and 0 <= value < limit
+
+
+class PackedDeck:
+    """A deck stored as one byte per card, suit index in the high nibble
+    and rank in the low nibble."""
+
+    def __init__(self, raw: bytes):
+        self.raw = bytes(raw)
+
+    @classmethod
+    def from_cards(cls, deck):
+        """Packs a list of card dicts. Raises ValueError if a card does
+        not fit."""
+        raw = bytearray()
+        for card in deck:
+            if card.keys() != _CARD_KEYS or not _is_small_int(card["suitIndex"], 16) \
+                    or not _is_small_int(card["rank"], 16):
+                raise ValueError(f"cannot pack card {card}")
+            raw.append(card["suitIndex"] << 4 | card["rank"])
+        return cls(raw)
+
+    def to_cards(self):
+        """Returns the list of card dicts."""
+        return [{"suitIndex": byte >> 4, "rank": byte & 15} for byte in self.raw]
+
+    def suits(self):
+        """Returns the suit index of every card, in deck order."""
+        return [byte >> 4 for byte in self.raw]
+
+    def ranks(self):
+        """Returns the rank of every card, in deck order."""
+        return [byte & 15 for byte in self.raw]
+
+    def to_text(self):
+        return base64.b64encode(self.raw).decode("ascii")
+
+    @classmethod
+    def from_text(cls, text: str):
+        return cls(base64.b64decode(text))
+
+    def __len__(self):
+        return len(self.raw)
+
+    def __eq__(self, other):
+        return isinstance(other, PackedDeck) and self.raw == other.raw
+
+    def __hash__(self):
+        return hash(self.raw)
+
+
+class PackedActions:
+    """An action list stored as four bytes per action: type, target (two
+    bytes) and value. Indexing gives (type, target, value) tuples."""
+
+    def __init__(self, raw: bytes):
+        self.raw = bytes(raw)
+
+    @classmethod
+    def from_actions(cls, actions):
+        """Packs a list of action dicts. Raises ValueError if an action
+        does not fit."""
+        raw = bytearray()
+        for action in actions:
+            if action.keys() != _ACTION_KEYS or not _is_small_int(action["type"], 2**8) \
+                    or not _is_small_int(action["target"], 2**16) or not _is_small_int(action["value"], 2**8):
+                raise ValueError(f"cannot pack action {action}")
+            raw += _ACTION.pack(action["type"], action["target"], action["value"])
+        return cls(raw)
+
+    def to_actions(self):
+        """Returns the list of action dicts."""
+        return [{"type": action_type, "target": target, "value": value}
+                for action_type, target, value in self]
+
+    def to_text(self):
+        return base64.b64encode(self.raw).decode("ascii")
+
+    @classmethod
+    def from_text(cls, text: str):
+        return cls(base64.b64decode(text))
+
+    def __len__(self):
+        return len(self.raw) // _ACTION.size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("action index out of range")
+        return _ACTION.unpack_from(self.raw, i * _ACTION.size)
+
+    def __iter__(self):
+        return _ACTION.iter_unpack(self.raw)
+
+    def __eq__(self, other):
+        return isinstance(other, PackedActions) and self.raw == other.raw
+
+    def __hash__(self):
+        return hash(self.raw)
+
+
+def _convert(game, deck_func, actions_func):
+    """Returns a copy of game with deck and actions converted, or game
+    itself if it holds neither."""
+    if type(game) is not dict or ("deck" not in game and "actions" not in game):
+        return game
+    game = dict(game)
+    if "deck" in game:
+        game["deck"] = deck_func(game["deck"])
+    if "actions" in game:
+        game["actions"] = actions_func(game["actions"])
+    return game
+
+
+def _try(func, value):
+    try:
+        return func(value)
+    except (AttributeError, TypeError, ValueError):
+        return value
+
+
+def _pack_deck(deck):
+    if isinstance(deck, str):
+        return PackedDeck.from_text(deck)
+    if isinstance(deck, list):
+        return _try(PackedDeck.from_cards, deck)
+    return deck
+
+
+def _pack_actions(actions):
+    if isinstance(actions, str):
+        return PackedActions.from_text(actions)
+    if isinstance(actions, list):
+        return _try(PackedActions.from_actions, actions)
+    return actions
+
+
+def pack_game(game):
+    """Returns game in packed form."""
+    return _convert(game, _pack_deck, _pack_actions)
+
+
+def unpack_game(game):
+    """Returns game, in any form, as exported."""
+    return _convert(
+        game,
+        lambda deck: _pack_deck(deck).to_cards() if isinstance(deck, (str, PackedDeck)) else deck,
+        lambda actions: _pack_actions(actions).to_actions() if isinstance(actions, (str, PackedActions)) else actions,
+    )
+
+
+def encode_game(game):
+    """Returns game, in any form, in stored form."""
+    return _convert(
+        game,
+        lambda deck: _try(lambda value: value.to_text(), _pack_deck(deck)),
+        lambda actions: _try(lambda value: value.to_text(), _pack_actions(actions)),
+    )
+
+
+def is_stored(game):
+    """Returns True if game is in stored form, so needs unpacking."""
+    return type(game) is dict and (type(game.get("deck")) is str or type(game.get("actions")) is str)
@@ -0,0 +1,32 @@
+"""
+This contains the basic logic for dealing with seed names.
+
+Seeds are named like "p2v3s3" (2 players, variant 3, seed number 3).
+Seeds from before a change to the shuffling algorithm carry a "legacy-"
+prefix and have different decks from their unprefixed namesakes.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+SeedKey = namedtuple("SeedKey", ["num_players", "variant_id", "number", "legacy"])
+
+_SEED_PATTERN = re.compile(r"(legacy-)?p(\d+)v(\d+)s(\d+)")
+
+
+@lru_cache(maxsize=2**16)
+def parse_seed(seed: str):
+    """Returns the SeedKey for a seed name, or None if the seed does
+    not follow the usual format (for instance, "JSON" seeds)."""
+    match = _SEED_PATTERN.fullmatch(seed)
+    if match is None:
+        return None
+    legacy, num_players, variant_id, number = match.groups()
+    return SeedKey(int(num_players), int(variant_id), int(number), legacy is not None)
+
+
+def format_seed(key: SeedKey):
+    """Inverse of parse_seed."""
+    prefix = "legacy-" if key.legacy else ""
+    return f"{prefix}p{key.num_players}v{key.variant_id}s{key.number}"
@@ -37,6 +37,7 @@ def update_variants():
     response = requests.get(VARIANT_URL, timeout=MAX_TIME).json()
     with open(VARIANT_PATH, 'w', encoding="utf8") as json_file:
         json.dump(response, json_file)
+    _LOADED.pop(VARIANT_PATH, None)
     print("Updated variants.")
 
 def get_variant_dict():
@@ -68,30 +69,38 @@ def get_variant_names_dict():
 def find_variant(variant_id):
     """Returns Variant object with given variant_id."""
 
-    if variant_id in VARIANT_DICT:
-        correct_variant = VARIANT_DICT[variant_id]
+    variant_dict, _ = _get_dicts()
+    if variant_id in variant_dict:
+        correct_variant = variant_dict[variant_id]
     elif variant_id in DELETED_VARIANTS:
         return Variant(None, None, [0] * 4)
     else:
         update_variants()
         # throws an Error if variant_id does not exist
-        return VARIANT_DICT[variant_id]
+        return _get_dicts()[0][variant_id]
 
     return correct_variant
 
 def find_variant_from_name(variant_name):
     """Returns Variant object with given variant_name."""
 
-    if variant_name in VARIANT_NAMES_DICT:
-        correct_variant = VARIANT_NAMES_DICT[variant_name]
+    _, variant_names_dict = _get_dicts()
+    if variant_name in variant_names_dict:
+        correct_variant = variant_names_dict[variant_name]
     elif variant_name in DELETED_VARIANTS:
         return Variant(None, None, [0] * 4)
     else:
         update_variants()
         # throws an Error if variant_name does not exist
-        return VARIANT_NAMES_DICT[variant_name]
+        return _get_dicts()[1][variant_name]
 
     return correct_variant
 
-VARIANT_DICT = get_variant_dict()
-VARIANT_NAMES_DICT = get_variant_names_dict()
+# variant dicts by VARIANT_PATH, loaded on first use rather than on import
+_LOADED = {}
+
+def _get_dicts():
+    """Returns the variants at VARIANT_PATH by ID and by name."""
+    if VARIANT_PATH not in _LOADED:
+        _LOADED[VARIANT_PATH] = (get_variant_dict(), get_variant_names_dict())
+    return _LOADED[VARIANT_PATH]
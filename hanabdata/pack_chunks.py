@@ -0,0 +1,30 @@
+"""Rewrites raw game chunks with decks and actions packed.
+
+Set Chunk.packed to keep new chunks packed; this converts chunks that
+were saved before the change. See game.packed for the encoding. With
+dedup, decks also move to the deck store (see Chunk.dedup_decks).
+"""
+
+import sys
+from tqdm import tqdm
+from hanabdata.tools.io import read
+from hanabdata.tools.structures import Chunk
+
+def repack(packed=True, dedup=False):
+    """Saves every raw chunk with decks and actions packed, or as dicts
+    if not packed, and decks moved to the deck store if dedup. Returns
+    bytes on disk before and after."""
+    Chunk.packed = packed
+    Chunk.dedup_decks = dedup
+    before, after = 0, 0
+    for chunk in tqdm(sorted(Chunk.list_ids())):
+        path = f'{Chunk.basepath}/{chunk}.{Chunk.extension}'
+        before += read.file_size(path) or 0
+        Chunk.load(chunk, use_cache=False).save()
+        after += read.file_size(path)
+    print(f"Rewrote {before} bytes as {after} bytes.")
+    return before, after
+
+if __name__ == "__main__":
+    # usage: python -m hanabdata.pack_chunks [unpack] [dedup]
+    repack("unpack" not in sys.argv[1:], "dedup" in sys.argv[1:])
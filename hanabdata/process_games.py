@@ -1,73 +1,39 @@
 """Processes games."""
 
 from datetime import datetime
-from hanabdata.tools.io import read
+from hanabdata.tools.io import views
 from hanabdata.tools.io.update import update_chunk, update_user
 from hanabdata.tools import structures
 
 def get_player_and_seed_info():
-    """Gets dict of all players in downloaded games."""
+    """Builds the view of game counts per player and per seed (see
+    tools.io.views) from every downloaded game. Saving chunks keeps it
+    current afterwards, so this only needs to run once."""
     current = datetime.now()
-    player_dict = {}
-    seed_dict = {}
-    chunk_list = sorted([int(y) for y in read.get_file_names("./data/raw/games")])
-    for chunk in chunk_list:
-        try:
-            data = structures.Chunk.load(chunk)
-        except ValueError:
-            update_chunk(chunk)
-            data = structures.Chunk.load(chunk)
-        for game in data:
-            if game is None or game == "Error":
-                continue
-            for player in game["players"]:
-                # TODO: make helper function
-                if player not in player_dict:
-                    player_dict[player] = {
-                        "num_games": 1,
-                        "last_game": game["id"]
-                    }
-                else:
-                    player_dict[player]["num_games"] += 1
-                    player_dict[player]["last_game"] = game["id"]
-            seed = game["seed"]
-            if seed not in seed_dict:
-                seed_dict[seed] = {
-                    "num_games": 1,
-                    "last_game": game["id"]
-                }
-            else:
-                seed_dict[seed]["num_games"] += 1
-                seed_dict[seed]["last_game"] = game["id"]
-        if (datetime.now() - current).total_seconds() > 20:
-            print(f"Finished processing chunk {chunk}.")
-            current = datetime.now()
-    read.write_json("./data/player_dict.json", player_dict)
-    read.write_json("./data/seed_dict.json", seed_dict)
+
+    def chunks():
+        nonlocal current
+        for chunk in sorted(structures.Chunk.list_ids()):
+            try:
+                data = structures.Chunk.load(chunk, use_cache=False)
+            except ValueError:
+                update_chunk(chunk)
+                data = structures.Chunk.load(chunk, use_cache=False)
+            yield chunk, data.data
+            if (datetime.now() - current).total_seconds() > 20:
+                print(f"Finished processing chunk {chunk}.")
+                current = datetime.now()
+
+    return views.build(chunks())
+
+BOUNDS = [1, 2, 10, 50, 100, 1000]
 
 def analyze_info(info_type):
     """Analyzes existing player info."""
     assert info_type in ("player", "seed")
-    data = read.read_json(f"./data/{info_type}_dict.json")
-
-    # laughing emoji
-    exactly_one, two_to_nine, ten_to_forty_nine, fifty_to_ninety_nine, hundred_to_nine_nine_nine, thousand_plus = 0, 0, 0, 0, 0, 0
-    for player in data:
-        num_games = data[player]["num_games"]
-        if num_games == 1:
-            exactly_one += 1
-        elif num_games < 10:
-            assert num_games > 0
-            two_to_nine += 1
-        elif num_games < 50:
-            ten_to_forty_nine += 1
-        elif num_games < 100:
-            fifty_to_ninety_nine += 1
-        elif num_games < 1000:
-            hundred_to_nine_nine_nine += 1
-        else:
-            assert num_games >= 1000
-            thousand_plus += 1
+    view = _get_view()
+    exactly_one, two_to_nine, ten_to_forty_nine, fifty_to_ninety_nine, hundred_to_nine_nine_nine, thousand_plus = \
+        view.histogram(info_type, BOUNDS)
     print(f"There are {exactly_one} {info_type}s with one game played.")
     print(f"There are {two_to_nine} {info_type}s with 2 to 9 completed games.")
     print(f"There are {ten_to_forty_nine} {info_type}s with 10 to 49 completed games.")
@@ -76,13 +42,16 @@ def analyze_info(info_type):
     print(f"There are {thousand_plus} {info_type}s with 1000+ completed games.")
 
 def get_players_with_x_games(req_num_games: int):
-    """Returns a dict from player_dict.json with num games filter."""
-    data = read.read_json("./data/player_dict.json")
-    result = {}
-    for player in data:
-        if data[player]["num_games"] >= req_num_games:
-            result[player] = data[player]
-    return result
+    """Returns a dict from each player with at least req_num_games games
+    to their num_games and last_game, read from the view."""
+    return _get_view().at_least("player", req_num_games)
+
+def _get_view():
+    """Returns the view of game counts, building it on first use."""
+    view = views.get_view()
+    if view is None:
+        view = get_player_and_seed_info()
+    return view
 
 def update_players(req_num_games: int):
     """Updates all players with at least req_num_games completed."""
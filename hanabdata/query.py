@@ -0,0 +1,67 @@
+"""Answers a group-by query over game metadata from the command line.
+
+For example (each command on one line), the most popular variants
+since a date:
+
+    python -m hanabdata.query --where "datetimeStarted>2023-12-11"
+        --group-by options.variantName --agg count --order count --desc --limit 20
+
+and the five longest games of each team size, written to CSV:
+
+    python -m hanabdata.query --group-by options.numPlayers --agg top5:numTurns
+        --output data/processed/longest.csv
+
+See tools.query for the aggregates and Restriction.add_clause for the
+where clauses. Without --output, rows are printed as CSV.
+"""
+
+import argparse
+import csv
+import sys
+from hanabdata.tools.io.read import write_csv
+from hanabdata.tools.query import Query, parse_clause
+from hanabdata.tools.restriction import Restriction
+
+def parse_query(args):
+    """Returns the Query described by parsed arguments."""
+    where = None
+    if args.where:
+        where = Restriction({}, {})
+        for clause in args.where:
+            where.add_clause(*parse_clause(clause))
+    return Query(where, args.select, args.group_by, args.agg, args.order, args.desc, args.limit)
+
+def main(argv=None):
+    """Runs the query given by argv. Returns the output rows."""
+    parser = argparse.ArgumentParser(prog="python -m hanabdata.query", description=__doc__.splitlines()[0])
+    parser.add_argument("--where", action="append", default=[],
+                        help='a clause such as "score=25", "options.numPlayers>3" or "playerNames~alice"')
+    parser.add_argument("--select", action="append", default=[], help="a field to list for each game")
+    parser.add_argument("--group-by", action="append", default=[], help="a field to group games by")
+    parser.add_argument("--agg", action="append", default=[],
+                        help="count, or sum, mean, min, max or topK of a field, such as mean:numTurns")
+    parser.add_argument("--order", help="an output column to sort by")
+    parser.add_argument("--desc", action="store_true", help="sort in descending order")
+    parser.add_argument("--limit", type=int, help="the number of rows to keep")
+    parser.add_argument("--output", help="a CSV file to write the rows to")
+    parser.add_argument("--processes", type=int, default=0, help="processes to scan chunks in")
+    parser.add_argument("--cache", action="store_true", help="reuse the results of unchanged chunks")
+    parser.add_argument("--explain", action="store_true", help="print the chunks the query reads first")
+    args = parser.parse_args(argv)
+    try:
+        query = parse_query(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.explain:
+        print(query.explain(), file=sys.stderr)
+    rows = query.run(processes=args.processes, cache=args.cache)
+    if args.output:
+        write_csv(args.output, rows)
+        print(f"Wrote {len(rows) - 1} rows to {args.output}.", file=sys.stderr)
+    else:
+        csv.writer(sys.stdout).writerows(rows)
+    return rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Rewrites metadata chunks into canonical shape.
+
+Older metadata stored some games as one-element lists instead of
+dicts, so every reader had to guess. This unwraps them, clears entries
+that hold no game, and marks each checked chunk as canonical in the
+manifest (see tools.io.manifest), where GamesIterator and
+FullGamesIterator find it and skip their defensive checks.
+
+Chunks are checked in parallel. Marked chunks are skipped, so an
+interrupted run resumes where it stopped.
+"""
+
+import os
+import sys
+from collections import Counter
+from multiprocessing import Pool
+from tqdm import tqdm
+from hanabdata.build_manifest import build_manifest
+from hanabdata.tools.io.manifest import FORMAT_VERSION, is_canonical
+from hanabdata.tools.structures import ChunkMeta
+
+# marks of unchanged chunks are saved to the manifest this often
+SAVE_EVERY = 50
+
+def canonical_entry(entry):
+    """Returns entry in canonical shape and the name of the fix applied,
+    or None if it needed none."""
+    if is_canonical(entry):
+        return entry, None
+    if type(entry) is list and len(entry) == 1 and is_canonical(entry[0]):
+        return entry[0], "unwrapped"
+    return None, "cleared"
+
+def repair_chunk(args):
+    """Returns (chunk, data, fixes) for the metadata chunk at basepath,
+    where data is the repaired chunk or None if it was already
+    canonical, and fixes counts the fixes applied."""
+    chunk, basepath = args
+    data = ChunkMeta.load(chunk, basepath=basepath, use_cache=False).data
+    fixes = Counter()
+    for i, entry in enumerate(data):
+        data[i], fix = canonical_entry(entry)
+        if fix is not None:
+            fixes[fix] += 1
+    return chunk, data if fixes else None, fixes
+
+def repair_chunks(workers=None):
+    """Repairs every metadata chunk not yet marked canonical, using
+    workers processes (all cores by default). Returns the counts of
+    fixes applied."""
+    if ChunkMeta.get_manifest() is None:
+        build_manifest(ChunkMeta)
+    chunk_manifest = ChunkMeta.get_manifest()
+    chunk_list = sorted(chunk for chunk in chunk_manifest.ids() if not chunk_manifest.is_repaired(chunk))
+    tasks = [(chunk, ChunkMeta.basepath) for chunk in chunk_list]
+    fixes, num_rewritten = Counter(), 0
+    with Pool(workers or os.cpu_count()) as pool:
+        results = pool.imap_unordered(repair_chunk, tasks, chunksize=4)
+        for i, (chunk, data, chunk_fixes) in enumerate(tqdm(results, total=len(tasks))):
+            # the workers only read: chunks are written here, one at a
+            # time, so the manifest and indexes see every update
+            if data is not None:
+                ChunkMeta(data, chunk).save()
+                fixes.update(chunk_fixes)
+                num_rewritten += 1
+                continue
+            chunk_manifest = ChunkMeta.get_manifest()
+            chunk_manifest.chunks[chunk]["format"] = FORMAT_VERSION
+            if i % SAVE_EVERY == 0:
+                chunk_manifest.save()
+    ChunkMeta.get_manifest().save()
+    print(f"Rewrote {num_rewritten} of {len(tasks)} chunks: {dict(fixes)}.")
+    return fixes
+
+if __name__ == "__main__":
+    # usage: python -m hanabdata.repair_chunks [workers]
+    repair_chunks(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,137 @@
+"""Mergeable accumulators for analyses.
+
+Each accumulator can take the state of another of the same kind with
+merge, so an analysis whose state is one of these can be split across
+chunks and processes and combined afterwards (see
+analysis.run_analyses). Merging gives the same result as adding every
+value to one accumulator, whatever the order.
+"""
+
+import heapq
+from collections import Counter
+
+
+class Counts(Counter):
+    """A Counter that merges by adding counts."""
+
+    def add(self, key, count=1):
+        """Counts key count more times."""
+        self[key] += count
+
+    def merge(self, other):
+        """Adds the counts of other. Returns self."""
+        self.update(other)
+        return self
+
+
+class KeyedSums(dict):
+    """Sums of numbers per key."""
+
+    def add(self, key, amount):
+        """Adds amount to the sum for key."""
+        self[key] = self.get(key, 0) + amount
+
+    def merge(self, other):
+        """Adds the sums of other. Returns self."""
+        for key, amount in other.items():
+            self.add(key, amount)
+        return self
+
+
+class Sum:
+    """A running sum."""
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, value):
+        """Adds value to the sum."""
+        self.total += value
+
+    def merge(self, other):
+        """Adds the sum of other. Returns self."""
+        self.total += other.total
+        return self
+
+    def result(self):
+        """Returns the sum."""
+        return self.total
+
+
+class Mean:
+    """A running mean. result is None until a value is added."""
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, value):
+        """Adds value to the mean."""
+        self.total += value
+        self.count += 1
+
+    def merge(self, other):
+        """Adds the values of other. Returns self."""
+        self.total += other.total
+        self.count += other.count
+        return self
+
+    def result(self):
+        """Returns the mean of the values added."""
+        return self.total / self.count if self.count else None
+
+
+class TopK:
+    """The k largest items added, by key if given (which must then be a
+    module-level function for the state to pickle)."""
+
+    def __init__(self, k, key=None):
+        self.k = k
+        self.key = key
+        self.heap = []
+        self.count = 0
+
+    def add(self, item):
+        """Keeps item if it is among the k largest so far."""
+        # the count breaks ties so items themselves are never compared
+        entry = (item if self.key is None else self.key(item), self.count, item)
+        self.count += 1
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, entry)
+
+    def merge(self, other):
+        """Keeps the k largest of both. Returns self."""
+        for _, _, item in other.heap:
+            self.add(item)
+        return self
+
+    def result(self):
+        """Returns the items kept, smallest first."""
+        return [item for _, _, item in sorted(self.heap, key=lambda entry: entry[0])]
+
+
+class MinMax:
+    """The smallest and largest values added, each with the item it came
+    with (the value itself by default). min and max are None until a
+    value is added. Ties keep the item added first."""
+
+    def __init__(self):
+        self.min = self.max = None
+        self.min_item = self.max_item = None
+
+    def add(self, value, item=None):
+        """Compares value with the smallest and largest so far."""
+        item = value if item is None else item
+        if self.min is None or value < self.min:
+            self.min, self.min_item = value, item
+        if self.max is None or value > self.max:
+            self.max, self.max_item = value, item
+
+    def merge(self, other):
+        """Keeps the smallest and largest of both. Returns self."""
+        if other.min is not None:
+            self.add(other.min, other.min_item)
+            self.add(other.max, other.max_item)
+        return self
@@ -1,7 +1,16 @@
-"""This class runs an analysis on a defined set of games."""
+"""This class runs an analysis on a defined set of games.
+
+Analyses given an accumulator (see Analysis.set_accumulator) can also
+run over the whole corpus with run_analyses, which feeds any number of
+them from a single scan, and can keep their partial results between
+runs (see tools.io.results).
+"""
 
 import itertools
-from hanabdata.tools.io import read
+import multiprocessing
+from tqdm import tqdm
+from hanabdata.tools.io import read, results
+from hanabdata.tools.structures import ChunkMeta, GamesIterator
 
 class Analysis:
     """Analysis permits data analysis on downloaded games."""
@@ -10,6 +19,11 @@ class Analysis:
         self.interpret = func
         self.filter = None
         self.goal = None
+        self.start = None
+        self.step = None
+        self.finish = None
+        self.merge = None
+        self.fields = None
         if write_to_file:
             self.write = True
             self.file = write_to_file  # make smarter?
@@ -36,6 +50,46 @@ class Analysis:
         """Setter method for self.interpret."""
         self.interpret = func
 
+    def set_accumulator(self, start, step, finish=None, fields=None, merge=None):
+        """Makes the analysis runnable by run_analyses.
+
+        start() returns an empty state, step(state, game) adds a game
+        that passes self.filter to the state, and finish(state) returns
+        the result (the state itself if finish is None). fields lists
+        the metadata fields step reads (see GamesIterator), or None if
+        it needs whole games. step must not modify games, which are
+        shared between analyses.
+
+        merge(state, other) returns the state of the games of both, for
+        running in parallel. It can be left out if states have a merge
+        method, as those in tools.accumulators do.
+        """
+        self.start = start
+        self.step = step
+        self.finish = finish
+        self.fields = fields
+        self.merge = merge
+
+    def merge_states(self, state, other):
+        """Returns the state of the games added to state and to other."""
+        if self.merge is not None:
+            return self.merge(state, other)
+        return state.merge(other)
+
+    def can_merge(self):
+        """Returns True if states of the analysis merge."""
+        return self.merge is not None or hasattr(self.start(), "merge")
+
+    def cache_key(self):
+        """Returns the key of the cached results of the analysis, which
+        changes with its accumulator, fields and filter (see
+        results.fingerprint)."""
+        return results.analysis_key(self.start, self.step, self.finish, self.merge, self.fields, self.filter)
+
+    def scan(self, oldest_to_newest=True, workers=0, processes=0, cache=False):
+        """Runs the analysis alone over every game. See run_analyses."""
+        return run_analyses([self], oldest_to_newest, workers, processes, cache)[0]
+
     def update_file(self, data):
         """Updates file if needed."""
         if self.write:
@@ -99,6 +153,209 @@ class Analysis:
         assert next(self.data, None) is None
         return result
 
+
+def run_analyses(analyses, oldest_to_newest=True, workers=0, processes=0, cache=False):
+    """Runs analyses with accumulators over every game in one pass and
+    returns their results, in order. Results are also written to file
+    for analyses that write.
+
+    Games are decoded once for all analyses: projected to the fields
+    they need if every analysis lists its fields, and read only from
+    chunks the plan of some filter keeps (see Restriction.plan). Each
+    distinct filter is checked once per game. workers is passed on to
+    GamesIterator.
+
+    If processes is nonzero, chunks are instead scanned in that many
+    processes, each chunk into fresh states, which are merged in chunk
+    order (see Analysis.merge_states). Every analysis must then merge,
+    and should not depend on the order of games across chunks. The
+    processes are forked, so analyses need not pickle, but their
+    states must.
+
+    If cache is True, the partial states of each analysis are kept
+    between runs (see tools.io.results), and only chunks that are new or
+    changed since are scanned. Analyses that merge keep a state per
+    chunk, so a change anywhere costs a scan of that chunk; the others
+    resume from the state before the newest chunk, and rescan every
+    chunk if an older one changed or if oldest_to_newest is False.
+    States must then pickle, and processes applies to the merging
+    analyses only.
+    """
+    scan = _Scan(analyses)
+    if cache:
+        states = scan.run_cached(oldest_to_newest, workers, processes)
+    elif processes:
+        states = scan.run_parallel(oldest_to_newest, processes)
+    else:
+        states = scan.run(scan.chunks, oldest_to_newest, workers)
+
+    results = []
+    for analysis, state in zip(analyses, states):
+        result = state if analysis.finish is None else analysis.finish(state)
+        analysis.update_file(result)
+        results.append(result)
+    return results
+
+class _Scan:
+    """One pass of run_analyses: the analyses grouped by filter, and the
+    fields and chunks the pass reads."""
+
+    def __init__(self, analyses):
+        self.analyses = analyses
+        groups = {}
+        for i, analysis in enumerate(analyses):
+            group = groups.setdefault(id(analysis.filter), (analysis.filter, []))
+            group[1].append(i)
+        self.checks = [(None if restriction is None else restriction.compile(), group)
+                       for restriction, group in groups.values()]
+
+        fields, chunks = [], set()
+        for restriction, _ in groups.values():
+            if restriction is None:
+                chunks = None
+            elif chunks is not None:
+                chunks |= restriction.plan(ChunkMeta.list_ids()).chunks
+            if fields is not None and restriction is not None:
+                fields += restriction.get_fields()
+        for analysis in analyses:
+            fields = None if fields is None or analysis.fields is None else fields + list(analysis.fields)
+        self.fields, self.chunks = fields, chunks
+        self._subscans = {}
+
+    def run(self, chunks, oldest_to_newest=True, workers=0, progress=True, states=None):
+        """Returns the states of the analyses after scanning chunks (every
+        chunk if None), starting from states if given."""
+        if states is None:
+            states = [analysis.start() for analysis in self.analyses]
+        games = GamesIterator(oldest_to_newest, fields=self.fields, chunks=chunks, workers=workers)
+        for game in tqdm(games) if progress else games:
+            for validate, group in self.checks:
+                if validate is not None and not validate(game):
+                    continue
+                for i in group:
+                    self.analyses[i].step(states[i], game)
+        return states
+
+    def run_parallel(self, oldest_to_newest, processes):
+        """Returns the states of the analyses after scanning every chunk
+        in processes, merging per-chunk states in chunk order."""
+        for analysis in self.analyses:
+            if not analysis.can_merge():
+                raise ValueError(f'analysis {analysis} cannot merge, so cannot run in parallel')
+        chunks = ChunkMeta.list_ids() if self.chunks is None else ChunkMeta.list_ids() & self.chunks
+        chunks = sorted(chunks, reverse=not oldest_to_newest)
+        global _parallel_scan  # pylint: disable=global-statement
+        _parallel_scan = (self, oldest_to_newest)
+        states = [analysis.start() for analysis in self.analyses]
+        try:
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                for chunk_states in tqdm(pool.imap(_scan_chunk, chunks), total=len(chunks)):
+                    states = [analysis.merge_states(state, chunk_state)
+                              for analysis, state, chunk_state in zip(self.analyses, states, chunk_states)]
+        finally:
+            _parallel_scan = None
+        return states
+
+    def run_cached(self, oldest_to_newest, workers, processes):
+        """Returns the states of the analyses, reusing and updating their
+        cached results."""
+        chunk_manifest = ChunkMeta.get_manifest()
+        chunks = sorted(ChunkMeta.list_ids(), reverse=not oldest_to_newest)
+        checksums = {chunk: results.chunk_checksum(
+            chunk_manifest, f'{ChunkMeta.basepath}/{chunk}.{ChunkMeta.extension}', chunk) for chunk in chunks}
+        caches = [results.ResultCache(analysis.cache_key()) for analysis in self.analyses]
+        plans = [None if analysis.filter is None else analysis.filter.plan(chunks).chunks
+                 for analysis in self.analyses]
+        states = [None] * len(self.analyses)
+
+        # merging analyses: one cached state per chunk, scanning the misses
+        merging = [i for i, analysis in enumerate(self.analyses) if analysis.can_merge()]
+        chunk_states = {i: {} for i in merging}
+        missing = {}
+        for i in merging:
+            for chunk in chunks:
+                if plans[i] is not None and chunk not in plans[i]:
+                    continue
+                try:
+                    chunk_states[i][chunk] = caches[i].get(chunk, checksums[chunk])
+                except KeyError:
+                    missing.setdefault(chunk, []).append(i)
+        for chunk, scanned in self._scan_missing(missing, oldest_to_newest, workers, processes):
+            for i, state in zip(missing[chunk], scanned):
+                caches[i].put(chunk, checksums[chunk], state)
+                chunk_states[i][chunk] = state
+        for i in merging:
+            state = self.analyses[i].start()
+            for chunk in chunks:
+                if chunk in chunk_states[i]:
+                    state = self.analyses[i].merge_states(state, chunk_states[i][chunk])
+            states[i] = state
+            caches[i].prune(chunks)
+
+        # the others: resume from the checkpoint while it still matches
+        ordered = [i for i in range(len(self.analyses)) if i not in chunk_states]
+        keyed = [(chunk, checksums[chunk]) for chunk in chunks]
+        resume = {}
+        for i in ordered:
+            checkpoint = caches[i].get_checkpoint() if oldest_to_newest else None
+            if checkpoint is not None and keyed[:len(checkpoint[0])] == checkpoint[0]:
+                resume[i], states[i] = len(checkpoint[0]), checkpoint[1]
+            else:
+                resume[i], states[i] = 0, self.analyses[i].start()
+        for position in range(min(resume.values(), default=len(chunks)), len(chunks)):
+            if oldest_to_newest and position == len(chunks) - 1:
+                for i in ordered:
+                    if resume[i] < position:
+                        caches[i].put_checkpoint(keyed[:position], states[i])
+            group = [i for i in ordered if resume[i] <= position
+                     and (plans[i] is None or chunks[position] in plans[i])]
+            if group:
+                scanned = self._subscan(group).run([chunks[position]], oldest_to_newest, workers,
+                                                   progress=False, states=[states[i] for i in group])
+                for i, state in zip(group, scanned):
+                    states[i] = state
+        return states
+
+    def _scan_missing(self, missing, oldest_to_newest, workers, processes):
+        """Yields each chunk of missing (a dict from chunk to the indexes
+        of the analyses lacking its state) with the fresh states of those
+        analyses over it."""
+        if not processes:
+            for chunk in tqdm(missing):
+                yield chunk, self._subscan(missing[chunk]).run([chunk], oldest_to_newest, workers, progress=False)
+            return
+        global _parallel_scan  # pylint: disable=global-statement
+        _parallel_scan = (self, oldest_to_newest)
+        try:
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                tasks = [(chunk, tuple(group)) for chunk, group in missing.items()]
+                yield from zip(missing, tqdm(pool.imap(_scan_chunk_subset, tasks), total=len(tasks)))
+        finally:
+            _parallel_scan = None
+
+    def _subscan(self, group):
+        """Returns the scan of the analyses at the indexes in group."""
+        group = tuple(group)
+        if group not in self._subscans:
+            self._subscans[group] = _Scan([self.analyses[i] for i in group])
+        return self._subscans[group]
+
+# set by _Scan.run_parallel for the forked processes to read
+_parallel_scan = None
+
+def _scan_chunk(chunk):
+    """Returns the states of the analyses of the parallel scan after
+    scanning chunk alone."""
+    scan, oldest_to_newest = _parallel_scan
+    return scan.run([chunk], oldest_to_newest, progress=False)
+
+def _scan_chunk_subset(task):
+    """Returns the states of some analyses of the parallel scan after
+    scanning a chunk alone. task is (chunk, analysis indexes)."""
+    scan, oldest_to_newest = _parallel_scan
+    chunk, group = task
+    return scan._subscan(group).run([chunk], oldest_to_newest, progress=False)  # pylint: disable=protected-access
+
 # def score_hunt_analysis():
 #     """Model function."""
 #     get_data()  # should data instead be passed into function? maybe yes
@@ -0,0 +1,117 @@
+"""A process-wide LRU cache for decoded chunks.
+
+structures.Data.load consults CHUNK_CACHE for classes with cached set
+to True, and Data.save writes the saved data through to it. Entries
+are keyed by file path and are checked against the mtime and size of
+that file and any related files (such as append segments) on every
+hit, so writes from other processes are never missed.
+
+Loaded data is shared with the cache: only mutate data you intend to
+save.
+"""
+from collections import OrderedDict
+import os
+
+# parsed JSON takes roughly this many times its size on disk in memory
+ESTIMATED_EXPANSION = 3
+DEFAULT_BUDGET = 256 * 2**20
+
+
+class ChunkCache:
+    """Least-recently-used cache bounded by an estimated memory budget
+    in bytes. Keeps hit, miss and eviction counters."""
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, related=()):
+        """Returns the cached data for path, or None if absent or stale.
+        related lists other files the data was read from."""
+        entry = self.entries.get(path)
+        if entry is not None:
+            data, size, file_stamp = entry
+            if file_stamp == stamp(path, related):
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return data
+            self.invalidate(path)
+        self.misses += 1
+        return None
+
+    def __contains__(self, path: str):
+        """Returns True if path has an entry, current or not. Counts
+        neither a hit nor a miss."""
+        return path in self.entries
+
+    def put(self, path: str, data, file_stamp):
+        """Caches data, read from the file at path and its related files
+        when their stamp (see stamp) was file_stamp. Take the stamp before
+        reading, so a write in between leaves the entry stale rather than
+        current."""
+        self.invalidate(path)
+        if file_stamp is None:
+            return
+        size = sum(sizes[0] for sizes in file_stamp if sizes) * ESTIMATED_EXPANSION
+        if size > self.max_bytes:
+            return
+        self.entries[path] = (data, size, file_stamp)
+        self.num_bytes += size
+        self._evict()
+
+    def invalidate(self, path: str):
+        """Drops path from the cache if present."""
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            self.num_bytes -= entry[1]
+
+    def clear(self):
+        """Drops every entry. Counters are kept."""
+        self.entries.clear()
+        self.num_bytes = 0
+
+    def set_budget(self, max_bytes: int):
+        """Changes the memory budget, evicting entries if needed."""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def stats(self):
+        """Returns a dict of counters and current usage."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.num_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self):
+        while self.num_bytes > self.max_bytes:
+            _, (_, size, _) = self.entries.popitem(last=False)
+            self.num_bytes -= size
+            self.evictions += 1
+
+
+def stamp(path, related=()):
+    """Returns the sizes and mtimes of path and related files, using
+    None for missing related files. Returns None if path is missing.
+    Data read after this call is current while the stamp is unchanged."""
+    result = []
+    for i, file_path in enumerate((path, *related)):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            if i == 0:
+                return None
+            result.append(None)
+            continue
+        result.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(result)
+
+
+CHUNK_CACHE = ChunkCache()
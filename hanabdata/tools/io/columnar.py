@@ -0,0 +1,292 @@
+"""Reads and writes game metadata in a binary columnar format.
+
+A columnar chunk stores one typed array per field rather than one dict
+per game, so a scan that only needs a handful of fields decodes only
+those columns. Files start with a small JSON header giving the type
+and byte ranges of every column, followed by the column bytes.
+
+Only the fields listed in COLUMNS are stored. The JSON chunks in
+data/preprocessed/games remain the source of truth.
+
+Decoded columns are lists. With NumPy installed, to_arrays turns them
+into arrays so a batch of games can be filtered column at a time (see
+restriction.Restriction.mask).
+"""
+import array
+import json
+import struct
+import sys
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'HCOL'
+VERSION = 1
+
+# field name -> column type. Dotted names are keys nested in "options".
+# "i" and "b" are array typecodes, "?" is a bool stored as "b", "str"
+# is a string and "strlist" is a list of strings.
+COLUMNS = {
+    "id": "i",
+    "seed": "str",
+    "score": "b",
+    "numTurns": "i",
+    "endCondition": "b",
+    "datetimeStarted": "str",
+    "datetimeFinished": "str",
+    "numGamesOnThisSeed": "i",
+    "playerNames": "strlist",
+    "options.numPlayers": "b",
+    "options.startingPlayer": "b",
+    "options.variantID": "i",
+    "options.variantName": "str",
+    "options.timed": "?",
+    "options.timeBase": "i",
+    "options.timePerTurn": "i",
+    "options.speedrun": "?",
+    "options.cardCycle": "?",
+    "options.deckPlays": "?",
+    "options.emptyClues": "?",
+    "options.oneExtraCard": "?",
+    "options.oneLessCard": "?",
+    "options.allOrNothing": "?",
+    "options.detrimentalCharacters": "?",
+}
+
+# strings are joined on a character that never occurs in names, seeds
+# or dates so a whole column decodes with a single split
+_SEPARATOR = '\x00'
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def resolve_fields(fields=None):
+    """Returns the list of column names matching fields.
+
+    A field is either a column name such as "options.variantName" or a
+    prefix such as "options", which selects every column below it.
+    None selects all columns.
+    """
+    if fields is None:
+        return list(COLUMNS)
+    result = []
+    for field in fields:
+        if field in COLUMNS:
+            matches = [field]
+        else:
+            matches = [name for name in COLUMNS if name.startswith(field + '.')]
+        if not matches:
+            raise KeyError(f'{field} is not stored in columnar chunks!')
+        for name in matches:
+            if name not in result:
+                result.append(name)
+    return result
+
+
+def normalize_game(game):
+    """Returns game as a metadata dict, or None if there is no game.
+
+    Some metadata was stored as a one-element list holding the dict.
+    """
+    if isinstance(game, list) and len(game) == 1:
+        game = game[0]
+    if isinstance(game, dict) and "id" in game:
+        return game
+    return None
+
+
+def columns_from_games(games):
+    """Converts a list of metadata dicts (as stored in ChunkMeta) into a
+    dict from column name to list of values. Missing values are None.
+    """
+    rows = [game for game in map(normalize_game, games) if game is not None]
+    columns = {}
+    for name in COLUMNS:
+        path = name.split('.')
+        values = []
+        for game in rows:
+            value = game
+            for key in path:
+                if not isinstance(value, dict) or key not in value:
+                    value = None
+                    break
+                value = value[key]
+            values.append(value)
+        columns[name] = values
+    return columns
+
+
+def project(game, fields):
+    """Returns a copy of metadata dict game containing only the given
+    column names. Mirrors the rows produced from columnar chunks.
+    """
+    result = {}
+    for name in fields:
+        *parents, key = name.split('.')
+        source, target = game, result
+        for parent in parents:
+            source = source.get(parent) if isinstance(source, dict) else None
+            target = target.setdefault(parent, {})
+        if isinstance(source, dict) and key in source:
+            target[key] = source[key]
+    return result
+
+
+def iter_rows(columns):
+    """Yields nested game dicts from a dict of decoded columns. Missing
+    values are left out of the dict, matching the original JSON.
+    """
+    names = list(columns)
+    paths = [name.split('.') for name in names]
+    num_rows = len(columns[names[0]]) if names else 0
+    for i in range(num_rows):
+        game = {}
+        for name, path in zip(names, paths):
+            value = columns[name][i]
+            if value is None:
+                continue
+            target = game
+            for parent in path[:-1]:
+                target = target.setdefault(parent, {})
+            target[path[-1]] = value
+        yield game
+
+
+def num_rows(columns):
+    """Returns the number of games in a dict of columns."""
+    return len(next(iter(columns.values()))) if columns else 0
+
+
+def to_arrays(columns):
+    """Returns a dict of columns with each list converted to a NumPy
+    array: typed for numbers and bools, of objects for strings, string
+    lists and columns with missing values. Arrays are kept as they are.
+    Raises ImportError without NumPy."""
+    if np is None:
+        raise ImportError('to_arrays requires numpy')
+    arrays = {}
+    for name, values in columns.items():
+        if isinstance(values, np.ndarray):
+            arrays[name] = values
+        elif COLUMNS.get(name) in ("str", "strlist", None) or any(value is None for value in values):
+            arrays[name] = np.empty(len(values), dtype=object)
+            arrays[name][:] = values
+        else:
+            arrays[name] = np.array(values, dtype=bool if COLUMNS[name] == "?" else np.int64)
+    return arrays
+
+
+def take(columns, mask):
+    """Returns the rows of a dict of columns (lists or arrays) where
+    mask, a sequence of bools, is True."""
+    taken = {}
+    for name, values in columns.items():
+        if np is not None and isinstance(values, np.ndarray):
+            taken[name] = values[np.asarray(mask, dtype=bool)]
+        else:
+            taken[name] = [value for value, keep in zip(values, mask) if keep]
+    return taken
+
+
+def encode(columns):
+    """Returns the bytes of a columnar chunk for a dict of columns."""
+    header = {"version": VERSION, "rows": None, "columns": {}}
+    body = bytearray()
+
+    def add_buffer(buf):
+        start = len(body)
+        body.extend(buf)
+        return [start, len(buf)]
+
+    for name, values in columns.items():
+        if header["rows"] is None:
+            header["rows"] = len(values)
+        col_type = COLUMNS[name]
+        entry = {"type": col_type}
+        if any(value is None for value in values):
+            entry["nulls"] = add_buffer(bytes(value is not None for value in values))
+        if col_type == "str":
+            entry["data"] = add_buffer(_encode_strings(values))
+        elif col_type == "strlist":
+            counts = array.array('i', (len(value or ()) for value in values))
+            entry["counts"] = add_buffer(_to_bytes(counts))
+            flat = [name for value in values for name in (value or ())]
+            entry["data"] = add_buffer(_encode_strings(flat))
+        else:
+            typecode = 'b' if col_type == '?' else col_type
+            entry["data"] = add_buffer(_to_bytes(
+                array.array(typecode, (value or 0 for value in values))))
+        header["columns"][name] = entry
+    if header["rows"] is None:
+        header["rows"] = 0
+
+    header_bytes = json.dumps(header).encode('utf8')
+    return MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + bytes(body)
+
+
+def decode(raw, fields=None):
+    """Decodes the requested columns of a columnar chunk. Returns a dict
+    from column name to list of values; missing values are None.
+    """
+    if raw[:4] != MAGIC:
+        raise ValueError('not a columnar chunk')
+    (header_length,) = struct.unpack_from('<I', raw, 4)
+    header = json.loads(raw[8:8 + header_length])
+    if header["version"] != VERSION:
+        raise ValueError(f'unsupported columnar version {header["version"]}')
+    body = memoryview(raw)[8 + header_length:]
+    num_rows = header["rows"]
+
+    def get_buffer(span):
+        start, length = span
+        return body[start:start + length]
+
+    columns = {}
+    for name in resolve_fields(fields):
+        entry = header["columns"].get(name)
+        if entry is None:
+            columns[name] = [None] * num_rows
+            continue
+        col_type = entry["type"]
+        if col_type == "str":
+            values = _decode_strings(get_buffer(entry["data"]), num_rows)
+        elif col_type == "strlist":
+            counts = _from_bytes('i', get_buffer(entry["counts"]))
+            flat = _decode_strings(get_buffer(entry["data"]), sum(counts))
+            values, start = [], 0
+            for count in counts:
+                values.append(flat[start:start + count])
+                start += count
+        elif col_type == "?":
+            values = [bool(value) for value in get_buffer(entry["data"]).cast('b')]
+        else:
+            values = _from_bytes(col_type, get_buffer(entry["data"])).tolist()
+        if "nulls" in entry:
+            present = get_buffer(entry["nulls"])
+            values = [value if present[i] else None for i, value in enumerate(values)]
+        columns[name] = values
+    return columns
+
+
+def _encode_strings(values):
+    return _SEPARATOR.join(value or '' for value in values).encode('utf8')
+
+
+def _decode_strings(buf, count):
+    if count == 0:
+        return []
+    return bytes(buf).decode('utf8').split(_SEPARATOR)
+
+
+def _to_bytes(arr):
+    if not _LITTLE_ENDIAN:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_bytes(typecode, buf):
+    arr = array.array(typecode)
+    arr.frombytes(buf)
+    if not _LITTLE_ENDIAN:
+        arr.byteswap()
+    return arr
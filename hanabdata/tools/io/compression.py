@@ -0,0 +1,40 @@
+"""Optional compression of stored JSON using stdlib codecs.
+
+Compressed files keep their .json name. Each codec's output starts with
+bytes that JSON text never starts with, so readers detect compression
+from the first bytes of a file and need no configuration.
+"""
+import lzma
+import zlib
+
+# codec name -> (magic prefix, compress, decompress)
+CODECS = {
+    "zlib": (b'\x78', lambda raw: zlib.compress(raw, 6), zlib.decompress),
+    "lzma": (b'\xfd7zXZ\x00', lambda raw: lzma.compress(raw, preset=6), lzma.decompress),
+}
+
+
+def detect(raw: bytes):
+    """Returns the name of the codec raw was compressed with, or None if
+    raw is not compressed."""
+    for name, (magic, _, _) in CODECS.items():
+        if raw.startswith(magic):
+            return name
+    return None
+
+
+def compress(raw: bytes, codec=None):
+    """Compresses raw with the named codec. None leaves raw as is."""
+    if codec is None:
+        return raw
+    if codec not in CODECS:
+        raise NotImplementedError(f'unknown compression {codec}!')
+    return CODECS[codec][1](raw)
+
+
+def decompress(raw: bytes):
+    """Returns raw decompressed with whichever codec produced it."""
+    codec = detect(raw)
+    if codec is None:
+        return raw
+    return CODECS[codec][2](raw)
@@ -0,0 +1,139 @@
+"""An optional SQLite index over game metadata.
+
+MetaStore copies every game in preprocessed/games into a SQLite
+database with indexes on players, seed, variant, team size and finish
+date, so selective questions (one team, one seed, one variant since a
+date) skip the full scan. The JSON chunks remain the source of truth:
+populate copies any chunk that changed since the last run and drops
+chunks that are gone.
+"""
+import json
+import os
+import sqlite3
+from . import columnar
+from .. import structures
+
+DATABASE_PATH = './data/preprocessed/games.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    seed TEXT,
+    variant_id INTEGER,
+    num_players INTEGER,
+    datetime_started TEXT,
+    datetime_finished TEXT,
+    score INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    player TEXT NOT NULL,
+    game_id INTEGER NOT NULL,
+    PRIMARY KEY (player, game_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_seed ON games (seed);
+CREATE INDEX IF NOT EXISTS games_variant ON games (variant_id, datetime_finished);
+CREATE INDEX IF NOT EXISTS games_num_players ON games (num_players);
+CREATE INDEX IF NOT EXISTS games_finished ON games (datetime_finished);
+CREATE INDEX IF NOT EXISTS game_players_game ON game_players (game_id);
+"""
+
+
+class MetaStore:
+    """SQLite copy of the game metadata. Use as a context manager or
+    call close when done."""
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
+
+    def update_chunk(self, chunk_id: int, games: list):
+        """Replaces the stored games of a chunk with games, a list of
+        metadata as stored in ChunkMeta."""
+        low, high = chunk_id * 1000, chunk_id * 1000 + 999
+        rows, player_rows = [], []
+        for game in map(columnar.normalize_game, games):
+            if game is None:
+                continue
+            options = game.get("options", {})
+            rows.append((
+                game["id"], game.get("seed"), options.get("variantID"),
+                options.get("numPlayers"), game.get("datetimeStarted"),
+                game.get("datetimeFinished"), game.get("score"), json.dumps(game)
+            ))
+            player_rows.extend((player, game["id"]) for player in set(game.get("playerNames", ())))
+        with self.connection:
+            self.connection.execute("DELETE FROM game_players WHERE game_id BETWEEN ? AND ?", (low, high))
+            self.connection.execute("DELETE FROM games WHERE id BETWEEN ? AND ?", (low, high))
+            self.connection.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.executemany("INSERT INTO game_players VALUES (?, ?)", player_rows)
+
+    def populate(self, rebuild=False):
+        """Copies every metadata chunk that changed since it was last
+        copied (or every chunk if rebuild), and drops the games of chunks
+        that no longer exist. Returns the number copied."""
+        known = {chunk_id: (size, mtime_ns) for chunk_id, size, mtime_ns
+                 in self.connection.execute("SELECT id, size, mtime_ns FROM chunks")}
+        chunk_ids = structures.ChunkMeta.list_ids()
+        for chunk_id in set(known) - chunk_ids:
+            self.update_chunk(chunk_id, [])
+            with self.connection:
+                self.connection.execute("DELETE FROM chunks WHERE id = ?", (chunk_id,))
+        num_copied = 0
+        for chunk_id in sorted(chunk_ids):
+            stat = os.stat(f'{structures.ChunkMeta.basepath}/{chunk_id}.json')
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if not rebuild and known.get(chunk_id) == stamp:
+                continue
+            self.update_chunk(chunk_id, structures.ChunkMeta.load(chunk_id, use_cache=False).data)
+            with self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)", (chunk_id, *stamp))
+            num_copied += 1
+        return num_copied
+
+    def query(self, players=None, seed=None, variant_id=None, num_players=None,
+              since=None, until=None, min_id=None, max_id=None, oldest_to_newest=True):
+        """Yields metadata dicts, like GamesIterator, of games matching
+        every given argument. players is a name or a list of names that
+        must all have played; since and until bound datetimeFinished
+        (inclusive) and min_id and max_id bound the game ID."""
+        clauses, params = [], []
+        if isinstance(players, str):
+            players = [players]
+        for player in players or ():
+            clauses.append("id IN (SELECT game_id FROM game_players WHERE player = ?)")
+            params.append(player)
+        for column, value in (("seed", seed), ("variant_id", variant_id), ("num_players", num_players)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for column, operator, value in (("datetime_finished", ">=", since), ("datetime_finished", "<=", until),
+                                        ("id", ">=", min_id), ("id", "<=", max_id)):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        where = " AND ".join(clauses) or "1"
+        order = "ASC" if oldest_to_newest else "DESC"
+        cursor = self.connection.execute(f"SELECT data FROM games WHERE {where} ORDER BY id {order}", params)
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def count(self):
+        """Returns the number of stored games."""
+        return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
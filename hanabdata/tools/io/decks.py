@@ -0,0 +1,138 @@
+"""A seed-keyed store of decks shared by raw game chunks.
+
+Every game on a seed has the same deck. With Chunk.dedup_decks set,
+saved games leave out their deck, which goes to this store once per
+seed, and keep a "deckSeed" reference instead. Loaded games that
+reference a deck are DeckGames, which fetch it (through a cache) the
+first time game["deck"] is read.
+
+Only seeds game.seeds.parse_seed recognizes are shared, since "JSON"
+games bring their own decks. A game whose deck differs from the one
+stored for its seed keeps its own copy.
+"""
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from hanabdata.game.packed import PackedDeck
+from hanabdata.game.seeds import parse_seed
+
+DECK_PATH = './data/raw/decks.sqlite'
+CACHE_SIZE = 2**14
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS decks (seed TEXT PRIMARY KEY, deck BLOB NOT NULL)"
+
+
+class DeckStore:
+    """Decks by seed, kept packed where possible (see game.packed). Recently
+    read decks are cached."""
+
+    def __init__(self, path=None):
+        self.path = DECK_PATH if path is None else path
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(_SCHEMA)
+        self.cache = OrderedDict()
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
+
+    def _get_raw(self, seed: str):
+        raw = self.cache.get(seed)
+        if raw is not None:
+            self.cache.move_to_end(seed)
+            return raw
+        row = self.connection.execute("SELECT deck FROM decks WHERE seed = ?", (seed,)).fetchone()
+        if row is None:
+            return None
+        raw = self.cache[seed] = bytes(row[0])
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return raw
+
+    def get(self, seed: str, packed=False):
+        """Returns the deck of seed as a list of card dicts (or as a
+        PackedDeck if packed and it fits), or None if none is stored."""
+        raw = self._get_raw(seed)
+        if raw is None:
+            return None
+        if raw[:1] == b'[':
+            return json.loads(raw)
+        deck = PackedDeck(raw)
+        return deck if packed else deck.to_cards()
+
+    def put(self, seed: str, deck):
+        """Stores deck, a list of card dicts or a PackedDeck, for seed.
+        Returns False, storing nothing, if seed is not shareable or
+        already has a different deck."""
+        if parse_seed(seed) is None:
+            return False
+        if isinstance(deck, PackedDeck):
+            raw = deck.raw
+        else:
+            try:
+                raw = PackedDeck.from_cards(deck).raw
+            except (AttributeError, TypeError, ValueError):
+                raw = json.dumps(deck).encode('utf8')
+        stored = self._get_raw(seed)
+        if stored is not None:
+            return stored == raw
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO decks VALUES (?, ?)", (seed, raw))
+        return self._get_raw(seed) == raw
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM decks").fetchone()[0]
+
+
+_STORES = {}
+
+
+def get_store():
+    """Returns this process's DeckStore for DECK_PATH."""
+    key = (DECK_PATH, os.getpid())
+    if key not in _STORES:
+        _STORES[key] = DeckStore()
+    return _STORES[key]
+
+
+class DeckGame(dict):
+    """A game dict that fetches its deck from the deck store when
+    game["deck"] is first read. Note that "deck" in game and
+    game.get("deck") do not fetch it."""
+    packed = False
+
+    def __missing__(self, key):
+        if key != "deck" or "deckSeed" not in self:
+            raise KeyError(key)
+        deck = get_store().get(self["deckSeed"], self.packed)
+        if deck is None:
+            raise KeyError(f'no deck stored for seed {self["deckSeed"]}')
+        self["deck"] = deck
+        return deck
+
+
+class PackedDeckGame(DeckGame):
+    """A DeckGame that fetches its deck as a PackedDeck where it fits."""
+    packed = True
+
+
+def strip_deck(game):
+    """Returns game without its deck, moving the deck to the store, or
+    game itself if the deck cannot be shared."""
+    if isinstance(game, DeckGame):
+        return {key: value for key, value in game.items() if key != "deck"}
+    if type(game) is not dict or "deck" not in game or not isinstance(game.get("seed"), str):
+        return game
+    if not get_store().put(game["seed"], game["deck"]):
+        return game
+    stripped = {key: value for key, value in game.items() if key != "deck"}
+    stripped["deckSeed"] = game["seed"]
+    return stripped
+
+
+def rehydrate(game, packed=False):
+    """Returns game as a DeckGame if its deck is in the store."""
+    if type(game) is not dict or "deckSeed" not in game:
+        return game
+    return PackedDeckGame(game) if packed else DeckGame(game)
@@ -0,0 +1,353 @@
+"""Persistent indexes over game metadata.
+
+An InvertedIndex maps keys (such as player names) to the sorted IDs of
+the games they appear in. IDs are stored delta-encoded as varints, so
+a player's history is a short run of bytes located through the header.
+The index also records which keys each chunk contributed, so a chunk
+can be reindexed on its own whenever ChunkMeta saves it.
+
+ZoneMaps instead summarizes each chunk (ID and date ranges, the set of
+team sizes, variants and options present) so scans can skip chunks a
+Restriction cannot match (see Restriction.may_match). Its date ranges
+serve as the date index, since chunks are filled in order of game ID.
+Restriction.plan chooses which indexes a restricted scan uses.
+
+Indexes are built once over the whole corpus (see build_indexes.py)
+and afterwards kept current by update_indexes. An index only answers
+for the chunks listed in its header.
+"""
+import json
+import os
+import struct
+from . import columnar, read
+from hanabdata.game.seeds import format_seed, parse_seed
+
+INDEX_PATH = './data/preprocessed/indexes'
+
+MAGIC = b'HINV'
+VERSION = 1
+
+
+def encode_ids(ids):
+    """Returns sorted game IDs as delta-encoded varints."""
+    out, prev = bytearray(), 0
+    for game_id in ids:
+        delta, prev = game_id - prev, game_id
+        while delta >= 0x80:
+            out.append(delta & 0x7f | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_ids(raw):
+    """Inverse of encode_ids."""
+    ids, value, shift, prev = [], 0, 0, 0
+    for byte in raw:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        prev += value
+        ids.append(prev)
+        value, shift = 0, 0
+    return ids
+
+
+class InvertedIndex:
+    """Maps keys to sorted lists of game IDs. Subclasses define name and
+    get_keys, and may override key_to_str and str_to_key."""
+    name = None
+    _loaded = {}
+
+    def __init__(self, path=None):
+        if path is None:
+            path = f'{INDEX_PATH}/{self.name}.idx'
+        self.path = path
+        self.chunks = {}
+        self.spans = {}
+        self.body = b''
+        self.changed = {}
+
+    @staticmethod
+    def get_keys(game):
+        """Returns the keys under which metadata dict game is indexed."""
+        raise NotImplementedError
+
+    @staticmethod
+    def key_to_str(key):
+        """Returns the string used to store key."""
+        return key
+
+    @staticmethod
+    def str_to_key(text):
+        """Inverse of key_to_str."""
+        return text
+
+    @classmethod
+    def load(cls, path=None):
+        """Loads the index, reusing the copy from a previous load in this
+        process if the file has not changed since. Raises
+        FileNotFoundError if the index was never built."""
+        index = cls(path)
+        stamp = (read.file_size(index.path), _mtime(index.path))
+        if stamp[0] is None:
+            raise FileNotFoundError(index.path)
+        cached = cls._loaded.get(index.path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(index.path, 'rb') as index_file:
+            raw = index_file.read()
+        if raw[:4] != MAGIC:
+            raise ValueError(f'{index.path} is not an index')
+        (header_length,) = struct.unpack_from('<I', raw, 4)
+        header = json.loads(raw[8:8 + header_length])
+        if header["version"] != VERSION:
+            raise ValueError(f'unsupported index version {header["version"]}')
+        index.chunks = {int(chunk_id): keys for chunk_id, keys in header["chunks"].items()}
+        index.spans = header["keys"]
+        index.body = memoryview(raw)[8 + header_length:]
+        cls._loaded[index.path] = (stamp, index)
+        return index
+
+    def save(self):
+        """Writes the index to file atomically."""
+        spans, body = {}, bytearray()
+        for key in sorted(set(self.spans) | set(self.changed)):
+            ids = self.changed[key] if key in self.changed else None
+            if ids is None:
+                start, length, count = self.spans[key]
+                encoded = self.body[start:start + length]
+            elif ids:
+                encoded, count = encode_ids(ids), len(ids)
+            else:
+                continue
+            spans[key] = [len(body), len(encoded), count]
+            body.extend(encoded)
+        header = json.dumps({
+            "version": VERSION,
+            "chunks": {str(chunk_id): keys for chunk_id, keys in sorted(self.chunks.items())},
+            "keys": spans,
+        }).encode('utf8')
+        read.write_bytes_atomic(self.path, MAGIC + struct.pack('<I', len(header)) + header + body)
+        self.spans, self.body, self.changed = spans, memoryview(bytes(body)), {}
+        self._loaded[self.path] = ((read.file_size(self.path), _mtime(self.path)), self)
+
+    def get(self, key):
+        """Returns the sorted IDs of games indexed under key."""
+        text = self.key_to_str(key)
+        if text in self.changed:
+            return list(self.changed[text])
+        if text not in self.spans:
+            return []
+        start, length, _ = self.spans[text]
+        return decode_ids(self.body[start:start + length])
+
+    def count(self, key):
+        """Returns the number of games indexed under key."""
+        text = self.key_to_str(key)
+        if text in self.changed:
+            return len(self.changed[text])
+        return self.spans.get(text, (0, 0, 0))[2]
+
+    def keys(self):
+        """Returns every key with at least one game."""
+        texts = {text for text in self.spans if text not in self.changed}
+        texts.update(text for text, ids in self.changed.items() if ids)
+        return [self.str_to_key(text) for text in sorted(texts)]
+
+    def add_chunk(self, chunk_id: int, games: list):
+        """Indexes a chunk not yet in the index whose games are all newer
+        than every indexed game. Much faster than update_chunk when
+        building an index in order of chunk ID."""
+        texts = set()
+        for game in map(columnar.normalize_game, games):
+            if game is None:
+                continue
+            for key in self.get_keys(game):
+                text = self.key_to_str(key)
+                if text not in self.changed:
+                    self.changed[text] = self.get(key)
+                ids = self.changed[text]
+                if not ids or ids[-1] < game["id"]:
+                    ids.append(game["id"])
+                texts.add(text)
+        self.chunks[chunk_id] = sorted(texts)
+
+    def update_chunk(self, chunk_id: int, games: list):
+        """Reindexes a chunk given its metadata as stored in ChunkMeta."""
+        low, high = chunk_id * 1000, chunk_id * 1000 + 999
+        for text in self.chunks.get(chunk_id, ()):
+            ids = self.get(self.str_to_key(text))
+            self.changed[text] = [game_id for game_id in ids if not low <= game_id <= high]
+        new_ids = {}
+        for game in map(columnar.normalize_game, games):
+            if game is None:
+                continue
+            for key in self.get_keys(game):
+                new_ids.setdefault(self.key_to_str(key), set()).add(game["id"])
+        for text, ids in new_ids.items():
+            if text not in self.changed:
+                self.changed[text] = self.get(self.str_to_key(text))
+            self.changed[text] = sorted(set(self.changed[text]) | ids)
+        self.chunks[chunk_id] = sorted(new_ids)
+
+
+class PlayerIndex(InvertedIndex):
+    """Maps each player name to the IDs of the games they played."""
+    name = 'players'
+
+    @staticmethod
+    def get_keys(game):
+        return game.get("playerNames", ())
+
+
+class SeedIndex(InvertedIndex):
+    """Maps each seed, as a game.seeds.SeedKey, to the IDs of the games
+    played on it. Keys may also be given as seed names."""
+    name = 'seeds'
+
+    @staticmethod
+    def get_keys(game):
+        seed_key = parse_seed(game.get("seed", ""))
+        return () if seed_key is None else (seed_key,)
+
+    @staticmethod
+    def key_to_str(key):
+        if isinstance(key, str):
+            key = parse_seed(key)
+        return "" if key is None else format_seed(key)
+
+    @staticmethod
+    def str_to_key(text):
+        return parse_seed(text)
+
+
+class ZoneMaps:
+    """Maps each chunk ID to a summary of its games: the count, the
+    [min, max] of each field in RANGE_FIELDS and the distinct values of
+    each field in VALUE_FIELDS. A field no game has is summarized as
+    None. Has the same build and update interface as InvertedIndex."""
+    name = 'zones'
+    RANGE_FIELDS = ["id", "datetimeStarted", "datetimeFinished", "numTurns"]
+    VALUE_FIELDS = [
+        "score", "endCondition", "options.numPlayers", "options.variantID",
+        "options.speedrun", "options.startingPlayer", "options.deckPlays",
+        "options.emptyClues", "options.oneExtraCard", "options.oneLessCard",
+        "options.allOrNothing", "options.detrimentalCharacters",
+    ]
+    _loaded = {}
+
+    def __init__(self, path=None):
+        if path is None:
+            path = f'{INDEX_PATH}/{self.name}.json'
+        self.path = path
+        self.zones = {}
+
+    @classmethod
+    def load(cls, path=None):
+        """Loads the zone maps, reusing the copy from a previous load in
+        this process if the file has not changed since. Raises
+        FileNotFoundError if they were never built."""
+        zone_maps = cls(path)
+        stamp = (read.file_size(zone_maps.path), _mtime(zone_maps.path))
+        if stamp[0] is None:
+            raise FileNotFoundError(zone_maps.path)
+        cached = cls._loaded.get(zone_maps.path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(zone_maps.path, encoding='utf8') as zone_file:
+            header = json.load(zone_file)
+        if header["version"] != VERSION:
+            raise ValueError(f'unsupported zone map version {header["version"]}')
+        zone_maps.zones = {int(chunk_id): zone for chunk_id, zone in header["chunks"].items()}
+        cls._loaded[zone_maps.path] = (stamp, zone_maps)
+        return zone_maps
+
+    def save(self):
+        """Writes the zone maps to file atomically."""
+        text = json.dumps({
+            "version": VERSION,
+            "chunks": {str(chunk_id): zone for chunk_id, zone in sorted(self.zones.items())},
+        })
+        read.write_bytes_atomic(self.path, text.encode('utf8'))
+        self._loaded[self.path] = ((read.file_size(self.path), _mtime(self.path)), self)
+
+    def get(self, chunk_id: int):
+        """Returns the summary of a chunk, or None if it is not mapped."""
+        return self.zones.get(chunk_id)
+
+    def keys(self):
+        """Returns the IDs of every mapped chunk."""
+        return sorted(self.zones)
+
+    @classmethod
+    def summarize(cls, games):
+        """Returns the summary of a list of metadata as stored in
+        ChunkMeta."""
+        ranges = {field: None for field in cls.RANGE_FIELDS}
+        values = {field: set() for field in cls.VALUE_FIELDS}
+        count = 0
+        for game in map(columnar.normalize_game, games):
+            if game is None:
+                continue
+            count += 1
+            for field in cls.RANGE_FIELDS:
+                value = _get_field(game, field)
+                if value is None:
+                    continue
+                bounds = ranges[field]
+                if bounds is None:
+                    ranges[field] = [value, value]
+                elif value < bounds[0]:
+                    bounds[0] = value
+                elif value > bounds[1]:
+                    bounds[1] = value
+            for field in cls.VALUE_FIELDS:
+                value = _get_field(game, field)
+                if value is not None:
+                    values[field].add(value)
+        return {
+            "count": count,
+            "ranges": ranges,
+            "values": {field: sorted(found, key=json.dumps) if found else None
+                       for field, found in values.items()},
+        }
+
+    def add_chunk(self, chunk_id: int, games: list):
+        """Maps a chunk. Same as update_chunk."""
+        self.zones[chunk_id] = self.summarize(games)
+
+    def update_chunk(self, chunk_id: int, games: list):
+        """Remaps a chunk given its metadata as stored in ChunkMeta."""
+        self.zones[chunk_id] = self.summarize(games)
+
+
+INDEXES = [PlayerIndex, SeedIndex, ZoneMaps]
+
+
+def update_indexes(chunk_id: int, games: list):
+    """Reindexes a chunk in every index that has been built."""
+    for index_type in INDEXES:
+        try:
+            index = index_type.load()
+        except FileNotFoundError:
+            continue
+        index.update_chunk(chunk_id, games)
+        index.save()
+
+
+def _get_field(game, field):
+    """Returns the value of a dotted field of game, or None."""
+    option, _, key = field.partition('.')
+    value = game.get(option)
+    if key:
+        return value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _mtime(file_path):
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
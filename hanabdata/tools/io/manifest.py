@@ -0,0 +1,153 @@
+"""A manifest of the chunks in a chunk directory.
+
+The manifest lists every chunk with its game count, a bitmap of which
+entries are present, and the size, CRC-32 checksum and mtime of the
+chunk file (plus the size of any append segment), and the format
+version of chunks whose entries are all canonical (see is_canonical),
+which readers may then use without defensive checks. Listing chunks,
+finding missing games and finding the newest game then read one small
+file instead of globbing the directory or opening chunks.
+
+Chunk classes with manifested set keep a built manifest current on
+every write (see structures.Data); build_manifest.py builds one for
+existing data. Without a manifest, callers fall back to the directory.
+"""
+import json
+import os
+import zlib
+from . import read
+
+MANIFEST_NAME = 'chunks.manifest'
+VERSION = 1
+# chunks whose entries are all canonical are recorded with this format
+FORMAT_VERSION = 1
+
+
+def is_present(entry):
+    """Returns True if a chunk entry holds a game (or a recorded error)."""
+    return entry is not None
+
+
+def is_canonical(entry):
+    """Returns True if a chunk entry is None, "Error" or a game dict with
+    an ID, as opposed to legacy shapes such as a game wrapped in a list."""
+    return entry is None or entry == "Error" or (isinstance(entry, dict) and "id" in entry)
+
+
+class Manifest:
+    """Maps chunk IDs to entries of count, present (a hex bitmap with bit
+    i set if entry i is present), size, checksum, mtime_ns, segment_size
+    and format (FORMAT_VERSION if every entry is canonical, else 0)."""
+    _loaded = {}
+
+    def __init__(self, basepath: str):
+        self.path = f'{basepath}/{MANIFEST_NAME}'
+        self.chunks = {}
+
+    @classmethod
+    def load(cls, basepath: str):
+        """Loads the manifest of basepath, reusing the copy from a previous
+        load in this process if the file has not changed since. Raises
+        FileNotFoundError if it was never built."""
+        chunk_manifest = cls(basepath)
+        stamp = _stamp(chunk_manifest.path)
+        if stamp is None:
+            raise FileNotFoundError(chunk_manifest.path)
+        cached = cls._loaded.get(chunk_manifest.path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(chunk_manifest.path, encoding='utf8') as manifest_file:
+            header = json.load(manifest_file)
+        if header["version"] != VERSION:
+            raise ValueError(f'unsupported manifest version {header["version"]}')
+        chunk_manifest.chunks = {int(chunk_id): entry for chunk_id, entry in header["chunks"].items()}
+        cls._loaded[chunk_manifest.path] = (stamp, chunk_manifest)
+        return chunk_manifest
+
+    def save(self):
+        """Writes the manifest to file atomically."""
+        text = json.dumps({
+            "version": VERSION,
+            "chunks": {str(chunk_id): entry for chunk_id, entry in sorted(self.chunks.items())},
+        })
+        read.write_bytes_atomic(self.path, text.encode('utf8'))
+        self._loaded[self.path] = (_stamp(self.path), self)
+
+    def record(self, chunk_id: int, data: list, file_path: str, segment_path=None):
+        """Records a chunk just written to file_path, whose entries
+        (including any segment at segment_path) are data."""
+        bits, canonical = 0, True
+        for i, entry in enumerate(data):
+            if is_present(entry):
+                bits |= 1 << i
+            if canonical and not is_canonical(entry):
+                canonical = False
+        with open(file_path, 'rb') as chunk_file:
+            checksum = zlib.crc32(chunk_file.read())
+        stat = os.stat(file_path)
+        self.chunks[chunk_id] = {
+            "count": bin(bits).count("1"),
+            "present": format(bits, 'x'),
+            "size": stat.st_size,
+            "checksum": checksum,
+            "mtime_ns": stat.st_mtime_ns,
+            "segment_size": (read.file_size(segment_path) or 0) if segment_path else 0,
+            "format": FORMAT_VERSION if canonical else 0,
+        }
+
+    def record_entries(self, chunk_id: int, entries: dict, segment_path: str):
+        """Records entries (a dict from index to game data) just appended
+        to the segment of a chunk."""
+        entry = self.chunks.get(chunk_id)
+        if entry is None:
+            entry = self.chunks[chunk_id] = {
+                "present": "0", "size": 0, "checksum": 0, "mtime_ns": 0, "format": FORMAT_VERSION,
+            }
+        bits = int(entry["present"], 16)
+        for i, game in entries.items():
+            if is_present(game):
+                bits |= 1 << i
+            if not is_canonical(game):
+                entry["format"] = 0
+        entry["count"] = bin(bits).count("1")
+        entry["present"] = format(bits, 'x')
+        entry["segment_size"] = read.file_size(segment_path) or 0
+
+    def ids(self):
+        """Returns the set of chunk IDs."""
+        return set(self.chunks)
+
+    def has_game(self, game_id: int):
+        """Returns True if the game is present."""
+        chunk_id, index = divmod(game_id, 1000)
+        entry = self.chunks.get(chunk_id)
+        return entry is not None and int(entry["present"], 16) >> index & 1 == 1
+
+    def is_repaired(self, chunk_id: int):
+        """Returns True if every entry of the chunk is canonical."""
+        entry = self.chunks.get(chunk_id)
+        return entry is not None and entry.get("format") == FORMAT_VERSION
+
+    def newest_game(self):
+        """Returns the highest present game ID, or None if there is none."""
+        for chunk_id in sorted(self.chunks, reverse=True):
+            bits = int(self.chunks[chunk_id]["present"], 16)
+            if bits:
+                return chunk_id * 1000 + bits.bit_length() - 1
+        return None
+
+    def is_current(self, chunk_id: int, file_path: str, segment_path=None):
+        """Returns True if the file at file_path (and segment_path) still
+        has the sizes and mtime recorded for the chunk."""
+        entry = self.chunks.get(chunk_id)
+        if entry is None or _stamp(file_path) != (entry["size"], entry["mtime_ns"]):
+            return False
+        return segment_path is None or (read.file_size(segment_path) or 0) == entry["segment_size"]
+
+
+def _stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,44 @@
+"""Offset tables locating each game inside a JSON chunk.
+
+A chunk at N.json gets a sidecar N.idx holding the byte offset and
+length of every entry of the JSON list, along with the size and mtime
+of the chunk it describes. Reading one game then costs a seek and a
+json.loads of that game alone. A table whose recorded size or mtime no
+longer matches its chunk is stale and must be ignored.
+"""
+import array
+import struct
+import sys
+from os import path
+
+MAGIC = b'HIDX'
+_HEADER = struct.Struct('<4sQqI')
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+def index_path(file_path: str):
+    """Returns the path of the offset table for a chunk."""
+    root, _ = path.splitext(file_path)
+    return root + '.idx'
+
+
+def encode(spans, size, mtime_ns):
+    """Returns the bytes of an offset table. spans is a list of
+    (offset, length) pairs, one per entry in the chunk."""
+    flat = array.array('Q', (value for span in spans for value in span))
+    if not _LITTLE_ENDIAN:
+        flat.byteswap()
+    return _HEADER.pack(MAGIC, size, mtime_ns, len(spans)) + flat.tobytes()
+
+
+def decode(raw):
+    """Returns (size, mtime_ns, spans) from the bytes of an offset table,
+    where spans is a flat array of alternating offsets and lengths."""
+    magic, size, mtime_ns, count = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError('not an offset table')
+    flat = array.array('Q')
+    flat.frombytes(raw[_HEADER.size:_HEADER.size + 16 * count])
+    if not _LITTLE_ENDIAN:
+        flat.byteswap()
+    return size, mtime_ns, flat
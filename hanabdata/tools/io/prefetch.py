@@ -0,0 +1,29 @@
+"""Ordered read-ahead of chunks in a process pool.
+
+A full scan spends most of its time decoding chunks, one after another
+on one core. read_ahead decodes the next chunks in worker processes
+while the caller handles the current one, yielding results in task
+order. At most depth results are pending or waiting at a time, so
+memory stays bounded however slow the caller is.
+"""
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+
+def read_ahead(func, tasks, workers=0, depth=None):
+    """Yields func(task) for each of tasks, in order. If workers is
+    nonzero, runs func in that many processes, up to depth (by default
+    workers) tasks ahead of the caller; func and tasks must then pickle.
+    Otherwise runs func here, one task at a time."""
+    if not workers:
+        yield from map(func, tasks)
+        return
+    tasks = iter(tasks)
+    with Pool(workers) as pool:
+        pending = deque(pool.apply_async(func, (task,)) for task in islice(tasks, depth or workers))
+        while pending:
+            result = pending.popleft().get()
+            for task in islice(tasks, 1):
+                pending.append(pool.apply_async(func, (task,)))
+            yield result
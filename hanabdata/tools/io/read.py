@@ -6,40 +6,205 @@ we disable the function docstring check from pylint.
 """
 # pylint: disable=missing-function-docstring
 import csv
+import io
 import json
+import os
 import pathlib
 from os import path
+from . import columnar, compression, offsets
 from .. import structures
 
 # functions to understand existing files
 
-def get_file_names(path: str):
-    """Returns a list of JSON files in the given directory."""
+def get_file_names(path: str, extension='json'):
+    """Returns a list of names of files with the given extension (JSON
+    by default) in the given directory, without the extension."""
     file_list = []
     folder = pathlib.Path(path)
-    for file in folder.glob("*.json"):
-        file_list.append(file.name[:-5])
+    for file in folder.glob(f"*.{extension}"):
+        file_list.append(file.stem)
     return file_list
 
 def file_exists(filepath: str):
     return path.isfile(filepath)
 
+def file_size(filepath: str):
+    """Returns the size of a file in bytes, or None if it does not exist."""
+    try:
+        return path.getsize(filepath)
+    except FileNotFoundError:
+        return None
+
+def remove_file(filepath: str):
+    """Deletes a file if it exists."""
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
+
 # Read and write JSONs and CSVs
 
 def read_json(file_path):
-    with open(file_path, encoding="utf8") as json_file:
-        try:
-            data = json.load(json_file)
-        except BaseException as e:
-            print(e)
-            print(f"The offending file is found at: {file_path}")
-            raise e
+    """Reads a JSON file, decompressing it first if it is compressed."""
+    with open(file_path, 'rb') as json_file:
+        raw = json_file.read()
+    try:
+        data = json.loads(compression.decompress(raw))
+    except BaseException as e:
+        print(e)
+        print(f"The offending file is found at: {file_path}")
+        raise e
     return data
 
-def write_json(file_path, txt: str):
+def write_json(file_path, txt: str, codec=None):
+    """Writes JSON, compressed with codec (see io.compression) if given."""
+    _assert_is_file(file_path)
+    if codec is None:
+        with open(file_path, 'w', encoding="utf8") as outfile:
+            json.dump(txt, outfile)
+        return
+    with open(file_path, 'wb') as outfile:
+        outfile.write(compression.compress(json.dumps(txt).encode('utf8'), codec))
+
+def write_indexed_json(file_path, entries: list, codec=None):
+    """Writes a JSON list exactly as write_json does, plus an offset
+    table so single entries can be read with read_indexed_json.
+
+    Offsets of compressed files refer to the decompressed JSON."""
+    _assert_is_file(file_path)
+    spans, pieces, position = [], [], 1
+    for entry in entries:
+        # json.dumps escapes non-ASCII, so characters are bytes here
+        text = json.dumps(entry)
+        spans.append((position, len(text)))
+        pieces.append(text)
+        position += len(text) + 2
+    with open(file_path, 'wb') as outfile:
+        outfile.write(compression.compress(('[' + ', '.join(pieces) + ']').encode('utf8'), codec))
+    stat = os.stat(file_path)
+    with open(offsets.index_path(file_path), 'wb') as index_file:
+        index_file.write(offsets.encode(spans, stat.st_size, stat.st_mtime_ns))
+
+def read_indexed_json(file_path, indices):
+    """Returns a dict from each index to that entry of the JSON list
+    at file_path, decoding nothing else. Returns None if the offset
+    table is missing or stale, in which case use read_json."""
+    try:
+        with open(offsets.index_path(file_path), 'rb') as index_file:
+            size, mtime_ns, spans = offsets.decode(index_file.read())
+        stat = os.stat(file_path)
+    except (FileNotFoundError, ValueError):
+        return None
+    if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    result = {}
+    with open(file_path, 'rb') as json_file:
+        head = json_file.read(8)
+        if compression.detect(head) is not None:
+            # compressed files cannot seek, but decompressing is still
+            # far cheaper than parsing every entry
+            json_file = io.BytesIO(compression.decompress(head + json_file.read()))
+        for i in sorted(set(indices)):
+            if 2 * i >= len(spans):
+                result[i] = None
+                continue
+            json_file.seek(spans[2 * i])
+            result[i] = json.loads(json_file.read(spans[2 * i + 1]))
+    return result
+
+def append_segment(file_path, entries: dict):
+    """Appends (index, entry) pairs to a segment file, one JSON line each.
+    A partially written last line (from an interrupted append) is cut
+    off first, so the new lines do not run into it."""
     _assert_is_file(file_path)
-    with open(file_path, 'w', encoding="utf8") as outfile:
-        json.dump(txt, outfile)
+    lines = ''.join(json.dumps([index, entry]) + '\n' for index, entry in entries.items())
+    with open(file_path, 'ab+') as segment_file:
+        segment_file.truncate(_complete_size(segment_file))
+        segment_file.write(lines.encode('utf8'))
+
+def _complete_size(segment_file, block_size=4096):
+    """Returns the size of an open segment file up to the end of its last
+    complete line."""
+    position = segment_file.seek(0, os.SEEK_END)
+    while position > 0:
+        start = max(0, position - block_size)
+        segment_file.seek(start)
+        newline = segment_file.read(position - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+def append_text(file_path, text: str):
+    _assert_is_file(file_path)
+    with open(file_path, 'a', encoding="utf8", newline='\n') as outfile:
+        outfile.write(text)
+
+def read_segment(file_path):
+    """Returns the (index, entry) pairs of a segment file in the order
+    they were appended. Returns [] if there is no segment. A partially
+    written last line (from an interrupted append) is ignored."""
+    try:
+        with open(file_path, encoding="utf8") as segment_file:
+            lines = segment_file.read().split('\n')
+    except FileNotFoundError:
+        return []
+    entries = []
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            if i != len(lines) - 1:
+                raise
+    return entries
+
+# user histories: a fixed-size JSON header, then one JSON row per line,
+# oldest first. The header records the committed size of the file, so
+# rows from an interrupted append are ignored and later overwritten.
+HISTORY_HEADER_SIZE = 128
+
+def _encode_history_header(newest_id, count, size):
+    header = json.dumps({"version": 1, "newest_id": newest_id, "count": count, "size": size})
+    return header.encode('utf8').ljust(HISTORY_HEADER_SIZE - 1) + b'\n'
+
+def _encode_history_rows(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows).encode('utf8')
+
+def read_history_header(file_path):
+    with open(file_path, 'rb') as history_file:
+        return json.loads(history_file.read(HISTORY_HEADER_SIZE))
+
+def read_history(file_path):
+    with open(file_path, 'rb') as history_file:
+        header = json.loads(history_file.read(HISTORY_HEADER_SIZE))
+        body = history_file.read(header["size"] - HISTORY_HEADER_SIZE)
+    return [json.loads(line) for line in body.splitlines()]
+
+def write_history(file_path, rows: list):
+    body = _encode_history_rows(rows)
+    newest_id = rows[-1]["id"] if rows else None
+    header = _encode_history_header(newest_id, len(rows), HISTORY_HEADER_SIZE + len(body))
+    write_bytes_atomic(file_path, header + body)
+
+def append_history(file_path, rows: list):
+    if not path.isfile(file_path):
+        write_history(file_path, rows)
+        return
+    if not rows:
+        return
+    with open(file_path, 'r+b') as history_file:
+        header = json.loads(history_file.read(HISTORY_HEADER_SIZE))
+        body = _encode_history_rows(rows)
+        history_file.seek(header["size"])
+        history_file.truncate()
+        history_file.write(body)
+        history_file.flush()
+        os.fsync(history_file.fileno())
+        history_file.seek(0)
+        history_file.write(_encode_history_header(
+            rows[-1]["id"], header["count"] + len(rows), header["size"] + len(body)))
 
 def read_csv(file_path):
     _assert_is_file(file_path)
@@ -53,6 +218,24 @@ def write_csv(file_path, data: list):
         csvwriter = csv.writer(csvfile, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
         csvwriter.writerows(data)
 
+def read_columns(file_path, fields=None):
+    with open(file_path, 'rb') as col_file:
+        return columnar.decode(col_file.read(), fields)
+
+def write_columns(file_path, columns: dict):
+    _assert_is_file(file_path)
+    with open(file_path, 'wb') as col_file:
+        col_file.write(columnar.encode(columns))
+
+def write_bytes_atomic(file_path, raw: bytes):
+    """Writes raw so readers see either the old or the new file, never
+    a partial one."""
+    _assert_is_file(file_path)
+    temp_path = f'{file_path}.tmp'
+    with open(temp_path, 'wb') as outfile:
+        outfile.write(raw)
+    os.replace(temp_path, file_path)
+
 def _assert_is_file(file_path):
     if path.exists(file_path):
         assert path.isfile(file_path)
@@ -70,7 +253,8 @@ def write(tag, data, data_type = 'user', processing_level = 'raw'):
 
 def get_users():
     """Returns a list of usernames."""
-    return get_file_names("./data/raw/users")
+    histories = get_file_names(structures.User.basepath, structures.User.history_extension)
+    return sorted(set(get_file_names(structures.User.basepath)) | set(histories))
 
 def get_game_ids():
     """Returns a list of game IDs from the old format."""
@@ -95,22 +279,30 @@ def read_games_from_chunk(games: list, chunk: int, meta=False):
         chunk_path = f'./data/preprocessed/games/{chunk}.json'
     else:
         chunk_path = f'./data/raw/games/{chunk}.json'
+    game_ids = []
+    while games and games[-1] < (chunk + 1) * 1000:
+        game_id = games.pop()
+        assert game_id >= chunk * 1000
+        game_ids.append(game_id)
+    indices = [game_id % 1000 for game_id in game_ids]
     if file_exists(chunk_path):
+        chunk_type = structures.ChunkMeta if meta else structures.Chunk
         try:
-            if meta:
-                data = structures.ChunkMeta.load(chunk)
-            else:
-                data = structures.Chunk.load(chunk)
+            entries = chunk_type.load_entries(chunk, indices)
         except ValueError:
-            data = [None] * 1000
+            entries = dict.fromkeys(indices)
     else:
-        data = [None] * 1000
-    games_dict = {}
-    while games and games[-1] < (chunk + 1) * 1000:
-        game_id = games.pop()
-        assert game_id >= chunk * 1000
-        games_dict[game_id] = data[game_id % 1000]
-    return games_dict
+        entries = dict.fromkeys(indices)
+    return {game_id: entries[game_id % 1000] for game_id in game_ids}
+
+def read_game_from_chunk(game_id: int, meta=False):
+    """Returns the stored data for one game, or None if there is none."""
+    chunk, index = divmod(game_id, 1000)
+    chunk_type = structures.ChunkMeta if meta else structures.Chunk
+    try:
+        return chunk_type.load_entries(chunk, [index])[index]
+    except (structures.DatabaseError, ValueError):
+        return None
 
 def write_games_to_chunk(games: dict, chunk: int, meta=False):
     # note file should exist if this function is called. checks anyway
@@ -119,12 +311,10 @@ def write_games_to_chunk(games: dict, chunk: int, meta=False):
     else:
         chunk_path = f'data/raw/games/{chunk}.json'
 
+    chunk_type = structures.ChunkMeta if meta else structures.Chunk
     if file_exists(chunk_path):
         try:
-            if meta:
-                data = structures.ChunkMeta.load(chunk).data
-            else: 
-                data = structures.Chunk.load(chunk).data
+            data = chunk_type.load(chunk).data
         except ValueError:
             data = [None] * 1000
     else:
@@ -133,4 +323,4 @@ def write_games_to_chunk(games: dict, chunk: int, meta=False):
         _, i = divmod(game_id, 1000)
         assert _ == chunk  # remove
         data[i] = games[game_id]
-    write_json(chunk_path, data)
+    chunk_type(data, chunk).save()
@@ -0,0 +1,125 @@
+"""Cached partial results of analyses.
+
+run_analyses(cache=True) (see tools.analysis) stores the accumulator
+state of each analysis per metadata chunk, with the chunk's checksum,
+so a rerun only scans chunks that are new or changed since. Analyses
+whose states do not merge instead keep one checkpoint: the state after
+every chunk but the newest, with the chunks and checksums it covers.
+
+Each analysis has its own directory under RESULT_PATH, named by a hash
+of the analysis (see fingerprint), so changing an analysis or its
+restriction starts a new cache.
+"""
+import hashlib
+import os
+import pickle
+import types
+import zlib
+from . import read
+
+RESULT_PATH = './data/processed/results'
+CHECKPOINT_NAME = 'checkpoint'
+
+
+def fingerprint(value, _seen=None):
+    """Returns a string identifying value across runs: the code of
+    functions along with their defaults and closures, and the contents
+    of containers and objects. Functions called through globals are
+    identified by name only."""
+    if _seen is None:
+        _seen = set()
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return repr(value)
+    if isinstance(value, (type, types.BuiltinFunctionType)):
+        return f'{value.__module__}.{value.__qualname__}'
+    if id(value) in _seen:
+        return '<cycle>'
+    _seen.add(id(value))
+
+    def inner(item):
+        return fingerprint(item, _seen)
+
+    if isinstance(value, (list, tuple)):
+        return f'{type(value).__name__}[{",".join(map(inner, value))}]'
+    if isinstance(value, (set, frozenset)):
+        return f'{type(value).__name__}{{{",".join(sorted(map(inner, value)))}}}'
+    if isinstance(value, dict):
+        items = sorted(f'{inner(key)}:{inner(item)}' for key, item in value.items())
+        return f'{type(value).__name__}{{{",".join(items)}}}'
+    if isinstance(value, types.MethodType):
+        return f'method({inner(value.__func__)},{inner(value.__self__)})'
+    if isinstance(value, types.FunctionType):
+        cells = [cell.cell_contents for cell in value.__closure__ or ()]
+        return f'function({inner(value.__code__)},{inner(value.__defaults__)},{inner(cells)})'
+    if isinstance(value, types.CodeType):
+        return f'code({value.co_code.hex()},{inner(value.co_consts)},{inner(value.co_names)})'
+    if hasattr(value, '__dict__'):
+        return f'{type(value).__qualname__}({inner(vars(value))})'
+    return type(value).__qualname__
+
+
+def analysis_key(*parts):
+    """Returns the directory name for an analysis made of parts."""
+    return hashlib.sha256(fingerprint(parts).encode('utf8')).hexdigest()[:32]
+
+
+def chunk_checksum(chunk_manifest, file_path: str, chunk_id: int):
+    """Returns the checksum of a chunk, from its manifest entry while that
+    is current, or None if the chunk does not exist."""
+    if chunk_manifest is not None and chunk_manifest.is_current(chunk_id, file_path):
+        return chunk_manifest.chunks[chunk_id]["checksum"]
+    try:
+        with open(file_path, 'rb') as chunk_file:
+            return zlib.crc32(chunk_file.read())
+    except FileNotFoundError:
+        return None
+
+
+class ResultCache:
+    """The cached states of one analysis."""
+
+    def __init__(self, key: str):
+        self.path = f'{RESULT_PATH}/{key}'
+
+    def get(self, chunk_id: int, checksum):
+        """Returns the state of the chunk if cached with checksum. Raises
+        KeyError otherwise."""
+        stored = self._load(str(chunk_id))
+        if stored is None or stored[0] != checksum:
+            raise KeyError(chunk_id)
+        return stored[1]
+
+    def put(self, chunk_id: int, checksum, state):
+        """Caches the state of a chunk with the given checksum."""
+        self._save(str(chunk_id), (checksum, state))
+
+    def get_checkpoint(self):
+        """Returns (chunks, state), where chunks lists the (chunk ID,
+        checksum) pairs state covers, in order, or None if there is no
+        checkpoint."""
+        return self._load(CHECKPOINT_NAME)
+
+    def put_checkpoint(self, chunks: list, state):
+        """Stores state as covering chunks, a list of (chunk ID, checksum)
+        pairs in order."""
+        self._save(CHECKPOINT_NAME, (chunks, state))
+
+    def prune(self, chunk_ids):
+        """Deletes the cached states of chunks not in chunk_ids."""
+        for name in read.get_file_names(self.path, 'pkl'):
+            if name.isdigit() and int(name) not in chunk_ids:
+                read.remove_file(f'{self.path}/{name}.pkl')
+
+    def _load(self, name):
+        try:
+            with open(f'{self.path}/{name}.pkl', 'rb') as state_file:
+                return pickle.load(state_file)
+        except FileNotFoundError:
+            return None
+        except Exception:  # pylint: disable=broad-except
+            # an unreadable entry is recomputed
+            return None
+
+    def _save(self, name, stored):
+        os.makedirs(self.path, exist_ok=True)
+        read.write_bytes_atomic(f'{self.path}/{name}.pkl', pickle.dumps(stored, pickle.HIGHEST_PROTOCOL))
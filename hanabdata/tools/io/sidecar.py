@@ -0,0 +1,71 @@
+"""Pickled sidecars of decoded chunks.
+
+Decoding a JSON chunk costs far more than unpickling the same data.
+Data classes with sidecars set write the decoded data next to the chunk
+the first time they read it, and later loads read the sidecar instead
+while it is current.
+
+A sidecar starts with a magic number and VERSION, then the sizes and
+mtimes of the chunk file and its related files (see
+structures.Data._related_paths) when they were read, then the data. A
+sidecar whose version or recorded stamp no longer matches is ignored.
+build_sidecars.py builds, verifies and prunes sidecars in bulk.
+"""
+import os
+import pickle
+import struct
+from . import cache, read
+
+EXTENSION = 'pkl'
+MAGIC = b'HDSC'
+VERSION = 1
+_HEADER = struct.Struct('>4sH')
+
+
+def sidecar_path(file_path: str):
+    """Returns the path of the sidecar for a chunk."""
+    root, _ = os.path.splitext(file_path)
+    return f'{root}.{EXTENSION}'
+
+
+def read_stamp(file_path: str):
+    """Returns the stamp recorded in the sidecar of a chunk, or None if
+    it is missing, of another version or unreadable."""
+    try:
+        with open(sidecar_path(file_path), 'rb') as sidecar_file:
+            return _read_header(sidecar_file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, struct.error):
+        return None
+
+
+def load(file_path: str, related=()):
+    """Returns the data in the sidecar of a chunk, or None if there is
+    no current sidecar."""
+    try:
+        with open(sidecar_path(file_path), 'rb') as sidecar_file:
+            recorded = _read_header(sidecar_file)
+            if recorded is None or recorded != cache.stamp(file_path, related):
+                return None
+            return pickle.load(sidecar_file)
+    except FileNotFoundError:
+        return None
+    except Exception:  # pylint: disable=broad-except
+        # a truncated or outdated pickle is as good as none
+        return None
+
+
+def save(file_path: str, data, file_stamp):
+    """Writes data, read from a chunk whose stamp (see cache.stamp) was
+    file_stamp before reading, to the sidecar of the chunk."""
+    if file_stamp is None:
+        return
+    raw = _HEADER.pack(MAGIC, VERSION) + pickle.dumps(file_stamp, pickle.HIGHEST_PROTOCOL) \
+        + pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+    read.write_bytes_atomic(sidecar_path(file_path), raw)
+
+
+def _read_header(sidecar_file):
+    magic, version = _HEADER.unpack(sidecar_file.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        return None
+    return pickle.load(sidecar_file)
@@ -0,0 +1,90 @@
+"""Symbol tables mapping names to small integer IDs.
+
+Player and variant names repeat across millions of games. A SymbolTable
+gives each name an ID in order of first appearance, so analyses can key
+lists, arrays and sets by int instead of holding a string per game (see
+GamesIterator(symbols=True)).
+
+Tables are stored next to the game store as one name per line, where
+line i holds the name with ID i. IDs never change: saving only appends
+names interned since the last save. Only one process should intern
+into a table at a time.
+"""
+import os
+from . import read
+
+SYMBOL_PATH = './data/preprocessed'
+
+PLAYERS = 'players'
+VARIANTS = 'variants'
+
+
+class SymbolTable:
+    """Maps names to IDs and back. Use load rather than the constructor."""
+    _loaded = {}
+
+    def __init__(self, path: str):
+        self.path = path
+        self.names = []
+        self.ids = {}
+        self.num_saved = 0
+
+    @classmethod
+    def load(cls, name: str):
+        """Loads the table called name, or an empty one if none is
+        stored. Returns the same table on every call in this process,
+        reloaded first if the file changed since."""
+        path = f'{SYMBOL_PATH}/{name}.symbols'
+        stamp = _stamp(path)
+        cached = cls._loaded.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        table = cls(path)
+        if stamp is not None:
+            with open(path, encoding='utf8', newline='\n') as table_file:
+                text = table_file.read()
+            complete = text[:text.rfind('\n') + 1]
+            if complete != text:
+                # drop a last line cut short by an interrupted save
+                os.truncate(path, len(complete.encode('utf8')))
+                stamp = _stamp(path)
+            table.names = complete.split('\n')[:-1]
+            table.ids = {symbol: symbol_id for symbol_id, symbol in enumerate(table.names)}
+            table.num_saved = len(table.names)
+        cls._loaded[path] = (stamp, table)
+        return table
+
+    def save(self):
+        """Appends the names interned since the last save to file."""
+        if self.num_saved == len(self.names):
+            return
+        read.append_text(self.path, ''.join(f'{name}\n' for name in self.names[self.num_saved:]))
+        self.num_saved = len(self.names)
+        self._loaded[self.path] = (_stamp(self.path), self)
+
+    def intern(self, name: str):
+        """Returns the ID of name, giving it a new one if needed."""
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            symbol_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol_id
+
+    def get(self, name: str):
+        """Returns the ID of name, or None if it has none."""
+        return self.ids.get(name)
+
+    def name(self, symbol_id: int):
+        """Returns the name with ID symbol_id."""
+        return self.names[symbol_id]
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
@@ -9,11 +9,10 @@ def update_user(username: str, download_games=True):
 
     print('Gathering prior data...')
     try:
-        prior_data = structures.User.load(username).data
-        start = prior_data[0]['id'] + 1
-        print(f'Found prior data containing {len(prior_data)} games')
+        header = structures.User.load_header(username)
+        start = 0 if header["newest_id"] is None else header["newest_id"] + 1
+        print(f'Found prior data containing {header["count"]} games')
     except structures.DatabaseError:
-        prior_data = []
         start = 0
         print('No prior data found')
 
@@ -25,8 +24,7 @@ def update_user(username: str, download_games=True):
               "or account may have never existed.")
         return
     print(f'Received data for {len(new_data)} new games')
-    full_data = structures.User(new_data + prior_data, username)
-    full_data.save()
+    structures.User.append(username, new_data)
     #read.write_user(username, full_data)
     update_metagames(username)
 
@@ -182,9 +180,14 @@ def update_metagames(username: str):
 # TODO: Change some of these to work on dicts rather than usernames.
 
 def _find_missing_games(username: str, meta=False):
-    """Iterates over chunks based on ids."""
+    """Iterates over chunks based on ids. Reads only the manifest of the
+    chunks if one has been built."""
     data = structures.User.load(username)
     ids = sorted([row["id"] for row in data], reverse=True)
+    chunk_type = structures.ChunkMeta if meta else structures.Chunk
+    chunk_manifest = chunk_type.get_manifest()
+    if chunk_manifest is not None:
+        return [game_id for game_id in reversed(ids) if not chunk_manifest.has_game(game_id)]
     missing_ids = []
     while ids:
         games_dict = read.read_games_from_chunk(ids, ids[-1] // 1000, meta)
@@ -0,0 +1,207 @@
+"""Game counts per player and per seed, kept current as games arrive.
+
+The view holds, for each player and each seed, the number of raw games
+it appears in and the ID of the newest, in an sqlite database at
+VIEW_PATH. Totals are indexed by count, so the players with at least
+some number of games are read without loading the rest.
+
+Counts are also kept per chunk, with the indices of the games counted
+in each, so saving a chunk replaces only its own contributions and
+appending games to it only adds theirs. Like the indexes in
+tools.io.indexes, the view is built once over every raw chunk (see
+process_games.get_player_and_seed_info), and Chunk.save and
+Chunk.append keep it current only once it exists.
+"""
+import os
+import sqlite3
+from . import read
+
+VIEW_PATH = './data/views.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_counts (
+    kind TEXT NOT NULL, key TEXT NOT NULL, chunk INTEGER NOT NULL,
+    num_games INTEGER NOT NULL, last_game INTEGER NOT NULL,
+    PRIMARY KEY (kind, key, chunk));
+CREATE INDEX IF NOT EXISTS chunk_counts_by_chunk ON chunk_counts (chunk);
+CREATE TABLE IF NOT EXISTS totals (
+    kind TEXT NOT NULL, key TEXT NOT NULL,
+    num_games INTEGER NOT NULL, last_game INTEGER NOT NULL,
+    PRIMARY KEY (kind, key));
+CREATE INDEX IF NOT EXISTS totals_by_count ON totals (kind, num_games);
+CREATE TABLE IF NOT EXISTS counted (chunk INTEGER PRIMARY KEY, present TEXT NOT NULL);
+"""
+
+
+def _is_game(entry):
+    return isinstance(entry, dict) and "players" in entry and "seed" in entry
+
+
+def count_games(games: dict):
+    """Returns the counts of games (a dict from game ID to raw game data)
+    as a dict from (kind, key) to [num_games, last_game], skipping
+    entries that hold no game."""
+    counts = {}
+    for game_id, game in games.items():
+        if not _is_game(game):
+            continue
+        keys = [("player", player) for player in game["players"]] + [("seed", game["seed"])]
+        for key in keys:
+            count = counts.setdefault(key, [0, game_id])
+            count[0] += 1
+            count[1] = max(count[1], game_id)
+    return counts
+
+
+class GameCounts:
+    """The player and seed counts at path (VIEW_PATH by default)."""
+
+    def __init__(self, path=None):
+        self.path = VIEW_PATH if path is None else path
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Closes the database connection."""
+        self.connection.close()
+
+    def replace_chunk(self, chunk_id: int, games: list, refresh=True):
+        """Replaces the counts of a chunk by those of games, its entries.
+        If refresh is False, totals are left for refresh_all."""
+        entries = {chunk_id * 1000 + i: game for i, game in enumerate(games)}
+        with self.connection:
+            old = self.connection.execute(
+                "SELECT kind, key FROM chunk_counts WHERE chunk = ?", (chunk_id,)).fetchall()
+            self.connection.execute("DELETE FROM chunk_counts WHERE chunk = ?", (chunk_id,))
+            counts = count_games(entries)
+            self._add_counts(chunk_id, counts)
+            self._set_present(chunk_id, _present_bits(entries))
+            if refresh:
+                self._refresh_totals(set(old) | set(counts))
+
+    def refresh_all(self):
+        """Recomputes every total from the per-chunk counts."""
+        with self.connection:
+            self.connection.execute("DELETE FROM totals")
+            self.connection.execute(
+                "INSERT INTO totals SELECT kind, key, SUM(num_games), MAX(last_game) FROM chunk_counts "
+                "GROUP BY kind, key")
+
+    def add_entries(self, chunk_id: int, entries: dict):
+        """Adds the counts of entries (a dict from index to raw game data)
+        appended to a chunk. Returns False, adding nothing, if an entry
+        replaces a game already counted, since its old contribution is
+        not known; the chunk must then be replaced whole."""
+        present = self._get_present(chunk_id)
+        if any(present >> i & 1 for i in entries):
+            return False
+        entries = {chunk_id * 1000 + i: game for i, game in entries.items()}
+        with self.connection:
+            counts = count_games(entries)
+            self._add_counts(chunk_id, counts)
+            self._set_present(chunk_id, present | _present_bits(entries))
+            self._refresh_totals(set(counts))
+        return True
+
+    def at_least(self, kind: str, num_games: int):
+        """Returns a dict from each key of kind ("player" or "seed") with
+        at least num_games games to its num_games and last_game."""
+        rows = self.connection.execute(
+            "SELECT key, num_games, last_game FROM totals WHERE kind = ? AND num_games >= ?", (kind, num_games))
+        return {key: {"num_games": count, "last_game": last} for key, count, last in rows}
+
+    def get(self, kind: str, key: str):
+        """Returns the num_games and last_game of a key of kind, or None
+        if it has no games."""
+        row = self.connection.execute(
+            "SELECT num_games, last_game FROM totals WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        return None if row is None else {"num_games": row[0], "last_game": row[1]}
+
+    def histogram(self, kind: str, bounds: list):
+        """Returns the number of keys of kind with a number of games in
+        each range [bounds[i], bounds[i + 1]), the last one unbounded."""
+        result = []
+        for i, low in enumerate(bounds):
+            high = bounds[i + 1] if i + 1 < len(bounds) else None
+            query = "SELECT COUNT(*) FROM totals WHERE kind = ? AND num_games >= ?"
+            params = (kind, low) if high is None else (kind, low, high)
+            if high is not None:
+                query += " AND num_games < ?"
+            result.append(self.connection.execute(query, params).fetchone()[0])
+        return result
+
+    def _add_counts(self, chunk_id, counts):
+        self.connection.executemany(
+            "INSERT INTO chunk_counts VALUES (?, ?, ?, ?, ?) ON CONFLICT (kind, key, chunk) DO UPDATE "
+            "SET num_games = num_games + excluded.num_games, last_game = MAX(last_game, excluded.last_game)",
+            [(kind, key, chunk_id, count, last) for (kind, key), (count, last) in counts.items()])
+
+    def _refresh_totals(self, keys):
+        """Recomputes the totals of keys from their per-chunk counts."""
+        self.connection.executemany("DELETE FROM totals WHERE kind = ? AND key = ?", keys)
+        self.connection.executemany(
+            "INSERT INTO totals SELECT kind, key, SUM(num_games), MAX(last_game) FROM chunk_counts "
+            "WHERE kind = ? AND key = ? GROUP BY kind, key", keys)
+
+    def _get_present(self, chunk_id):
+        row = self.connection.execute("SELECT present FROM counted WHERE chunk = ?", (chunk_id,)).fetchone()
+        return 0 if row is None else int(row[0], 16)
+
+    def _set_present(self, chunk_id, bits):
+        self.connection.execute("INSERT OR REPLACE INTO counted VALUES (?, ?)", (chunk_id, format(bits, 'x')))
+
+
+def _present_bits(entries):
+    """Returns the bitmap of the indices of entries holding a game."""
+    bits = 0
+    for game_id, game in entries.items():
+        if _is_game(game):
+            bits |= 1 << game_id % 1000
+    return bits
+
+
+_VIEWS = {}
+
+
+def get_view():
+    """Returns this process's GameCounts for VIEW_PATH, or None if the
+    view has not been built."""
+    key = (VIEW_PATH, os.getpid())
+    if key not in _VIEWS:
+        if not os.path.exists(VIEW_PATH):
+            return None
+        _VIEWS[key] = GameCounts()
+    return _VIEWS[key]
+
+
+def build(chunks):
+    """Builds the view from chunks, an iterable of (chunk ID, entries)
+    pairs covering every raw chunk, replacing any view built before.
+    Returns the view."""
+    temp_path = f'{VIEW_PATH}.tmp'
+    read.remove_file(temp_path)
+    view = GameCounts(temp_path)
+    for chunk_id, games in chunks:
+        view.replace_chunk(chunk_id, games, refresh=False)
+    view.refresh_all()
+    view.close()
+    for key in [key for key in _VIEWS if key[0] == VIEW_PATH]:
+        _VIEWS.pop(key).close()
+    os.replace(temp_path, VIEW_PATH)
+    return get_view()
+
+
+def update_chunk(chunk_id: int, games: list):
+    """Replaces the counts of a chunk just saved, if the view is built."""
+    view = get_view()
+    if view is not None:
+        view.replace_chunk(chunk_id, games)
+
+
+def update_entries(chunk_id: int, entries: dict, load_chunk):
+    """Adds the counts of entries just appended to a chunk, if the view
+    is built. load_chunk() returns the entries of the whole chunk, for
+    when an appended game replaces one already counted."""
+    view = get_view()
+    if view is not None and not view.add_entries(chunk_id, entries):
+        view.replace_chunk(chunk_id, load_chunk())
@@ -0,0 +1,227 @@
+"""Declarative group-by queries over game metadata.
+
+A Query names a where clause (a Restriction), the fields to group by
+and the aggregates to compute per group, then an order and a limit.
+Aggregates are written as strings:
+
+    count           number of games in the group
+    sum:FIELD       sum of FIELD
+    mean:FIELD      mean of FIELD
+    min:FIELD       smallest FIELD
+    max:FIELD       largest FIELD
+    topK:FIELD      IDs and values of the K games with the largest FIELD
+
+A query without aggregates or groups lists the selected fields of each
+matching game instead.
+
+Queries run as an Analysis (see tools.analysis), so they read only the
+chunks the plan of the where clause keeps, decode only the columns they
+use, and can run over chunks in parallel. See hanabdata/query.py for the
+command line.
+"""
+
+import re
+from hanabdata.tools.accumulators import Mean, MinMax, Sum, TopK
+from hanabdata.tools.analysis import Analysis
+from hanabdata.tools.io import columnar
+
+CLAUSE = re.compile(r'^\s*([\w.]+)\s*(=|<|>|~)\s*(.*?)\s*$')
+AGGREGATE = re.compile(r'^(count|sum|mean|min|max|top(\d+))(?::([\w.]+))?$')
+
+
+def parse_value(text: str):
+    """Returns text as an int, float or bool if it reads as one, or as
+    is otherwise."""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return {"true": True, "false": False}.get(text.lower(), text)
+
+
+def parse_clause(text: str):
+    """Returns (field, operator, value) for a clause such as "score=25",
+    "options.numPlayers>3" or "playerNames~alice". See
+    Restriction.add_clause."""
+    match = CLAUSE.match(text)
+    if match is None:
+        raise ValueError(f'cannot parse clause {text!r}')
+    field, operator, value = match.groups()
+    return field, operator, parse_value(value)
+
+
+def get_field(game, field: str):
+    """Returns the value of a dotted field of game, or None."""
+    value = game
+    for part in field.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+class _Aggregate:
+    """A parsed aggregate: its name, field and the accumulator it adds
+    values to."""
+
+    def __init__(self, text: str):
+        match = AGGREGATE.match(text)
+        if match is None:
+            raise ValueError(f'cannot parse aggregate {text!r}')
+        self.name, self.k, self.field = match.group(1), match.group(2), match.group(3)
+        if (self.name == "count") != (self.field is None):
+            raise ValueError(f'{text!r}: count takes no field, and every other aggregate takes one')
+        if self.k is not None and int(self.k) < 1:
+            raise ValueError(f'{text!r}: top needs at least one game')
+        self.text = text
+
+    def start(self):
+        """Returns an empty accumulator."""
+        if self.name in ("count", "sum"):
+            return Sum()
+        if self.name == "mean":
+            return Mean()
+        if self.name in ("min", "max"):
+            return MinMax()
+        return TopK(int(self.k))
+
+    def add(self, accumulator, game):
+        """Adds the value of game, unless it is missing."""
+        if self.name == "count":
+            accumulator.add(1)
+            return
+        value = get_field(game, self.field)
+        if value is None:
+            return
+        if self.k is not None:
+            accumulator.add((value, game.get("id")))
+        else:
+            accumulator.add(value)
+
+    def result(self, accumulator):
+        """Returns the value of the aggregate for output."""
+        if self.name == "min":
+            return accumulator.min
+        if self.name == "max":
+            return accumulator.max
+        if self.k is not None:
+            return " ".join(f"{game_id}:{value}" for value, game_id in reversed(accumulator.result()))
+        return accumulator.result()
+
+
+class Groups(dict):
+    """Maps the group-by values of each group to its accumulators."""
+
+    def merge(self, other):
+        """Merges the accumulators of each group of other. Returns self."""
+        for key, accumulators in other.items():
+            if key not in self:
+                self[key] = accumulators
+            else:
+                for accumulator, other_accumulator in zip(self[key], accumulators):
+                    accumulator.merge(other_accumulator)
+        return self
+
+
+class Rows(list):
+    """Rows listed by a query without aggregates."""
+
+    def merge(self, other):
+        """Appends the rows of other. Returns self."""
+        self.extend(other)
+        return self
+
+
+class Query:
+    """A group-by query. where is a Restriction (or None for every
+    game), order_by a column of the output (the group-by fields, then
+    the aggregates as written), and limit the number of rows kept."""
+
+    def __init__(self, where=None, select=(), group_by=(), aggregates=(), order_by=None,
+                 descending=False, limit=None):
+        self.where = where
+        self.select = list(select)
+        self.group_by = list(group_by)
+        self.aggregates = [_Aggregate(text) for text in aggregates]
+        self.order_by = order_by
+        self.descending = descending
+        self.limit = limit
+        if not self.select and not self.group_by and not self.aggregates:
+            raise ValueError('a query selects fields, groups or aggregates')
+        if self.order_by is not None and self.order_by not in self.header():
+            raise ValueError(f'cannot order by {order_by!r}, which is not an output column')
+
+    def grouped(self):
+        """Returns True if the query groups games rather than listing them."""
+        return bool(self.group_by or self.aggregates)
+
+    def header(self):
+        """Returns the names of the output columns."""
+        if not self.grouped():
+            return list(self.select)
+        return self.group_by + [aggregate.text for aggregate in self.aggregates]
+
+    def fields(self):
+        """Returns the metadata fields the query reads, or None if some
+        are not stored in columnar chunks, in which case it reads whole
+        games."""
+        fields = self.select + self.group_by + [aggregate.field for aggregate in self.aggregates
+                                                if aggregate.field is not None]
+        if any(aggregate.k is not None for aggregate in self.aggregates):
+            fields.append("id")
+        try:
+            columnar.resolve_fields(fields + ([] if self.where is None else self.where.get_fields()))
+        except KeyError:
+            return None
+        return fields
+
+    def analysis(self):
+        """Returns the Analysis that runs the query."""
+        if self.grouped():
+            def start():
+                return Groups()
+
+            def step(groups, game):
+                key = tuple(get_field(game, field) for field in self.group_by)
+                if key not in groups:
+                    groups[key] = [aggregate.start() for aggregate in self.aggregates]
+                for aggregate, accumulator in zip(self.aggregates, groups[key]):
+                    aggregate.add(accumulator, game)
+
+            def finish(groups):
+                return [list(key) + [aggregate.result(accumulator)
+                                     for aggregate, accumulator in zip(self.aggregates, accumulators)]
+                        for key, accumulators in groups.items()]
+        else:
+            def start():
+                return Rows()
+
+            def step(rows, game):
+                rows.append([get_field(game, field) for field in self.select])
+
+            finish = list
+
+        analysis = Analysis(None)
+        analysis.set_filter(self.where)
+        analysis.set_accumulator(start, step, lambda state: self._arrange(finish(state)), self.fields())
+        return analysis
+
+    def _arrange(self, rows):
+        """Orders and limits rows."""
+        if self.order_by is not None:
+            column = self.header().index(self.order_by)
+            # rows missing the value go last either way
+            present = [row for row in rows if row[column] is not None]
+            present.sort(key=lambda row: row[column], reverse=self.descending)
+            rows = present + [row for row in rows if row[column] is None]
+        return rows if self.limit is None else rows[:self.limit]
+
+    def run(self, oldest_to_newest=True, workers=0, processes=0, cache=False):
+        """Returns the output rows, header first. See run_analyses for
+        the arguments."""
+        return [self.header()] + self.analysis().scan(oldest_to_newest, workers, processes, cache)
+
+    def explain(self):
+        """Returns a description of the chunks the query reads."""
+        if self.where is None:
+            return "no where clause: full scan"
+        return self.where.explain()
@@ -6,7 +6,13 @@ and optional features for data that has been processed at different
 points in time.
 """
 
-from hanabdata.game import variants
+from hanabdata.game import seeds, variants
+from hanabdata.tools import structures
+from hanabdata.tools.io import columnar, indexes
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 _NONCHEATING_OPTIONS = {"options": {
     "startingPlayer": 0,
@@ -22,6 +28,15 @@ def _equality_function(x, y):
     """Equals.""" 
     return x == y
 
+def _less_than(x, y):
+    return x < y
+
+def _greater_than(x, y):
+    return x > y
+
+def _contains(x, y):
+    return y in x
+
 
 # This should be refactored to allow for arbitrarily nested dicts (ew!)
 # eventually. Requiring that Restriction.necessary and .optional only
@@ -88,18 +103,15 @@ class Restriction:
 
     def add_less_than(self, option):
         """Common function "<" gets its own method."""
-        def less_than(x, y): return x < y
-        self.add_special_case(option, less_than)
+        self.add_special_case(option, _less_than)
 
     def add_greater_than(self, option):
         """Common function ">" gets its own method."""
-        def greater_than(x, y): return x > y
-        self.add_special_case(option, greater_than)
+        self.add_special_case(option, _greater_than)
 
     def add_contains(self, option):
         """Common function "in" gets its own method."""
-        def contains(x, y): return y in x
-        self.add_special_case(option, contains)
+        self.add_special_case(option, _contains)
 
     def add_filter(self, key, value, necessary=True):
         """Adds a constraint."""
@@ -108,6 +120,138 @@ class Restriction:
         else:
             self.optional_constraints[key] = value
 
+    def add_clause(self, field, operator, value):
+        """Adds the necessary constraint "field operator value". field
+        may be "option.key", and operator is "=", "<", ">" or "~" (field
+        contains value, for top-level lists such as playerNames)."""
+        # nested keys are evaluated with the constraint value first
+        funcs = {"=": (_equality_function, _equality_function), "<": (_less_than, _greater_than),
+                 ">": (_greater_than, _less_than), "~": (_contains, None)}
+        if operator not in funcs:
+            raise ValueError(f'unknown operator {operator}')
+        func, nested_func = funcs[operator]
+        option, _, key = field.partition('.')
+        if not key:
+            self.necessary_constraints[option] = value
+            if func is not _equality_function:
+                self.special_cases[option] = func
+            return
+        if nested_func is None:
+            raise ValueError(f'{operator} does not apply to nested field {field}')
+        self.necessary_constraints.setdefault(option, {})[key] = value
+        if nested_func is not _equality_function:
+            self.special_cases.setdefault(option, {})[key] = nested_func
+
+    def get_fields(self):
+        """Returns the names of all fields validate needs, with keys of
+        nested dicts written as "option.key". Useful for projected scans
+        such as GamesIterator(fields=...).
+        """
+        fields = []
+        for option, value in self.necessary_constraints.items():
+            if isinstance(value, dict):
+                fields.extend(f"{option}.{key}" for key in value)
+            else:
+                fields.append(option)
+        return fields
+
+    def may_match(self, zone):
+        """Takes the summary of a chunk from tools.io.indexes.ZoneMaps and
+        returns False only if no game in the chunk can satisfy the
+        necessary constraints, so the chunk need not be read. Constraints
+        the summary says nothing about never rule a chunk out.
+        """
+        if zone["count"] == 0:
+            return False
+        for option, value in self.necessary_constraints.items():
+            if isinstance(value, dict):
+                for key, nested_value in value.items():
+                    if not self._zone_may_match(zone, f"{option}.{key}", self._evaluate(option, key),
+                                                nested_value, reverse=True):
+                        return False
+            elif not self._zone_may_match(zone, option, self._evaluate(option), value):
+                return False
+        return True
+
+    def plan(self, chunks):
+        """Returns the Plan for a scan of the given metadata chunks: the
+        chunks that may hold matching games, narrowed down by every
+        access path that applies. Index lookups of the necessary
+        constraints go first, as each costs one read, then the zone maps
+        (see may_match) check the chunks left. Indexes that were never
+        built are skipped, leaving a full scan if nothing applies.
+        """
+        plan = Plan(chunks)
+        for option, index_type, key in self._index_lookups():
+            try:
+                index = index_type.load()
+            except FileNotFoundError:
+                continue
+            found = {game_id // 1000 for game_id in index.get(key)}
+            # the index knows nothing of chunks missing from its header
+            plan.narrow(f"{index_type.name} index: {option} = {key!r}",
+                        found | (plan.chunks - set(index.chunks)))
+        try:
+            zone_maps = indexes.ZoneMaps.load()
+        except FileNotFoundError:
+            return plan
+        tracked = [field for field in self.get_fields()
+                   if field in indexes.ZoneMaps.RANGE_FIELDS or field in indexes.ZoneMaps.VALUE_FIELDS]
+        if tracked:
+            plan.narrow(f"zone maps: {', '.join(tracked)}",
+                        {chunk for chunk in plan.chunks
+                         if zone_maps.get(chunk) is None or self.may_match(zone_maps.get(chunk))})
+        return plan
+
+    def _index_lookups(self):
+        """Helper function for plan. Yields (option, index type, key) for
+        each necessary constraint an inverted index answers."""
+        for option, value in self.necessary_constraints.items():
+            try:
+                func = self._evaluate(option)
+            except TypeError:
+                continue
+            if option == "playerNames" and func is _contains and isinstance(value, str):
+                yield option, indexes.PlayerIndex, value
+            elif option == "seed" and func is _equality_function and isinstance(value, str) \
+                    and seeds.parse_seed(value) is not None:
+                yield option, indexes.SeedIndex, value
+
+    def explain(self, chunks=None):
+        """Returns a description of the plan for a scan of chunks (every
+        metadata chunk by default): the access paths used and the
+        estimated number of chunks read."""
+        if chunks is None:
+            chunks = structures.ChunkMeta.list_ids()
+        return str(self.plan(chunks))
+
+    @staticmethod
+    def _zone_may_match(zone, field, func, value, reverse=False):
+        """Helper function for may_match. If reverse, func takes the
+        constraint value first, as validate does for nested keys."""
+        try:
+            if field in zone["values"]:
+                found = zone["values"][field]
+                if found is None:
+                    return False
+                if reverse:
+                    return any(func(value, element) for element in found)
+                return any(func(element, value) for element in found)
+            if field in zone["ranges"]:
+                bounds = zone["ranges"][field]
+                if bounds is None:
+                    return False
+                low, high = bounds
+                if func is _equality_function:
+                    return low <= value <= high
+                if func is _greater_than and not reverse:
+                    return high > value
+                if func is _less_than and not reverse:
+                    return low < value
+        except TypeError:
+            pass
+        return True
+
     def validate(self, data):
         """This function is the purpose of the entire class.
 
@@ -174,6 +318,180 @@ class Restriction:
 
         return True
 
+    def compile(self):
+        """Returns a function equivalent to validate, generated for the
+        current constraints, that skips the per-game lookups of validate.
+        Changing the restriction afterwards does not change the function.
+
+        Data shapes validate does not expect (a dict where a constraint
+        is not one, any optional constraint key) are handed to validate
+        itself, so errors and results stay identical.
+        """
+        names = {"_validate": self.validate}
+        lines = ["def validate(data):"]
+
+        def constant(value):
+            name = f"c{len(names)}"
+            names[name] = value
+            return name
+
+        def check(func, x, y):
+            """Returns the source of func(x, y) for sources x and y."""
+            if func is _equality_function:
+                return f"{x} == {y}"
+            if func is _less_than:
+                return f"{x} < {y}"
+            if func is _greater_than:
+                return f"{x} > {y}"
+            if func is _contains:
+                return f"{y} in {x}"
+            return f"{constant(func)}({x}, {y})"
+
+        missing = "return _validate(data)" if self.panic else "return False"
+        for option, value in self.necessary_constraints.items():
+            option_name = constant(option)
+            lines += [f"    if {option_name} not in data:",
+                      f"        {missing}",
+                      f"    element = data[{option_name}]"]
+            try:
+                func = self._evaluate(option)
+            except TypeError:
+                func = None
+            lines.append("    if not isinstance(element, dict):")
+            if func is None:
+                lines.append("        return _validate(data)")
+            else:
+                lines += [f"        if not ({check(func, 'element', constant(value))}):",
+                          "            return False"]
+            if not isinstance(value, dict):
+                lines += ["    else:",
+                          "        return _validate(data)"]
+                continue
+            lines.append("    else:")
+            for key, nested_value in value.items():
+                key_name = constant(key)
+                lines += [f"        if {key_name} not in element:",
+                          f"            {missing}"]
+                try:
+                    func = self._evaluate(option, key)
+                except TypeError:
+                    lines.append("        return _validate(data)")
+                    break
+                lines += [f"        if not ({check(func, constant(nested_value), f'element[{key_name}]')}):",
+                          "            return False"]
+            else:
+                lines.append("        pass")
+        for option in self.optional_constraints:
+            lines += [f"    if {constant(option)} in data:",
+                      "        return _validate(data)"]
+        lines.append("    return True")
+
+        # closing over the constants makes them fast local lookups
+        params = ", ".join(names)
+        source = f"def make({params}):\n" + "".join(f"    {line}\n" for line in lines) + "    return validate\n"
+        namespace = {}
+        exec(source, namespace)  # pylint: disable=exec-used
+        return namespace["make"](**names)
+
+    def mask(self, columns):
+        """Takes a batch of games as a dict of columns (see
+        tools.io.columnar, as lists or NumPy arrays) and returns which
+        of them validate accepts, as a NumPy bool array. Missing values
+        count as missing keys.
+
+        Constraints are evaluated a column at a time, with comparisons
+        as array operations, and only on rows every earlier constraint
+        accepted. Batches or constraints that do not map onto columns
+        fall back to validate on each row, as does everything without
+        NumPy, in which case the mask is a list.
+        """
+        if np is None or not self._maskable(columns):
+            masks = map(self.validate, columnar.iter_rows(columns))
+            if np is None:
+                return list(masks)
+            return np.fromiter(masks, dtype=bool, count=columnar.num_rows(columns))
+        columns = columnar.to_arrays(columns)
+        result = np.ones(columnar.num_rows(columns), dtype=bool)
+        for option, value in self.necessary_constraints.items():
+            if isinstance(value, dict):
+                for key, nested_value in value.items():
+                    _apply_mask(result, columns.get(f"{option}.{key}"), self._evaluate(option, key),
+                                nested_value, reverse=True)
+            else:
+                _apply_mask(result, columns.get(option), self._evaluate(option), value)
+        return result
+
+    def _maskable(self, columns):
+        """Helper function for mask. Returns True if every constraint maps
+        onto columns as validate would see them in rows."""
+        if self.panic:
+            return False
+        for option, value in self.necessary_constraints.items():
+            if isinstance(value, dict):
+                if option in columns:
+                    return False
+            elif any(name.startswith(f"{option}.") for name in columns):
+                return False
+            try:
+                for key in value if isinstance(value, dict) else (None,):
+                    self._evaluate(option, key)
+            except TypeError:
+                return False
+        for option in self.optional_constraints:
+            for name, values in columns.items():
+                if (name == option or name.startswith(f"{option}.")) \
+                        and any(element is not None for element in values):
+                    return False
+        return True
+
+
+class Plan:
+    """The chunks a restricted scan reads, and the access paths that
+    chose them (see Restriction.plan). Steps are (access path, number of
+    chunks left) pairs."""
+
+    def __init__(self, chunks):
+        self.chunks = set(chunks)
+        self.num_total = len(self.chunks)
+        self.steps = []
+
+    def narrow(self, access_path, chunks):
+        """Keeps only the chunks also in chunks, recording the step."""
+        self.chunks &= chunks
+        self.steps.append((access_path, len(self.chunks)))
+
+    def __str__(self):
+        lines = [f"{access_path} -> {num_chunks} chunks" for access_path, num_chunks in self.steps]
+        if not lines:
+            lines.append(f"full scan -> {self.num_total} chunks")
+        lines.append(f"reads {len(self.chunks)} of {self.num_total} chunks")
+        return "\n".join(lines)
+
+
+def _apply_mask(result, column, func, value, reverse=False):
+    """Helper function for Restriction.mask. Clears the rows of bool
+    array result whose value in column fails func against the
+    constraint value, taking the constraint value first if reverse."""
+    if column is None:
+        result[:] = False
+        return
+    if column.dtype == object:
+        result &= np.fromiter((element is not None for element in column), dtype=bool, count=len(column))
+    rows = np.flatnonzero(result)
+    values = column[rows]
+    if isinstance(value, (bool, int, float, str)) and func in (_equality_function, _less_than, _greater_than):
+        if func is _equality_function:
+            passed = values == value
+        elif (func is _less_than) != reverse:
+            passed = values < value
+        else:
+            passed = values > value
+    elif reverse:
+        passed = np.fromiter((bool(func(value, element)) for element in values), dtype=bool, count=len(values))
+    else:
+        passed = np.fromiter((bool(func(element, value)) for element in values), dtype=bool, count=len(values))
+    result[rows] = np.asarray(passed, dtype=bool)
+
 
 def has_winning_score(game):
     """Returns True if dictionary game contains key 'score' and key
@@ -190,16 +508,13 @@ def has_winning_score(game):
         # TODO: add a check for variantName
     elif "seed" in game:
         seed = game["seed"]
-        try:
-            if seed == "JSON":
-                return False
-            # both indices are necessary to handle "legacy-pXvYsZ" seed
-            variant_id = int(seed[seed.index("v") + 1:seed.index("s")])
-        except Exception as e:
-            print(e)
+        if seed == "JSON":
+            return False
+        seed_key = seeds.parse_seed(seed)
+        if seed_key is None:
             print(game)
-            print(game["seed"])
-            raise e
+            raise ValueError(f'Unable to parse seed {seed}.')
+        variant_id = seed_key.variant_id
     elif "variantID" in game:
         variant_id = game["variantID"]
     else:
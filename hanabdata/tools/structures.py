@@ -5,7 +5,12 @@ Using Data directly requires providing a basepath for saving and loading.
 Defaults to json filetype.
 """
 # pylint: disable=arguments-differ
-from hanabdata.tools.io import read
+from hanabdata.game import packed as packing
+from hanabdata.tools.io import cache, columnar, decks, indexes, read, sidecar, views
+from hanabdata.tools.io.prefetch import read_ahead
+from hanabdata.tools.io.manifest import Manifest
+from hanabdata.tools.io.symbols import PLAYERS, VARIANTS, SymbolTable
+from hanabdata.tools.io.cache import CHUNK_CACHE
 
 
 
@@ -19,9 +24,20 @@ class Data:
     """Basic wrapper class to handle data.
     
     basepath should not end with a '/'. 
+    If cached is True, loads go through the shared CHUNK_CACHE.
+    If manifested is True, saves update the manifest of the basepath
+    (see tools.io.manifest) if one has been built, and list_ids reads it.
+    compression names the codec (see tools.io.compression) used to save
+    JSON. Loading detects compression on its own.
+    If sidecars is True, loads keep a pickled copy of the decoded data
+    next to the file (see tools.io.sidecar) and read it while current.
     """
     basepath = None
     extension = 'json'
+    cached = False
+    manifested = False
+    compression = None
+    sidecars = False
 
     def __init__(self, data, data_id, basepath=None, extension=None):
         self.data = data
@@ -46,15 +62,81 @@ class Data:
             basepath = self.basepath
         path = f'{basepath}/{self.id}.{self.extension}'
         if self.extension == 'json':
-            read.write_json(path, self.data)
+            read.write_json(path, self.data, self.compression)
         elif self.extension == 'csv':
             read.write_csv(path, self.data)
+        elif self.extension == 'col':
+            read.write_columns(path, self.data)
         else: 
-            raise NotImplementedError('only json and csv files are supported!')
+            raise NotImplementedError('only json, csv and col files are supported!')
+        self._write_through(path)
+        self._record(basepath, path)
+
+    def _write_through(self, path):
+        """Replaces any cached copy of the file at path with self.data."""
+        if self.cached:
+            # stamped right after the write, since the data was never read
+            CHUNK_CACHE.put(path, self.data, cache.stamp(path, self._related_paths(path)))
+
+    def _record(self, basepath, path):
+        """Records the file at path, just saved, in the manifest."""
+        chunk_manifest = self.get_manifest(basepath)
+        if chunk_manifest is not None:
+            chunk_manifest.record(int(self.id), self.data, path)
+            chunk_manifest.save()
+
+    @classmethod
+    def get_manifest(cls, basepath=None):
+        """Returns the manifest of basepath (the class default if None),
+        or None if the class is not manifested or none was built."""
+        if not cls.manifested:
+            return None
+        try:
+            return Manifest.load(cls.basepath if basepath is None else basepath)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def _related_paths(cls, path):
+        """Returns paths of other files that load reads along with path."""
+        return ()
+
+    @classmethod
+    def _read(cls, path, reader):
+        """Reads the data stored at path."""
+        return reader(path)
+
+    @classmethod
+    def _read_through_sidecar(cls, path, reader, file_stamp):
+        """Reads the data stored at path from its sidecar if current,
+        otherwise from path, then writes the sidecar. file_stamp is the
+        stamp of path taken before calling."""
+        data = sidecar.load(path, cls._related_paths(path))
+        if data is None:
+            data = cls._read(path, reader)
+            sidecar.save(path, data, file_stamp)
+        return data
+
+    @classmethod
+    def list_ids(cls):
+        """Returns the set of IDs stored at the class basepath as ints."""
+        chunk_manifest = cls.get_manifest()
+        if chunk_manifest is not None:
+            return chunk_manifest.ids()
+        return cls.scan_ids()
+
+    @classmethod
+    def scan_ids(cls):
+        """Returns the set of IDs of files at the class basepath as ints,
+        ignoring any manifest."""
+        return {int(y) for y in read.get_file_names(cls.basepath, cls.extension)}
     
     @classmethod
-    def load(cls, data_id, basepath=None, extension=None):
-        """loads data from  system. If the data does not exist, raises a DatabaseError"""
+    def load(cls, data_id, basepath=None, extension=None, use_cache=True):
+        """loads data from  system. If the data does not exist, raises a DatabaseError
+        
+        Set use_cache to False for one-off reads such as full scans, which 
+        would otherwise evict frequently used chunks."""
         if basepath is None:
             parsed_path = cls.basepath
         else:
@@ -68,17 +150,176 @@ class Data:
             reader = read.read_json
         elif parsed_extension == 'csv':
             reader = read.read_csv
+        elif parsed_extension == 'col':
+            reader = read.read_columns
         else: 
-            raise NotImplementedError('only json and csv files are supported!')
-        try:
-            data = reader(path) 
-        except FileNotFoundError as e:
-            raise DatabaseError(f'Data does not exist at {parsed_path}/{data_id}.{parsed_extension}!') from e  
+            raise NotImplementedError('only json, csv and col files are supported!')
+        use_cache = use_cache and cls.cached
+        related = cls._related_paths(path)
+        data = CHUNK_CACHE.get(path, related) if use_cache else None
+        if data is None:
+            file_stamp = cache.stamp(path, related)
+            try:
+                if cls.sidecars:
+                    data = cls._read_through_sidecar(path, reader, file_stamp)
+                else:
+                    data = cls._read(path, reader)
+            except FileNotFoundError as e:
+                raise DatabaseError(f'Data does not exist at {parsed_path}/{data_id}.{parsed_extension}!') from e  
+            if use_cache:
+                CHUNK_CACHE.put(path, data, file_stamp)
         return cls(data, data_id, basepath=basepath, extension=extension)
 
+    @classmethod
+    def load_entries(cls, data_id, indices):
+        """Returns a dict from each index to that entry of the stored
+        list. Raises a DatabaseError if the data does not exist."""
+        data = cls.load(data_id).data
+        return {i: data[i] if i < len(data) else None for i in indices}
+
 class Chunk(Data):
-    """Wrapper for groups of games."""
+    """Wrapper for groups of games.
+
+    Chunks are saved with an offset table (see tools.io.offsets) so
+    load_entries can decode single games without the rest of the chunk.
+
+    New games are appended to a segment file next to the chunk instead
+    of rewriting it. Loads apply the segment over the chunk, and
+    compact folds it in. Saving a whole chunk also folds it in.
+
+    If packed is True, decks and actions are saved packed (see
+    game.packed). Loads return them as dicts either way; load_packed
+    returns them packed.
+
+    If dedup_decks is True, decks are saved once per seed in the deck
+    store (see tools.io.decks) and loaded lazily.
+
+    Saves and appends to the default location keep the player and seed
+    counts current (see tools.io.views).
+    """
     basepath = './data/raw/games'
+    cached = True
+    manifested = True
+    packed = False
+    dedup_decks = False
+    segment_extension = 'seg'
+    # segments are compacted once larger than both this and the chunk,
+    # which keeps the cost of appending linear in the number of games
+    min_compact_bytes = 2**20
+
+    @classmethod
+    def _encode(cls, game):
+        """Returns game as it is written to file."""
+        if cls.dedup_decks:
+            game = decks.strip_deck(game)
+        if cls.packed:
+            game = packing.encode_game(game)
+        return game
+
+    @staticmethod
+    def _decode(game):
+        """Inverse of _encode."""
+        if packing.is_stored(game):
+            game = packing.unpack_game(game)
+        return decks.rehydrate(game)
+
+    def save(self, basepath=None):
+        if basepath is None:
+            basepath = self.basepath
+        path = f'{basepath}/{self.id}.{self.extension}'
+        if self.packed or self.dedup_decks:
+            entries = [self._encode(game) for game in self.data]
+        else:
+            entries = self.data
+        read.write_indexed_json(path, entries, self.compression)
+        read.remove_file(self._segment_path(path))
+        self._write_through(path)
+        self._record(basepath, path)
+        if basepath == type(self).basepath:
+            views.update_chunk(int(self.id), self.data)
+
+    @classmethod
+    def append(cls, data_id, entries: dict):
+        """Stores entries (a dict from index to game data) without
+        rewriting the chunk. Compacts if the segment grows too large."""
+        path = f'{cls.basepath}/{data_id}.{cls.extension}'
+        segment_path = cls._segment_path(path)
+        if cls.packed or cls.dedup_decks:
+            read.append_segment(segment_path, {i: cls._encode(game) for i, game in entries.items()})
+        else:
+            read.append_segment(segment_path, entries)
+        chunk_manifest = cls.get_manifest()
+        if chunk_manifest is not None:
+            chunk_manifest.record_entries(int(data_id), entries, segment_path)
+            chunk_manifest.save()
+        views.update_entries(int(data_id), entries, lambda: cls.load(data_id, use_cache=False).data)
+        base_size = read.file_size(path) or 0
+        if read.file_size(segment_path) > max(base_size, cls.min_compact_bytes):
+            cls.compact(data_id)
+
+    @classmethod
+    def compact(cls, data_id):
+        """Folds the segment of a chunk into the chunk. Returns True if
+        there was a segment to fold."""
+        path = f'{cls.basepath}/{data_id}.{cls.extension}'
+        if not read.file_exists(cls._segment_path(path)):
+            return False
+        cls.load(data_id, use_cache=False).save()
+        return True
+
+    @classmethod
+    def _segment_path(cls, path):
+        return f'{path[:-len(cls.extension)]}{cls.segment_extension}'
+
+    @classmethod
+    def _related_paths(cls, path):
+        return (cls._segment_path(path),)
+
+    @classmethod
+    def _read(cls, path, reader, unpack=True):
+        segment = read.read_segment(cls._segment_path(path))
+        try:
+            data = reader(path)
+        except FileNotFoundError:
+            if not segment:
+                raise
+            data = [None] * 1000
+        for index, game in segment:
+            data[index] = game
+        if unpack:
+            data = [cls._decode(game) for game in data]
+        return data
+
+    @classmethod
+    def load_packed(cls, data_id, basepath=None):
+        """Loads a chunk with every deck and action list that fits in
+        packed form, decoding stored packed games without building dicts."""
+        path = f'{cls.basepath if basepath is None else basepath}/{data_id}.{cls.extension}'
+        try:
+            data = cls._read(path, read.read_json, unpack=False)
+        except FileNotFoundError as e:
+            raise DatabaseError(f'Data does not exist at {path}!') from e
+        return cls([decks.rehydrate(packing.pack_game(game), packed=True) for game in data], data_id)
+
+    @classmethod
+    def scan_ids(cls):
+        segment_ids = read.get_file_names(cls.basepath, cls.segment_extension)
+        return super().scan_ids() | {int(y) for y in segment_ids}
+
+    @classmethod
+    def load_entries(cls, data_id, indices):
+        path = f'{cls.basepath}/{data_id}.{cls.extension}'
+        if path in CHUNK_CACHE or not read.file_exists(path):
+            return super().load_entries(data_id, indices)
+        entries = read.read_indexed_json(path, indices)
+        if entries is None:
+            return super().load_entries(data_id, indices)
+        for index, game in read.read_segment(cls._segment_path(path)):
+            if index in entries:
+                entries[index] = game
+        for index, game in entries.items():
+            entries[index] = cls._decode(game)
+        return entries
     
     @classmethod
     def load_safe(cls, data_id, basepath=None, extension=None):
@@ -91,14 +332,99 @@ class Chunk(Data):
 class ChunkMeta(Data):
     """Wrapper for storing meta data"""
     basepath = './data/preprocessed/games'
+    cached = True
+    manifested = True
+
+    def save(self, basepath=None):
+        """Saves meta data. Saving to the default location also rewrites
+        the matching columnar chunk and reindexes the chunk so projected
+        scans and indexes stay current."""
+        super().save(basepath)
+        if basepath is None:
+            ChunkColumns.from_meta(self).save()
+            indexes.update_indexes(int(self.id), self.data)
+
+class ChunkColumns(Data):
+    """Wrapper for meta data stored column by column. data is a dict
+    from column name to a list with one value per stored game.
+
+    Built from ChunkMeta; see tools.io.columnar for the format."""
+    basepath = './data/preprocessed/columns'
+    extension = 'col'
+
+    @classmethod
+    def from_meta(cls, chunk_meta):
+        """Converts a ChunkMeta into a ChunkColumns with the same id."""
+        return cls(columnar.columns_from_games(chunk_meta.data), chunk_meta.id)
+
+    @classmethod
+    def load(cls, data_id, fields=None, basepath=None):
+        """Loads only the columns matching fields (all if None)."""
+        if basepath is None:
+            basepath = cls.basepath
+        path = f'{basepath}/{data_id}.{cls.extension}'
+        try:
+            data = read.read_columns(path, fields)
+        except FileNotFoundError as e:
+            raise DatabaseError(f'Data does not exist at {path}!') from e
+        return cls(data, data_id, basepath=basepath)
+
+    def rows(self):
+        """Yields one nested dict per game, like the JSON metadata."""
+        return columnar.iter_rows(self.data)
 
 class Seed(Data):
     """Wrapper for seeds."""
     basepath = './data/raw/seeds'
 
 class User(Data):
-    """Wrapper for users."""
+    """Wrapper for users. data lists a user's games newest first.
+
+    Histories are stored oldest first in an append-only file (see
+    read.append_history) whose header holds the newest game ID, so
+    updates append new games without reading or rewriting older ones.
+    Users saved as plain JSON are converted on their first append."""
     basepath = './data/raw/users'
+    history_extension = 'hist'
+
+    def save(self, basepath=None):
+        if basepath is None:
+            basepath = self.basepath
+        read.write_history(f'{basepath}/{self.id}.{self.history_extension}', self.data[::-1])
+        read.remove_file(f'{basepath}/{self.id}.{self.extension}')
+
+    @classmethod
+    def load(cls, data_id, basepath=None, extension=None, use_cache=True):
+        history_path = f'{basepath or cls.basepath}/{data_id}.{cls.history_extension}'
+        try:
+            data = read.read_history(history_path)
+        except FileNotFoundError:
+            return super().load(data_id, basepath, extension, use_cache)
+        data.reverse()
+        return cls(data, data_id, basepath=basepath)
+
+    @classmethod
+    def append(cls, data_id, games: list):
+        """Stores games, newer than any stored game and listed newest
+        first like data, without rewriting the stored games."""
+        history_path = f'{cls.basepath}/{data_id}.{cls.history_extension}'
+        if not read.file_exists(history_path):
+            try:
+                cls.load(data_id).save()
+            except DatabaseError:
+                pass
+        read.append_history(history_path, games[::-1])
+
+    @classmethod
+    def load_header(cls, data_id):
+        """Returns a dict holding the newest stored game ID (newest_id)
+        and the number of stored games (count) without loading them.
+        Raises a DatabaseError if the user has no stored data."""
+        try:
+            return read.read_history_header(f'{cls.basepath}/{data_id}.{cls.history_extension}')
+        except FileNotFoundError:
+            data = cls.load(data_id).data
+            return {"newest_id": data[0]["id"] if data else None, "count": len(data)}
 
 class Game(Data):
     """Wrapper class for working with a single game at a time. 
@@ -106,18 +432,12 @@ class Game(Data):
 
     def save(self):
         chunk_id, index = self._get_chunk_and_index(int(self.id))
-        try:
-            chunk = Chunk.load(chunk_id)
-        except DatabaseError:
-            chunk = Chunk([None] * 1000, chunk_id)
-        chunk.data[index] = self.data
-        chunk.save()
+        Chunk.append(chunk_id, {index: self.data})
     
     @classmethod
     def load(cls, data_id):
         chunk_id, index = cls._get_chunk_and_index(data_id)
-        chunk = Chunk.load(chunk_id)
-        game_data = chunk.data[index]
+        game_data = Chunk.load_entries(chunk_id, [index])[index]
         if game_data == 'Error' or game_data is None:
             raise DatabaseError('game data does not exist!')
         return cls(game_data, data_id)
@@ -137,27 +457,33 @@ class Games(Data):
         super().__init__(games, None, **kwargs)
 
     def save(self):
-        open_chunk = None
+        chunk_to_entries = {}
         for game in self.data:
             chunk_id, index = Game._get_chunk_and_index(game["id"])
-            if open_chunk is None:
-                open_chunk = Chunk.load_safe(chunk_id)
-            elif open_chunk.id != chunk_id:
-                open_chunk.save()
-                open_chunk = Chunk.load_safe(chunk_id)
-            open_chunk[index] = game
-        open_chunk.save()
+            chunk_to_entries.setdefault(chunk_id, {})[index] = game
+        for chunk_id, entries in chunk_to_entries.items():
+            Chunk.append(chunk_id, entries)
     
     @classmethod
     def load(cls, game_ids):
-        open_chunk = None
+        """Loads games by ID, decoding only the requested games from each
+        chunk. Returns the games (in order) and a list of missing IDs."""
+        chunk_to_indices = {}
+        for game_id in game_ids:
+            chunk_id, index = Game._get_chunk_and_index(game_id)
+            chunk_to_indices.setdefault(chunk_id, []).append(index)
+        chunk_to_entries = {}
+        for chunk_id, indices in chunk_to_indices.items():
+            try:
+                chunk_to_entries[chunk_id] = Chunk.load_entries(chunk_id, indices)
+            except DatabaseError:
+                chunk_to_entries[chunk_id] = dict.fromkeys(indices)
+
         games = []
         missing_ids = []
         for game_id in game_ids:
             chunk_id, index = Game._get_chunk_and_index(game_id)
-            if open_chunk is None or open_chunk.id != chunk_id:
-                open_chunk = Chunk.load_safe(chunk_id)
-            game = open_chunk[index]
+            game = chunk_to_entries[chunk_id][index]
             if game is not None and game != "Error":
                 games.append(game)
             else:
@@ -166,19 +492,73 @@ class Games(Data):
         return cls(games), missing_ids          
 
 class GamesIterator:
-    """Iterates over all games metadata"""
-    def __init__(self, oldest_to_newest=True):
-        dir_path = ChunkMeta.basepath
-        files = [int(y) for y in read.get_file_names(dir_path)]
+    """Iterates over all games metadata.
+
+    If fields is given (see tools.io.columnar.resolve_fields), yields
+    dicts holding only those fields, decoded from columnar chunks when
+    they exist. This is much faster than decoding full metadata.
+
+    If restriction is given, yields only the games it validates, and
+    reads only the chunks its plan (see Restriction.plan) keeps: those
+    the indexes and zone maps in tools.io.indexes do not rule out.
+
+    Chunks the manifest marks as canonical (see repair_chunks.py) are
+    read without checking for legacy storage shapes.
+
+    If symbols is True, playerNames and options.variantName hold IDs
+    from the player and variant tables in tools.io.symbols in place of
+    names. New names are interned and saved as chunks are read.
+
+    If workers is nonzero, that many processes decode the next chunks
+    while the current one is iterated (see tools.io.prefetch). Games
+    come in the same order either way.
+
+    If batched is True, yields one batch per chunk instead of one dict
+    per game: a dict from column name (see tools.io.columnar) to the
+    values of the games restriction accepts, filtered with
+    Restriction.mask. Columns are NumPy arrays if NumPy is installed,
+    otherwise lists. Empty batches are skipped.
+
+    If chunks is given, reads only those of the stored chunks.
+    """
+    def __init__(self, oldest_to_newest=True, fields=None, restriction=None, symbols=False, workers=0,
+                 batched=False, chunks=None):
+        files = ChunkMeta.list_ids()
+        if chunks is not None:
+            files = files & set(chunks)
+        if restriction is not None:
+            files = restriction.plan(files).chunks
+            if fields is not None:
+                fields = list(fields) + restriction.get_fields()
         if oldest_to_newest:
             self.chunk_list = sorted(files, reverse=True)
         else:
             self.chunk_list = sorted(files)
+        self.batched = batched
+        self.fields = None if fields is None and not batched else columnar.resolve_fields(fields)
+        self.restriction = restriction
+        self.validate = None if restriction is None else restriction.compile()
+        self.manifest = ChunkMeta.get_manifest()
+        self.workers = workers
+        self.chunks = iter(())
+        self.symbols = symbols
+        if symbols:
+            self.players = SymbolTable.load(PLAYERS)
+            self.variants = SymbolTable.load(VARIANTS)
+
+    def _tasks(self):
+        """Yields the arguments of _read_meta_chunk for each chunk left."""
+        while self.chunk_list:
+            chunk_num = self.chunk_list.pop()
+            repaired = self.manifest is not None and self.manifest.is_repaired(chunk_num)
+            yield chunk_num, self.fields, repaired, ChunkMeta.basepath, ChunkColumns.basepath, self.batched
 
     def set_current(self):
         """Opens the next file and reads as JSON."""
-        self.curr_chunk = chunk_num = self.chunk_list.pop()
-        self.current = ChunkMeta.load(chunk_num)
+        if self.symbols:
+            self.players.save()
+            self.variants.save()
+        self.curr_chunk, self.current, self.canonical = next(self.chunks)
         self.index = 0
 
     def is_valid(self, game):
@@ -192,48 +572,141 @@ class GamesIterator:
             return False
         return True
 
+    def intern(self, game):
+        """Replaces player and variant names in game with their IDs."""
+        if "playerNames" in game:
+            game["playerNames"] = [self.players.intern(player) for player in game["playerNames"]]
+        options = game.get("options")
+        if options is not None and "variantName" in options:
+            options["variantName"] = self.variants.intern(options["variantName"])
+        return game
+
+    def intern_columns(self, columns):
+        """Replaces player and variant names in a batch with their IDs."""
+        if "playerNames" in columns:
+            columns["playerNames"] = [[self.players.intern(player) for player in players]
+                                      for players in columns["playerNames"]]
+        if "options.variantName" in columns:
+            columns["options.variantName"] = [self.variants.intern(variant)
+                                              for variant in columns["options.variantName"]]
+        return columns if columnar.np is None else columnar.to_arrays(columns)
+
+    def next_batch(self):
+        """Returns the next nonempty batch (see batched)."""
+        while True:
+            self.set_current()
+            batch = self.current
+            if columnar.np is not None:
+                batch = columnar.to_arrays(batch)
+            if self.restriction is not None:
+                batch = columnar.take(batch, self.restriction.mask(batch))
+            if columnar.num_rows(batch) == 0:
+                continue
+            return self.intern_columns(batch) if self.symbols else batch
+
     def __iter__(self):
-        self.set_current()
+        self.current, self.index = [], 0
+        self.chunks = read_ahead(_read_meta_chunk, self._tasks(), self.workers)
         return self
 
     def __next__(self):
+        if self.batched:
+            return self.next_batch()
         while True:
-            if self.index == 1000:
-                try:
-                    self.set_current()
-                except IndexError as e:
-                    raise StopIteration from e
+            if self.index == len(self.current):
+                self.set_current()
+                continue
             game = self.current[self.index]
             self.index += 1
-            if self.is_valid(game):
-                return game
-            try:  # fix current storage issues
-                game = game[0]
-            except TypeError:
+            if not self.canonical and not self.is_valid(game):
+                try:  # fix current storage issues
+                    game = game[0]
+                except TypeError:
+                    continue
+                except IndexError:
+                    continue
+                except KeyError:
+                    continue
+                if not self.is_valid(game):
+                    continue
+            if self.validate is not None and not self.validate(game):
                 continue
-            except IndexError:
-                continue
-            if self.is_valid(game):
-                return game
+            return self.intern(game) if self.symbols else game
+
+class IndexedGamesIterator:
+    """Iterates over the metadata of the games an index lists under key,
+    reading only the chunks that contain them. Subclasses set
+    index_type (see tools.io.indexes). Raises FileNotFoundError if the
+    index was never built."""
+    index_type = None
+
+    def __init__(self, key, oldest_to_newest=True):
+        game_ids = self.index_type.load().get(key)
+        if not oldest_to_newest:
+            game_ids.reverse()
+        self.game_ids = game_ids
+
+    def __iter__(self):
+        return iter_games_by_id(self.game_ids)
+
+class PlayerGamesIterator(IndexedGamesIterator):
+    """Iterates over the metadata of one player's games."""
+    index_type = indexes.PlayerIndex
+
+class SeedGamesIterator(IndexedGamesIterator):
+    """Iterates over the metadata of the games on one seed, given as a
+    name like "p2v0s1" or a game.seeds.SeedKey."""
+    index_type = indexes.SeedIndex
+
+def iter_games_by_id(game_ids):
+    """Yields metadata for each of game_ids that has any, in order.
+    Loads each chunk once if game_ids are sorted."""
+    i = 0
+    while i < len(game_ids):
+        chunk_id = game_ids[i] // 1000
+        j = i
+        while j < len(game_ids) and game_ids[j] // 1000 == chunk_id:
+            j += 1
+        indices = [game_id % 1000 for game_id in game_ids[i:j]]
+        try:
+            entries = ChunkMeta.load_entries(chunk_id, indices)
+        except DatabaseError:
+            entries = {}
+        for index in indices:
+            game = columnar.normalize_game(entries.get(index))
+            if game is not None:
+                yield game
+        i = j
 
 class FullGamesIterator:
-    """Iterates over all games data"""
-    def __init__(self, oldest_to_newest=True):
-        dir_path = ChunkMeta.basepath
-        files1 = {int(y) for y in read.get_file_names(dir_path)}
-        dir_path = Chunk.basepath
-        files2 = {int(y) for y in read.get_file_names(dir_path)}
-        filenames = list(files1 & files2)
+    """Iterates over all games data
+
+    If packed is True, decks and actions come as game.packed.PackedDeck
+    and PackedActions where they fit, which take far less memory.
+
+    workers works as for GamesIterator."""
+    def __init__(self, oldest_to_newest=True, packed=False, workers=0):
+        filenames = list(ChunkMeta.list_ids() & Chunk.list_ids())
         if oldest_to_newest:
             self.chunk_list = sorted(filenames, reverse=True)
         else:
             self.chunk_list = sorted(filenames)
+        self.manifests = (Chunk.get_manifest(), ChunkMeta.get_manifest())
+        self.packed = packed
+        self.workers = workers
+        self.chunks = iter(())
+
+    def _tasks(self):
+        """Yields the arguments of _read_full_chunk for each chunk left."""
+        while self.chunk_list:
+            chunk_num = self.chunk_list.pop()
+            repaired = all(chunk_manifest is not None and chunk_manifest.is_repaired(chunk_num)
+                           for chunk_manifest in self.manifests)
+            yield chunk_num, self.packed, repaired, Chunk.basepath, ChunkMeta.basepath
 
     def set_current(self):
         """Opens the next file and reads as JSON."""
-        self.curr_chunk = chunk_num = self.chunk_list.pop()
-        self.currentmeta = ChunkMeta.load(chunk_num)
-        self.current = Chunk.load(chunk_num)
+        self.curr_chunk, self.current, self.currentmeta, self.canonical = next(self.chunks)
         self.index = 0
 
     def is_valid(self, game):
@@ -248,18 +721,23 @@ class FullGamesIterator:
         return True
 
     def __iter__(self):
-        self.set_current()
+        self.chunks = read_ahead(_read_full_chunk, self._tasks(), self.workers)
+        self.index = 1000
         return self
 
     def __next__(self):
         while True:
             if self.index == 1000:
-                try:
-                    self.set_current()
-                except IndexError as e:
-                    raise StopIteration from e
+                self.set_current()
             game = self.current[self.index]
             meta = self.currentmeta[self.index]
+            if self.canonical:
+                self.index += 1
+                if not isinstance(game, dict) or not isinstance(meta, dict):
+                    continue
+                if "startingPlayer" in game.get("options", ()):
+                    game["startingPlayer"] = game["options"]["startingPlayer"]
+                return _merge(game, meta)
             try:
                 sp = game["options"]["startingPlayer"]
                 game["startingPlayer"] = sp
@@ -271,7 +749,7 @@ class FullGamesIterator:
                 pass
             self.index += 1
             if self.is_valid(game) and self.is_valid(meta):
-                return game | meta
+                return _merge(game, meta)
             try:  # fix current storage issues
                 meta = meta[0]
             except TypeError:
@@ -281,7 +759,47 @@ class FullGamesIterator:
             except KeyError:
                 continue
             if self.is_valid(game) and self.is_valid(meta):
-                return game | meta
+                return _merge(game, meta)
+
+def _read_meta_chunk(task):
+    """Returns (chunk, games, canonical) for a GamesIterator, reading
+    projected games if fields is set, or a dict of columns if batched.
+    Runs in read-ahead workers, so takes basepaths rather than reading
+    the class defaults."""
+    chunk_num, fields, repaired, meta_path, columns_path, batched = task
+    if batched:
+        try:
+            return chunk_num, ChunkColumns.load(chunk_num, fields, columns_path).data, True
+        except DatabaseError:
+            columns = columnar.columns_from_games(ChunkMeta.load(chunk_num, meta_path, use_cache=False).data)
+            return chunk_num, {name: columns[name] for name in fields}, True
+    if fields is not None:
+        try:
+            return chunk_num, list(ChunkColumns.load(chunk_num, fields, columns_path).rows()), True
+        except DatabaseError:
+            games = map(columnar.normalize_game, ChunkMeta.load(chunk_num, meta_path, use_cache=False).data)
+            return chunk_num, [columnar.project(game, fields) for game in games if game is not None], True
+    data = ChunkMeta.load(chunk_num, meta_path, use_cache=False).data
+    if repaired:
+        return chunk_num, [game for game in data if type(game) is dict], True
+    return chunk_num, data, False
+
+def _read_full_chunk(task):
+    """Returns (chunk, games, metadata, canonical) for a
+    FullGamesIterator. Runs in read-ahead workers like _read_meta_chunk."""
+    chunk_num, packed, repaired, games_path, meta_path = task
+    meta = ChunkMeta.load(chunk_num, meta_path, use_cache=False)
+    if packed:
+        games = Chunk.load_packed(chunk_num, games_path)
+    else:
+        games = Chunk.load(chunk_num, games_path, use_cache=False)
+    return chunk_num, games, meta, repaired
+
+def _merge(game, meta):
+    """Returns game | meta, keeping a lazily loaded deck lazy."""
+    merged = type(game)(game)
+    merged.update(meta)
+    return merged
 
 class ScoreHuntData(Data):
     extension = 'csv'
@@ -1,15 +1,12 @@
 """A collection of simple questions to ask my game database."""
 
-from collections import Counter
-from tqdm import tqdm
+from hanabdata.tools.accumulators import Counts
+from hanabdata.tools.analysis import Analysis
 from hanabdata.tools.restriction import Restriction, get_standard_restrictions
-from hanabdata.tools.structures import GamesIterator
 
-def popular_variants(restriction=None, date=None):
-    """Finds number of games played in each variant satisfying restriction that have occurred since date.
-
-    date: string satisfying format "2024-01-01T00:00:00Z"
-    """
+def popular_variants_analysis(restriction=None, date=None):
+    """Returns an Analysis counting games played in each variant
+    satisfying restriction that have occurred since date."""
     if restriction is None:
         # Currently, these are my default restrictions. Can change
         restriction = get_standard_restrictions()
@@ -20,14 +17,28 @@ def popular_variants(restriction=None, date=None):
         date = "2000-01-01T00:00:00Z"
     restriction.necessary_constraints["datetimeStarted"] = date
 
-    variant_to_count = Counter()
-    for game in tqdm(GamesIterator(), total=1200000):
-        if not restriction.validate(game):
-            continue
-        variant_to_count[game["options"]["variantName"]] += 1
+    def step(variant_to_count, game):
+        variant_to_count.add(game["options"]["variantName"])
+
+    def finish(variant_to_count):
+        results = [(count, variant_name) for variant_name, count in variant_to_count.items()]
+        results.sort(reverse=True)
+        return results
 
-    results = [(count, variant_name) for variant_name, count in variant_to_count.items()]
-    results.sort(reverse=True)
+    analysis = Analysis(None)
+    analysis.set_filter(restriction)
+    analysis.set_accumulator(Counts, step, finish, fields=["options.variantName"])
+    return analysis
+
+def popular_variants(restriction=None, date=None, processes=0, cache=True):
+    """Finds number of games played in each variant satisfying restriction that have occurred since date.
+
+    date: string satisfying format "2024-01-01T00:00:00Z"
+    processes: number of processes to count in (see run_analyses)
+    cache: whether to reuse the counts of chunks unchanged since the last run
+    """
+    # chunks started entirely before date are skipped unread
+    results = popular_variants_analysis(restriction, date).scan(processes=processes, cache=cache)
 
     print(results[:10])
 
@@ -8,17 +8,18 @@ the given seed, but this can be modified.
 """
 
 import math
+import sys
 from bisect import bisect
 from tqdm import tqdm
 from hanabdata.process_games import get_players_with_x_games
-from hanabdata.tools.structures import GamesIterator
+from hanabdata.tools.analysis import Analysis
 from hanabdata.tools.io.read import write_csv, read_csv
 from hanabdata.tools.restriction import get_standard_restrictions, has_winning_score
 
-def make_table():
+def make_table(cache=True):
     """docstring"""
     co = [2, 5, 10, 50]
-    temp = create_player_dict(*create_seed_dict())
+    temp = create_player_dict(*create_seed_dict(cache=cache))
     result = do_cutoff_stuff(temp, cutoffs=co)
     result2 = get_log_sum(temp)
 
@@ -33,48 +34,66 @@ def make_table():
 
     return ans
 
-def create_seed_dict(restriction=get_standard_restrictions()):
-    """docstring"""
-    gi = GamesIterator()
+def lone_wins_analysis(restriction):
+    """Returns an Analysis finding the seeds won by exactly one team among
+    games satisfying restriction whose players had not seen the deck
+    before, with the number of such games played on each seed."""
+    validate = restriction.compile()
+
+    def start():
+        return set(), {}, {}, {}
 
-    multiwin_seeds, seed_to_gc, seed_to_players, lonewins = set(), {}, {}, {}
-    for game in tqdm(gi, total=1100000):
+    def step(state, game):
+        multiwin_seeds, seed_to_gc, seed_to_players, lonewins = state
         seed = game["seed"]
 
         # not interested in seeds won by 2+ teams
         if seed in multiwin_seeds:
-            continue
+            return
 
         # save the identities of all players who have seen the deck.
         # not interested in games where a player has previously seen
-        # the deck
+        # the deck. names are interned so each is stored once
         seed_to_players.setdefault(seed, set())
-        players = game["playerNames"]
+        players = [sys.intern(player) for player in game["playerNames"]]
         good = True
         for player in players:
             if player in seed_to_players[seed]:
                 good = False
             seed_to_players[seed].add(player)
         if not good:
-            continue
+            return
 
         # not interested in games not satisfying the restriction
-        if not restriction.validate(game):
-            continue
+        if not validate(game):
+            return
 
         # interested in seeds won once but not twice
         if has_winning_score(game):
             if seed in lonewins:
                 del lonewins[seed]
                 multiwin_seeds.add(seed)
-                continue
+                return
 
             lonewins[seed] = players
 
         # counts all games played before 2nd win "under normal circumstances"
         seed_to_gc[seed] = seed_to_gc.get(seed, 0) + 1
 
-    return lonewins, seed_to_gc
+    def finish(state):
+        _, seed_to_gc, _, lonewins = state
+        return lonewins, seed_to_gc
+
+    analysis = Analysis(None)
+    analysis.set_accumulator(start, step, finish, fields=restriction.get_fields() + [
+        "seed", "playerNames", "score", "options.variantName", "options.variantID", "options.numPlayers"])
+    return analysis
+
+def create_seed_dict(restriction=get_standard_restrictions(), cache=True):
+    """Returns the lone wins on each seed and the game counts of those
+    seeds (see lone_wins_analysis). With cache, only chunks new or
+    changed since the last run are scanned (see run_analyses)."""
+    return lone_wins_analysis(restriction).scan(cache=cache)
 
 def create_player_dict(seed_to_players, seed_to_gc):
     """docstring"""
@@ -1,28 +1,25 @@
 """This script looks through a given variant to determine which players have the longest streak of successive wins (maximum score)."""
 
+from hanabdata.tools.analysis import Analysis
 from hanabdata.tools.restriction import get_standard_restrictions, has_winning_score
 from hanabdata.tools.io.read import write_csv
-from hanabdata.tools.structures import  GamesIterator
 from hanabdata.game.variants import get_variant_names_dict
 
-def score_streak_analysis(variants=None):
-    """_summary_"""
-    gi = GamesIterator()
+def streak_analysis(variants=None):
+    """Returns an Analysis finding each player's current and longest
+    streak of wins in each variant."""
     res = get_standard_restrictions()
     del(res.necessary_constraints["numTurns"])
+    fields = ["options.variantName", "options.variantID", "playerNames", "score"]
 
-    streaks = {}
-
-    for game in gi:
-        if not res.validate(game):
-            continue
+    def step(streaks, game):
         # if game["options"]["numPlayers"] != 2:
         #     continue
         curr_variant = game["options"]["variantName"]
         if not variants:
             curr_variant = "All Variants"
         elif curr_variant not in variants:
-            continue
+            return
 
         for player in game["playerNames"]:
             if curr_variant not in streaks:
@@ -36,7 +33,14 @@ def score_streak_analysis(variants=None):
                 streaks[curr_variant][player][0] += 1
                 streaks[curr_variant][player][1] = max(streaks[curr_variant][player][0], streaks[curr_variant][player][1])
 
-    return streaks
+    analysis = Analysis(None)
+    analysis.set_filter(res)
+    analysis.set_accumulator(dict, step, fields=fields)
+    return analysis
+
+def score_streak_analysis(variants=None):
+    """_summary_"""
+    return streak_analysis(variants).scan()
 
 
 if __name__ == "__main__":
@@ -3,8 +3,8 @@ This script finds players who take similar actions in identical
 gamestates.
 """
 
-import json
 from tqdm import tqdm
+from hanabdata.game.packed import PackedActions
 from hanabdata.tools import structures
 from hanabdata.tools.io.read import write_csv
 from hanabdata.tools.restriction import get_standard_restrictions
@@ -36,7 +36,7 @@ def main():
 
 def process_for_seeds(restriction, stop_short=9**9):
     """docstring"""
-    gi = structures.FullGamesIterator()
+    gi = structures.FullGamesIterator(packed=True)
 
     seed_to_games, seed_to_deck, seed_to_players = {}, {}, {}
     count = 0
@@ -64,7 +64,7 @@ def process_for_seeds(restriction, stop_short=9**9):
         # stores all games (limited to actions & players) played "under
         # normal circumstances"
         seed_to_games.setdefault(seed, [])
-        alphabetizable = json.dumps(game["actions"])
+        alphabetizable = sortable_actions(game["actions"])
         cut = game.get("startingPlayer", 0)
         players = players[cut:] + players[:cut]
         seed_to_games[seed].append([alphabetizable, players, game["id"]])
@@ -76,8 +76,8 @@ def process_for_seeds(restriction, stop_short=9**9):
     # pylint: disable=consider-using-dict-items
     for seed in tqdm(seed_to_games):
         parsed = []
-        for actions, *suffix in sorted(seed_to_games[seed]):
-            parsed.append([json.loads(actions), *suffix])
+        for (_, actions), *suffix in sorted(seed_to_games[seed]):
+            parsed.append([PackedActions(actions) if isinstance(actions, bytes) else actions, *suffix])
         seed_to_games[seed] = parsed
 
     # may later wish to include analysis of deck but currently unused
@@ -126,15 +126,28 @@ def process_for_players(seed_to_games):
 
     return player_to_player_to_scores
 
+def sortable_actions(actions):
+    """Returns a sort key for an action list: packed bytes where it packs,
+    otherwise a tuple of (type, target, value) tuples, with missing keys
+    as -1. Unpackable lists sort after every packed one, so they are only
+    compared among themselves (and with the last packed game)."""
+    if isinstance(actions, PackedActions):
+        return False, actions.raw
+    try:
+        return False, PackedActions.from_actions(actions).raw
+    except ValueError:
+        return True, tuple((action.get("type", -1), action.get("target", -1), action.get("value", -1))
+                           for action in actions)
+
 def equal_actions(a, b):
-    """docstring"""
-    return a["type"] == b["type"] and \
-        a["target"] == b["target"] and \
-        a["value"] == b["value"]
+    """Actions are (type, target, value) tuples, whether read from
+    PackedActions or from the tuples of an unpackable list."""
+    return a == b
 
 def tuplify_action(a):
-    """docstring"""
-    return (a["type"], a["target"], a["value"])
+    """Actions are (type, target, value) tuples from PackedActions or
+    from the tuples of an unpackable list."""
+    return tuple(a)
 
 def get_player(players, turn):
     """docstring"""
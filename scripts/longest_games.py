@@ -1,29 +1,24 @@
 """This script looks through a given variant to determine which players have the longest streak of successive wins (maximum score)."""
 
 import datetime
+from hanabdata.tools.accumulators import TopK
+from hanabdata.tools.analysis import Analysis
 from hanabdata.tools.restriction import get_standard_restrictions, has_winning_score
 from hanabdata.tools.io.read import write_csv
-from hanabdata.tools.structures import  GamesIterator
 
-def find_longest_game(variants=None):
-    """_summary_"""
-    gi = GamesIterator()
+def longest_games_analysis(variants=None):
+    """Returns an Analysis finding the ten longest 3-player games."""
     res = get_standard_restrictions()
     del(res.necessary_constraints["numTurns"])
 
-    games = []
-    streaks = {}
-
-    for game in gi:
-        if not res.validate(game):
-            continue
+    def step(games, game):
         if game["options"]["numPlayers"] != 3:
-            continue
+            return
         curr_variant = game["options"]["variantName"]
         if not variants:
             curr_variant = "All Variants"
         elif curr_variant not in variants:
-            continue
+            return
 
         game_id = game["id"]
 
@@ -31,11 +26,19 @@ def find_longest_game(variants=None):
         end_time = datetime.datetime.fromisoformat(game['datetimeFinished'])
         game_dur = (end_time - start_time).total_seconds()
 
-        games.append((game_dur, game_id))
+        games.add((game_dur, game_id))
 
-    print("done")
+    analysis = Analysis(None)
+    analysis.set_filter(res)
+    analysis.set_accumulator(lambda: TopK(10), step, TopK.result, fields=[
+        "id", "options.numPlayers", "options.variantName", "datetimeStarted", "datetimeFinished"])
+    return analysis
 
-    return sorted(games)[-10:]
+def find_longest_game(variants=None, processes=0):
+    """_summary_"""
+    games = longest_games_analysis(variants).scan(processes=processes)
+    print("done")
+    return games
 
 
 if __name__ == "__main__":
@@ -115,16 +115,15 @@ def get_results(data, stop_at):
 if __name__ == "__main__":
     prior_params = [1.1, 1.5]
 
-    gi = GamesIterator()
     res = get_standard_restrictions()
     del(res.necessary_constraints["numTurns"])
+    res.add_filter("id", 1082999)
+    res.add_greater_than("id")
+    fields = ["score", "playerNames", "options.variantName", "options.variantID", "options.numPlayers"]
+    gi = GamesIterator(fields=fields, restriction=res)
 
     filtered_data = []
     for game in gi:
-        if not res.validate(game):
-            continue
-        if game["id"] < 1083000:
-            continue
         if game["options"]["numPlayers"] not in {3, 4, 5}:
             continue
         all_good_players = True
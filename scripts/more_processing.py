@@ -4,6 +4,7 @@ import math
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
+from hanabdata.tools.analysis import Analysis
 from hanabdata.tools.structures import GamesIterator
 from hanabdata.tools.io.read import write_csv, read_csv
 from hanabdata.tools.restriction import get_standard_restrictions, has_winning_score
@@ -11,12 +12,12 @@ from hanabdata.tools.restriction import get_standard_restrictions, has_winning_s
 BLOCKED_PLAYERS = {"Carunty", "FrancisFok", "yagami_blank", "yagami_blue", "yagami_light", "yagami_green", "yagami_red", "yagami_white"}
 HIDDEN_PLAYERS = ["hallmark"]
 
-def analyze():
+def analyze(cache=True):
     """docstring"""
     restriction = get_standard_restrictions()
     filename = "data/seed_table.csv"
 
-    tup = process_for_seeds(restriction)
+    tup = process_for_seeds(restriction, cache)
     data = make_table(tup)
 
     write_csv(filename, data)
@@ -32,12 +33,14 @@ def make_table(dicts):
         table.append([seed, variant, gc[0], gc[1], gc[0] - gc[1]])
     return table
 
-def process_for_seeds(restriction):
-    """docstring"""
-    gi = GamesIterator()
+def seeds_analysis(restriction):
+    """Returns an Analysis counting the games and wins on each seed
+    among games satisfying restriction whose players had not seen the
+    deck before."""
+    validate = restriction.compile()
 
-    seed_to_gc, seed_to_players, lonewins = {}, {}, {}
-    for game in tqdm(gi, total=1100000):
+    def step(state, game):
+        seed_to_gc, seed_to_players, lonewins = state
         seed = game["seed"]
 
         # save the identities of all players who have seen the deck.
@@ -51,11 +54,11 @@ def process_for_seeds(restriction):
                 good = False
             seed_to_players[seed].add(player)
         if not good:
-            continue
+            return
 
         # not interested in games not satisfying the restriction
-        if not restriction.validate(game):
-            continue
+        if not validate(game):
+            return
 
         # interested in seeds won once or more
         if has_winning_score(game):
@@ -71,7 +74,17 @@ def process_for_seeds(restriction):
         if has_winning_score(game):
             seed_to_gc[seed][1] += 1
 
-    return seed_to_gc, seed_to_players, lonewins
+    # every game is seen, since players who saw a deck in any game are
+    # excluded from later games on it
+    analysis = Analysis(None)
+    analysis.set_accumulator(lambda: ({}, {}, {}), step, fields=restriction.get_fields() + [
+        "seed", "playerNames", "score", "options.variantName", "options.variantID", "options.numPlayers"])
+    return analysis
+
+def process_for_seeds(restriction, cache=False):
+    """Returns the seed tables of seeds_analysis. With cache, only chunks
+    new or changed since the last run are scanned (see run_analyses)."""
+    return seeds_analysis(restriction).scan(cache=cache)
 
 def analyze_players():
     """docstring"""
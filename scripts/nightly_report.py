@@ -0,0 +1,37 @@
+"""Runs the regular reports over the whole corpus in a single scan.
+
+Each report is an Analysis from its own script; run_analyses feeds
+them all from one pass, so the report costs one scan instead of one
+per script. Partial results are cached between runs, so a nightly
+refresh only scans the chunks that changed since the last one.
+"""
+
+from hanabdata.tools.analysis import run_analyses
+from hanabdata.tools.io.read import write_csv
+from hanabdata.tools.restriction import get_standard_restrictions
+from all_games import popular_variants_analysis
+from find_largest_team import largest_team_analysis, write_largest_teams
+from find_score_streakers import streak_analysis
+from longest_games import longest_games_analysis
+from more_processing import make_table, seeds_analysis
+
+def nightly_report(date="2023-12-11T00:00:00Z"):
+    """Writes every report."""
+    variants, largest_teams, streaks, longest, seeds = run_analyses([
+        popular_variants_analysis(date=date),
+        largest_team_analysis(100),
+        streak_analysis(["No Variant"]),
+        longest_games_analysis(["No Variant"]),
+        seeds_analysis(get_standard_restrictions()),
+    ], cache=True)
+
+    write_csv('./data/processed/popular_variants.csv', [["Games", "Variant Name"]] + variants)
+    write_largest_teams(largest_teams)
+    write_csv('./data/processed/score_streaks/no_variant.csv',
+              [["No Variant", "Current Streak", "Longest Streak"]]
+              + [[user, *streak] for user, streak in streaks.get("No Variant", {}).items()])
+    write_csv('./data/processed/longest_games.csv', [["Duration", "Game ID"]] + longest)
+    write_csv("data/seed_table.csv", make_table(seeds))
+
+if __name__ == "__main__":
+    nightly_report()
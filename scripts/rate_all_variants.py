@@ -15,6 +15,8 @@ DAY_ZERO = datetime.fromisoformat("2018-01-18T01:53:29Z").date()
 TRACKED_PLAYERS = ["spring", "yagami_black", "piper", "Lanvin", "HelanaAshryvr", "MarkusKahlsen", "TimeHoodie", "gabio"]
 BLOCKED_PLAYERS = ["Carunty", "FrancisFok"]
 UPDATE_IN_DAYS = 7
+# processes decoding chunks ahead of the rating loop
+READ_WORKERS = 4
 # for 2p,
 # SUGGESTED_MU = 31.0
 # for 3p,
@@ -35,7 +37,8 @@ def get_ratings(avg=SUGGESTED_MU, restriction=get_standard_restrictions(NUM_PLAY
         lb.set_variants(read_csv(prev_file))
     except FileNotFoundError:
         print(f"No file found on run {run}.")
-    gi = GamesIterator(oldest_to_newest=True)
+    gi = GamesIterator(oldest_to_newest=True, workers=READ_WORKERS)
+    validate = restriction.compile()
 
     current = datetime.now()
     # valid_games, total_wins = 0, 0
@@ -46,7 +49,7 @@ def get_ratings(avg=SUGGESTED_MU, restriction=get_standard_restrictions(NUM_PLAY
     player_info = {player: [None] for player in TRACKED_PLAYERS}
     prev_date = datetime.fromisoformat("2018-01-01T01:00:00Z")
     for i, game in enumerate(gi):
-        if not restriction.validate(game):
+        if not validate(game):
             continue
         # if game["options"]["numPlayers"] not in TEAM_SIZES:
         #     continue
@@ -122,14 +125,15 @@ def get_player_games(restriction, min_games_played, min_games_to_rank=None):
     if min_games_to_rank is None:
         min_games_to_rank = min_games_played
 
-    gi = GamesIterator(oldest_to_newest=False)
+    gi = GamesIterator(oldest_to_newest=False, workers=READ_WORKERS)
+    validate = restriction.compile()
     valid_players = get_players_with_x_games(min_games_played)
 
     # filters out games that do not meet restriction or have all
     # players with at least min_games_played games played
     result, games_played = {}, {}
     for i, game in enumerate(gi):
-        if not restriction.validate(game):
+        if not validate(game):
             continue
 
         v = f'{game["options"]["variantName"]} ({game["options"]["numPlayers"]} players)'
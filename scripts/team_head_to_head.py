@@ -2,7 +2,16 @@
 
 import hanabdata.tools.restriction as res
 from hanabdata.tools.io.read import write_csv
-from hanabdata.tools.structures import User
+from hanabdata.tools.structures import PlayerGamesIterator, User
+
+def player_games(player: str):
+    """Returns the metadata of a player's games, newest first, read through
+    the player index if it has been built and from the player's history
+    otherwise."""
+    try:
+        return PlayerGamesIterator(player, oldest_to_newest=False)
+    except FileNotFoundError:
+        return User.load(player)
 
 def compare_teams(team1: list, team2: list, size=None, save=True, restriction=None):
     """Compares teams."""
@@ -15,7 +24,7 @@ def compare_teams(team1: list, team2: list, size=None, save=True, restriction=No
     if len(team1) != len(team2):
         return
     games = {}
-    for game in User.load(team1[0]):
+    for game in player_games(team1[0]):
         if not restriction.validate(game):
             continue
         if team1 != sorted(game["playerNames"]):
@@ -24,7 +33,7 @@ def compare_teams(team1: list, team2: list, size=None, save=True, restriction=No
             continue
         games[game["seed"]] = game
     valid_games = {}
-    for game in User.load(team2[0]):
+    for game in player_games(team2[0]):
         if not restriction.validate(game):
             continue
         if team2 != sorted(game["playerNames"]):
@@ -56,14 +65,14 @@ def compare_players(player1: str, player2: str, size=None, save=True, restrictio
     if restriction is None:
         restriction = res.get_standard_restrictions(size)
     games = {}
-    for game in User.load(player1):
+    for game in player_games(player1):
         if not restriction.validate(game):
             continue
         if game["seed"] == "JSON":
             continue
         games[game["seed"]] = game
     valid_games = {}
-    for game in User.load(player2):
+    for game in player_games(player2):
         if not restriction.validate(game):
             continue
         if game["seed"] == "JSON":
@@ -0,0 +1,119 @@
+"""Shared fixtures. Redirects data storage to a temporary directory so
+tests of the storage layer do not touch downloaded data."""
+
+import importlib.util
+import json
+import random
+import pytest
+from hanabdata.game import variants
+from hanabdata.tools import structures
+from hanabdata.tools.io import decks, indexes, results, symbols, views
+
+STORE_CLASSES = {
+    structures.Chunk: "raw/games",
+    structures.ChunkMeta: "preprocessed/games",
+    structures.ChunkColumns: "preprocessed/columns",
+    structures.User: "raw/users",
+}
+
+SUITS = ["Red", "Yellow", "Green", "Blue", "Purple"]
+VARIANTS = [
+    {"id": 0, "name": "No Variant", "suits": SUITS},
+    {"id": 1, "name": "6 Suits", "suits": SUITS + ["Teal"]},
+    {"id": 2, "name": "Black (6 Suits)", "suits": SUITS + ["Black"]},
+    {"id": 3, "name": "4 Suits", "suits": SUITS[:4]},
+]
+
+if importlib.util.find_spec("pytest_benchmark") is None:
+    @pytest.fixture
+    def benchmark():
+        """Skips benchmarks when pytest-benchmark is not installed."""
+        pytest.skip("pytest-benchmark is not installed")
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Points every chunk class at an empty directory under tmp_path,
+    with a few variants in place of the downloaded list."""
+    for cls, folder in STORE_CLASSES.items():
+        path = tmp_path / folder
+        path.mkdir(parents=True)
+        monkeypatch.setattr(cls, "basepath", str(path))
+    (tmp_path / "preprocessed/indexes").mkdir()
+    monkeypatch.setattr(indexes, "INDEX_PATH", str(tmp_path / "preprocessed/indexes"))
+    monkeypatch.setattr(symbols, "SYMBOL_PATH", str(tmp_path / "preprocessed"))
+    monkeypatch.setattr(decks, "DECK_PATH", str(tmp_path / "raw/decks.sqlite"))
+    monkeypatch.setattr(results, "RESULT_PATH", str(tmp_path / "processed/results"))
+    monkeypatch.setattr(views, "VIEW_PATH", str(tmp_path / "raw/views.sqlite"))
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets/variants.json").write_text(json.dumps(VARIANTS), encoding="utf8")
+    monkeypatch.setattr(variants, "VARIANT_PATH", str(tmp_path / "assets/variants.json"))
+    return tmp_path
+
+def make_meta(game_id, players=("alice", "bob"), score=25, variant_id=0,
+              variant_name="No Variant", date="2024-01-01T00:00:00Z", **options):
+    """Returns metadata shaped like an entry of the history-full API."""
+    game_options = {
+        "numPlayers": len(players),
+        "startingPlayer": 0,
+        "variantID": variant_id,
+        "variantName": variant_name,
+        "timed": False,
+        "timeBase": 0,
+        "timePerTurn": 0,
+        "speedrun": False,
+        "cardCycle": False,
+        "deckPlays": False,
+        "emptyClues": False,
+        "oneExtraCard": False,
+        "oneLessCard": False,
+        "allOrNothing": False,
+        "detrimentalCharacters": False,
+    } | options
+    return {
+        "id": game_id,
+        "options": game_options,
+        "seed": f"p{len(players)}v{variant_id}s{game_id % 7}",
+        "score": score,
+        "numTurns": 60,
+        "endCondition": 1,
+        "datetimeStarted": date,
+        "datetimeFinished": date,
+        "numGamesOnThisSeed": 1,
+        "playerNames": list(players),
+        "incrementNumGames": True,
+        "tags": "",
+    }
+
+@pytest.fixture
+def meta():
+    """Factory for fake game metadata."""
+    return make_meta
+
+def make_export(game_id, players=("alice", "bob"), num_suits=5, num_actions=60):
+    """Returns a game shaped like an export from hanab.live, with a
+    shuffled deck and a plausible action list."""
+    rng = random.Random(game_id)
+    deck = [{"suitIndex": suit, "rank": rank}
+            for suit in range(num_suits) for rank in (1, 1, 1, 2, 2, 3, 3, 4, 4, 5)]
+    rng.shuffle(deck)
+    actions = []
+    for _ in range(num_actions):
+        action_type = rng.choice((0, 1, 2, 3))
+        if action_type < 2:
+            actions.append({"type": action_type, "target": rng.randrange(len(deck)), "value": 0})
+        else:
+            actions.append({"type": action_type, "target": rng.randrange(len(players)),
+                            "value": rng.randrange(1, 6)})
+    return {
+        "id": game_id,
+        "players": list(players),
+        "deck": deck,
+        "actions": actions,
+        "options": {"variant": "No Variant"},
+        "seed": f"p{len(players)}v0s{game_id % 7}",
+    }
+
+@pytest.fixture
+def export():
+    """Factory for fake game exports."""
+    return make_export
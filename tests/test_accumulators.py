@@ -0,0 +1,50 @@
+"""Tests mergeable accumulators and parallel analyses."""
+
+import random
+from hanabdata.tools.accumulators import Counts, KeyedSums, MinMax, TopK
+from hanabdata.tools.analysis import Analysis, run_analyses
+from hanabdata.tools.restriction import Restriction
+from hanabdata.tools.structures import ChunkMeta
+
+def _split_merge(start, add, values):
+    """Returns accumulators over values added whole and in three parts."""
+    whole = start()
+    for value in values:
+        add(whole, value)
+    parts = [start() for _ in range(3)]
+    for i, value in enumerate(values):
+        add(parts[i % 3], value)
+    return whole, parts[0].merge(parts[1]).merge(parts[2])
+
+def test_merges_match_single_accumulators():
+    """Merged accumulators hold what one accumulator over everything
+    holds."""
+    rng = random.Random(0)
+    values = [rng.randrange(50) for _ in range(200)]
+    whole, merged = _split_merge(Counts, Counts.add, values)
+    assert merged == whole
+    whole, merged = _split_merge(KeyedSums, lambda sums, value: sums.add(value % 5, value), values)
+    assert merged == whole
+    whole, merged = _split_merge(lambda: TopK(7), TopK.add, list(enumerate(values)))
+    assert merged.result() == whole.result() == sorted(enumerate(values))[-7:]
+    whole, merged = _split_merge(MinMax, lambda extremes, value: extremes.add(value, str(value)), values)
+    assert (merged.min, merged.max_item) == (whole.min, whole.max_item) == (min(values), str(max(values)))
+
+def test_parallel_analyses(store, meta):
+    """Analyses split across processes give the sequential results."""
+    for chunk in range(3, 7):
+        ChunkMeta([meta(chunk * 1000 + i, score=20 + i % 6) for i in range(40)], chunk).save()
+
+    def step(state, game):
+        state[0].add(game["score"])
+        state[1].add((game["score"], game["id"]))
+
+    analysis = Analysis(None)
+    analysis.set_filter(Restriction({"score": 22}, {}))
+    analysis.filter.add_greater_than("score")
+    analysis.set_accumulator(lambda: (Counts(), TopK(3)), step, lambda state: (state[0], state[1].result()),
+                             fields=["id", "score"],
+                             merge=lambda state, other: (state[0].merge(other[0]), state[1].merge(other[1])))
+    sequential = analysis.scan()
+    assert sequential == ({23: 28, 24: 24, 25: 24}, [(25, 6023), (25, 6029), (25, 6035)])
+    assert run_analyses([analysis], processes=2) == [sequential]
@@ -0,0 +1,37 @@
+"""Tests running analyses over the corpus in a single scan."""
+
+from collections import Counter
+from hanabdata.tools.analysis import Analysis, run_analyses
+from hanabdata.tools.restriction import Restriction
+from hanabdata.tools.structures import ChunkMeta
+
+def _count_analysis(restriction, field, fields=None):
+    def step(counts, game):
+        counts[game[field] if field != "variant" else game["options"]["variantName"]] += 1
+    analysis = Analysis(None)
+    analysis.set_filter(restriction)
+    analysis.set_accumulator(Counter, step, dict, fields)
+    return analysis
+
+def test_analyses_share_one_scan(store, meta, monkeypatch):
+    """Analyses run together give the results they give alone, reading
+    each chunk once."""
+    for chunk in range(3, 6):
+        ChunkMeta([meta(chunk * 1000 + i, score=20 + i % 6, variant_name=f"v{i % 3}")
+                   for i in range(50)], chunk).save()
+    wins = Restriction({"score": 25}, {})
+    analyses = [
+        _count_analysis(wins, "score", ["score"]),
+        _count_analysis(wins, "variant", ["options.variantName"]),
+        _count_analysis(None, "score"),
+    ]
+    alone = [analysis.scan() for analysis in analyses]
+    assert alone[0] == {25: 24} and alone[1] == {"v2": 24}
+    assert sum(alone[2].values()) == 150
+
+    opened = []
+    load = ChunkMeta.load.__func__
+    monkeypatch.setattr(ChunkMeta, "load", classmethod(
+        lambda cls, chunk, *args, **kwargs: opened.append(chunk) or load(cls, chunk, *args, **kwargs)))
+    assert run_analyses(analyses) == alone
+    assert sorted(opened) == [3, 4, 5]
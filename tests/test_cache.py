@@ -0,0 +1,64 @@
+"""Tests the shared chunk cache."""
+
+import pytest
+from hanabdata.tools.io import read
+from hanabdata.tools.io.cache import CHUNK_CACHE, ChunkCache, stamp
+from hanabdata.tools.structures import Chunk, ChunkMeta, Game
+
+@pytest.fixture
+def cache():
+    """Empties the shared cache before and after a test."""
+    CHUNK_CACHE.clear()
+    yield CHUNK_CACHE
+    CHUNK_CACHE.clear()
+
+def test_repeated_loads_hit(store, meta, cache):
+    """Only the first load of a chunk reads the file."""
+    ChunkMeta([meta(i) for i in range(2000, 3000)], 2).save()
+    cache.clear()
+    misses = cache.misses
+    first = ChunkMeta.load(2)
+    hits = cache.hits
+    assert ChunkMeta.load(2).data is first.data
+    assert cache.hits == hits + 1 and cache.misses == misses + 1
+    assert ChunkMeta.load(2, use_cache=False).data is not first.data
+
+def test_save_writes_through(store, meta, cache):
+    """Saving replaces the cached copy and loads see the new data."""
+    Chunk([meta(2000 + i) for i in range(1000)], 2).save()
+    assert cache.stats()["entries"] == 1
+    assert Game.load(2001)["score"] == 25
+    Chunk([meta(2000 + i, score=12) for i in range(1000)], 2).save()
+    assert Game.load(2001)["score"] == 12
+    Game(meta(2001, score=7), 2001).save()
+    assert Chunk.load(2)[1]["score"] == 7
+    assert cache.stats()["entries"] == 1
+
+def test_write_during_load_is_not_cached_as_current(store, meta, cache, monkeypatch):
+    """A chunk rewritten while a load reads it is read again next time."""
+    ChunkMeta([meta(3000 + i) for i in range(1000)], 3).save()
+    cache.clear()
+    read_chunk = ChunkMeta._read.__func__
+    def read_then_rewrite(cls, path, reader):
+        data = read_chunk(cls, path, reader)
+        read.write_json(path, [meta(3000 + i, score=3) for i in range(1000)])
+        return data
+    with monkeypatch.context() as patch:
+        patch.setattr(ChunkMeta, "_read", classmethod(read_then_rewrite))
+        assert ChunkMeta.load(3)[0]["score"] == 25
+    assert ChunkMeta.load(3)[0]["score"] == 3
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entry goes first once over budget."""
+    paths = []
+    for name in "abc":
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        paths.append(str(path))
+    lru = ChunkCache(max_bytes=700)
+    for path in paths[:2]:
+        lru.put(path, path, stamp(path))
+    lru.get(paths[0])
+    lru.put(paths[2], paths[2], stamp(paths[2]))
+    assert list(lru.entries) == [paths[0], paths[2]]
+    assert lru.stats()["evictions"] == 1 and lru.num_bytes <= lru.max_bytes
@@ -0,0 +1,77 @@
+"""Tests how raw game chunks are written and read back."""
+
+import json
+import pytest
+from hanabdata.tools.io import read
+from hanabdata.tools.structures import Chunk, DatabaseError, Game, Games
+
+def test_offset_table_reads_single_games(store, meta):
+    """Single games decode through the offset table and match the JSON."""
+    data = [meta(7000 + i) if i % 3 else None for i in range(1000)]
+    data[5] = {"id": 7005, "players": ["é"]}
+    Chunk(data, 7).save()
+    chunk_path = store / "raw/games/7.json"
+    assert json.loads(chunk_path.read_text()) == data
+    assert chunk_path.read_text() == json.dumps(data)
+    assert read.read_indexed_json(str(chunk_path), [5, 1]) == {1: data[1], 5: data[5]}
+    assert Game.load(7002).data == data[2]
+    games, missing = Games.load([7001, 7003, 7998])
+    assert [game["id"] for game in games.data] == [7001, 7998] and missing == [7003]
+
+def test_stale_offset_table_is_ignored(store, meta):
+    """Chunks rewritten without an offset table still load correctly."""
+    Chunk([meta(8000 + i) for i in range(1000)], 8).save()
+    newer = [meta(9000 + i) for i in range(1000)]
+    read.write_json(str(store / "raw/games/8.json"), newer)
+    assert read.read_indexed_json(str(store / "raw/games/8.json"), [0]) is None
+    assert Game.load(8010).data == newer[10]
+    with pytest.raises(DatabaseError):
+        Game.load(123456)
+
+def test_appends_are_visible_before_compaction(store, meta):
+    """Saved games are read back from the segment, then from the chunk."""
+    Chunk([meta(6000 + i) for i in range(1000)], 6).save()
+    Game(meta(6001, score=3), 6001).save()
+    Games([meta(6002, score=4), meta(7005, score=5)]).save()
+    assert (store / "raw/games/6.seg").exists()
+    assert Game.load(6001)["score"] == 3
+    assert Chunk.load(6)[2]["score"] == 4
+    assert Chunk.load_entries(6, [2, 3]) == {2: Chunk.load(6)[2], 3: meta(6003)}
+    assert Game.load(7005)["score"] == 5
+    assert Chunk.list_ids() == {6, 7}
+
+    assert Chunk.compact(6) and not Chunk.compact(6)
+    assert not (store / "raw/games/6.seg").exists()
+    assert Chunk.load(6, use_cache=False)[1]["score"] == 3
+
+def test_large_segments_compact_themselves(store, meta, monkeypatch):
+    """Appending compacts once the segment outgrows the chunk."""
+    monkeypatch.setattr(Chunk, "min_compact_bytes", 0)
+    Game(meta(5000), 5000).save()
+    assert (store / "raw/games/5.json").exists()
+    assert not (store / "raw/games/5.seg").exists()
+    Games([meta(5000 + i) for i in range(1, 4)]).save()
+    assert (store / "raw/games/5.seg").exists()
+    Games([meta(5000 + i) for i in range(4, 1000)]).save()
+    assert not (store / "raw/games/5.seg").exists()
+    assert [game["id"] for game in Chunk.load(5).data] == list(range(5000, 6000))
+
+def test_truncated_segment_line_is_ignored(store, meta):
+    """A crash during an append loses only the game being appended."""
+    Game(meta(4000), 4000).save()
+    with open(store / "raw/games/4.seg", "a", encoding="utf8") as segment:
+        segment.write('[1, {"id": 40')
+    assert Game.load(4000)["id"] == 4000
+    with pytest.raises(DatabaseError):
+        Game.load(4001)
+
+def test_append_after_truncated_segment_line(store, meta):
+    """Appending after a crash drops the partial line rather than
+    writing onto it."""
+    Game(meta(4000), 4000).save()
+    Game(meta(4001), 4001).save()
+    with open(store / "raw/games/4.seg", "a", encoding="utf8") as segment:
+        segment.write('[2, {"id": 40')
+    Game(meta(4003), 4003).save()
+    assert [game and game["id"] for game in Chunk.load(4, use_cache=False).data[:4]] == [4000, 4001, None, 4003]
+    assert '[2, {"id": 40' not in (store / "raw/games/4.seg").read_text(encoding="utf8")
@@ -0,0 +1,28 @@
+"""Tests compressed chunks and benchmarks them against plain JSON."""
+
+import json
+import pytest
+from hanabdata.tools.io import compression, read
+from hanabdata.tools.structures import Chunk, Game
+
+CODECS = [None, "zlib", "lzma"]
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_compressed_chunks_load(store, export, monkeypatch, codec):
+    """Compression is detected on load, including single-game reads."""
+    monkeypatch.setattr(Chunk, "compression", codec)
+    data = [export(3000 + i) for i in range(1000)]
+    Chunk(data, 3).save()
+    with open(store / "raw/games/3.json", "rb") as chunk_file:
+        assert compression.detect(chunk_file.read()) == codec
+    assert Chunk.load(3, use_cache=False).data == data
+    assert Game.load(3500).data == data[500]
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_decode_chunk(benchmark, tmp_path, export, codec):
+    """Benchmarks reading and decoding a 1000-game raw chunk."""
+    path = str(tmp_path / "0.json")
+    read.write_json(path, [export(i) for i in range(1000)], codec)
+    benchmark.extra_info["bytes_read"] = read.file_size(path)
+    benchmark.extra_info["ratio"] = len(json.dumps(read.read_json(path))) / read.file_size(path)
+    benchmark(read.read_json, path)
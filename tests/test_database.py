@@ -0,0 +1,32 @@
+"""Tests the SQLite metadata store."""
+
+from hanabdata.tools.io.database import MetaStore
+from hanabdata.tools.structures import ChunkMeta, GamesIterator
+
+def test_queries_match_a_filtered_scan(store, meta):
+    """Each indexed query returns what a scan with the same filter does."""
+    games = [meta(1000 + i, players=("alice", "bob", "carol")[:2 + i % 2],
+                  variant_id=i % 3, date=f"2024-01-{1 + i % 28:02d}T00:00:00Z")
+             for i in range(0, 1000, 7)]
+    ChunkMeta(games, 1).save()
+    ChunkMeta([[meta(2005, players=("bob", "dave"))]], 2).save()
+
+    with MetaStore(str(store / "games.sqlite")) as db:
+        assert db.populate() == 2 and db.populate() == 0
+        scan = list(GamesIterator())
+        assert list(db.query()) == scan
+        assert list(db.query(players="dave")) == [scan[-1]]
+        assert list(db.query(players=["alice", "carol"])) == \
+            [game for game in scan if {"alice", "carol"} <= set(game["playerNames"])]
+        assert list(db.query(variant_id=1, since="2024-01-20T00:00:00Z", oldest_to_newest=False)) == \
+            [game for game in reversed(scan) if game["options"]["variantID"] == 1
+             and game["datetimeFinished"] >= "2024-01-20T00:00:00Z"]
+        assert list(db.query(seed=scan[3]["seed"], min_id=1100)) == \
+            [game for game in scan if game["seed"] == scan[3]["seed"] and game["id"] >= 1100]
+
+        ChunkMeta(games[:3], 1).save()
+        assert db.populate() == 1 and db.count() == 4
+
+        (store / "preprocessed/games/2.json").unlink()
+        assert db.populate() == 0 and db.count() == 3
+        assert not list(db.query(players="dave"))
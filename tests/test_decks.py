@@ -0,0 +1,32 @@
+"""Tests sharing decks between games on the same seed."""
+
+import json
+from hanabdata.game.packed import PackedDeck
+from hanabdata.tools.io import decks
+from hanabdata.tools.structures import Chunk, ChunkMeta, FullGamesIterator, Game
+
+def test_decks_stored_once_per_seed(store, meta, export, monkeypatch):
+    """Chunks keep one deck per seed in the store and load them lazily."""
+    monkeypatch.setattr(Chunk, "dedup_decks", True)
+    games = [export(3000 + i) for i in range(1000)]
+    games[1]["seed"] = "JSON"
+    games[15]["deck"] = list(reversed(games[15]["deck"]))  # same seed as game 8
+    Chunk(games, 3).save()
+    ChunkMeta([meta(3000 + i) for i in range(1000)], 3).save()
+
+    raw = json.loads((store / "raw/games/3.json").read_text())
+    assert "deck" not in raw[0] and raw[0]["deckSeed"] == games[0]["seed"]
+    assert "deck" in raw[1] and "deck" in raw[15] and "deck" not in raw[8]
+    assert len(decks.get_store()) == 7
+
+    loaded = Chunk.load(3, use_cache=False).data
+    assert isinstance(loaded[0], decks.DeckGame) and "deck" not in loaded[0]
+    assert [game["deck"] for game in loaded] == [game["deck"] for game in games]
+    assert Game.load(3014).data["deck"] == games[14]["deck"]
+    merged = next(iter(FullGamesIterator()))
+    assert "deck" not in merged and merged["deck"] == games[0]["deck"] and merged["score"] == 25
+    packed = next(iter(FullGamesIterator(packed=True)))
+    assert packed["deck"] == PackedDeck.from_cards(games[0]["deck"])
+
+    Chunk(loaded, 3).save()
+    assert json.loads((store / "raw/games/3.json").read_text()) == raw
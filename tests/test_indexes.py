@@ -0,0 +1,114 @@
+"""Tests the persistent metadata indexes."""
+
+import pytest
+from hanabdata.build_indexes import build_indexes
+from hanabdata.game import seeds
+from hanabdata.tools.io import indexes
+from hanabdata.tools.restriction import Restriction
+from hanabdata.tools.structures import ChunkMeta, GamesIterator, PlayerGamesIterator, SeedGamesIterator
+
+def test_id_encoding_round_trips():
+    """Delta varints decode to the original IDs."""
+    ids = [0, 1, 127, 128, 300, 16384, 1300000]
+    assert indexes.decode_ids(indexes.encode_ids(ids)) == ids
+
+def test_player_index_follows_saves(store, meta):
+    """The index is built once, then kept current by ChunkMeta.save."""
+    ChunkMeta([meta(3000 + i, players=("alice", "bob") if i % 2 else ("bob", "carol"))
+               for i in range(10)], 3).save()
+    ChunkMeta([None, meta(5001, players=("alice", "dave"))], 5).save()
+    with pytest.raises(FileNotFoundError):
+        list(PlayerGamesIterator("alice"))
+    build_indexes()
+
+    alice = [game for game in GamesIterator() if "alice" in game["playerNames"]]
+    assert list(PlayerGamesIterator("alice")) == alice
+    assert [game["id"] for game in PlayerGamesIterator("alice", oldest_to_newest=False)] == \
+        [game["id"] for game in reversed(alice)]
+
+    ChunkMeta([meta(3000 + i, players=("carol", "erin")) for i in range(10)], 3).save()
+    ChunkMeta([None, meta(4001, players=("alice", "erin"))], 4).save()
+    index = indexes.PlayerIndex.load()
+    assert index.get("alice") == [4001, 5001]
+    assert index.get("erin") == list(range(3000, 3010)) + [4001]
+    assert index.count("bob") == 0 and "bob" not in index.keys()
+
+def test_seed_keys():
+    """Seed names parse into keys that tell legacy seeds apart."""
+    assert seeds.parse_seed("p2v3s3") == (2, 3, 3, False)
+    assert seeds.parse_seed("legacy-p5v1234s17") == (5, 1234, 17, True)
+    assert seeds.parse_seed("JSON") is None
+    assert seeds.format_seed(seeds.parse_seed("legacy-p2v0s1")) == "legacy-p2v0s1"
+
+def test_seed_index(store, meta):
+    """Games on a seed are found by name or by key."""
+    games = [meta(6000 + i) for i in range(30)]
+    games[4]["seed"] = "legacy-p2v0s4"
+    games[5]["seed"] = "JSON"
+    ChunkMeta(games, 6).save()
+    build_indexes()
+    expected = [game["id"] for game in games if game["seed"] == "p2v0s4"]
+    assert [game["id"] for game in SeedGamesIterator("p2v0s4")] == expected
+    assert indexes.SeedIndex.load().get(seeds.SeedKey(2, 0, 4, True)) == [6004]
+    assert seeds.parse_seed("JSON") not in indexes.SeedIndex.load().keys()
+
+def test_zone_maps_skip_chunks(store, meta, monkeypatch):
+    """Restricted scans read only chunks whose summaries may match,
+    and yield the same games as validating a full scan."""
+    ChunkMeta([meta(7000 + i, date="2023-06-01T00:00:00Z") for i in range(5)], 7).save()
+    ChunkMeta([meta(8000 + i, players=("alice", "bob", "carol"), date="2024-02-01T00:00:00Z")
+               for i in range(5)], 8).save()
+    ChunkMeta([meta(9000 + i, variant_id=3, speedrun=bool(i % 2), date="2024-03-01T00:00:00Z")
+               for i in range(5)], 9).save()
+    build_indexes()
+    zone = indexes.ZoneMaps.load().get(9)
+    assert zone["ranges"]["id"] == [9000, 9004]
+    assert zone["values"]["options.speedrun"] == [False, True]
+
+    opened = []
+    load = ChunkMeta.load.__func__
+    monkeypatch.setattr(ChunkMeta, "load", classmethod(
+        lambda cls, chunk, *args, **kwargs: opened.append(chunk) or load(cls, chunk, *args, **kwargs)))
+
+    def scan(restriction):
+        opened.clear()
+        games = [game["id"] for game in GamesIterator(restriction=restriction)]
+        read_chunks = sorted(opened)
+        assert games == [game["id"] for game in GamesIterator() if restriction.validate(game)]
+        return games, read_chunks
+
+    since = Restriction({"datetimeStarted": "2024-01-01T00:00:00Z"}, {})
+    since.add_greater_than("datetimeStarted")
+    assert scan(since) == (list(range(8000, 8005)) + list(range(9000, 9005)), [8, 9])
+    recent = Restriction({"id": 8002}, {})
+    recent.add_greater_than("id")
+    assert scan(recent) == ([8003, 8004] + list(range(9000, 9005)), [8, 9])
+    assert scan(Restriction({"options": {"numPlayers": 3}}, {}))[1] == [8]
+    assert scan(Restriction({"options": {"variantID": 3, "speedrun": True}}, {})) == ([9001, 9003], [9])
+    assert scan(Restriction({"options": {"variantID": 5}}, {})) == ([], [])
+    # fields no index tracks never rule chunks out
+    assert scan(Restriction({"playerNames": ["alice", "bob"]}, {}))[1] == [7, 8, 9]
+
+def test_plans_use_indexes(store, meta, monkeypatch):
+    """Plans narrow scans through every index that applies, and explain
+    which ones they used."""
+    ChunkMeta([meta(7000 + i, date="2023-06-01T00:00:00Z") for i in range(5)], 7).save()
+    ChunkMeta([meta(8000 + i, players=("alice", "carol"), date="2024-02-01T00:00:00Z")
+               for i in range(5)], 8).save()
+    ChunkMeta([meta(9000 + i, players=("alice", "bob", "carol"), date="2024-03-01T00:00:00Z")
+               for i in range(5)], 9).save()
+    restriction = Restriction({"playerNames": "carol", "options": {"numPlayers": 2}}, {})
+    restriction.add_contains("playerNames")
+    assert restriction.explain() == "full scan -> 3 chunks\nreads 3 of 3 chunks"
+    build_indexes()
+    assert restriction.plan([7, 8, 9]).chunks == {8}
+    assert restriction.explain() == "\n".join([
+        "players index: playerNames = 'carol' -> 2 chunks",
+        "zone maps: options.numPlayers -> 1 chunks",
+        "reads 1 of 3 chunks",
+    ])
+    assert [game["id"] for game in GamesIterator(restriction=restriction)] == list(range(8000, 8005))
+
+    assert Restriction({"seed": "p3v0s1"}, {}).plan([7, 8, 9]).chunks == {9}
+    # chunks an index has not seen are kept
+    assert restriction.plan([7, 8, 9, 10]).chunks == {8, 10}
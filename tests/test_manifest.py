@@ -0,0 +1,43 @@
+"""Tests the manifests of chunk directories."""
+
+from hanabdata.build_manifest import build_manifest
+from hanabdata.download_games import get_last_game
+from hanabdata.tools.io import read, update
+from hanabdata.tools.io.manifest import Manifest
+from hanabdata.tools.structures import Chunk, ChunkMeta, Game, GamesIterator, User
+
+def test_manifest_follows_writes(store, meta, monkeypatch):
+    """A built manifest answers listing and lookups without globbing
+    and stays equal to a rebuild across saves and appends."""
+    Chunk([meta(3000 + i) if i % 2 else None for i in range(10)], 3).save()
+    Chunk.append(4, {7: meta(4007)})
+    ChunkMeta([meta(3000 + i) for i in range(4)], 3).save()
+    build_manifest(Chunk)
+    build_manifest(ChunkMeta)
+    entry = Chunk.get_manifest().chunks[3]
+    assert entry["count"] == 5 and entry["size"] == read.file_size(str(store / "raw/games/3.json"))
+
+    Game(meta(4002), 4002).save()
+    Chunk([meta(5000 + i) for i in range(3)], 5).save()
+    ChunkMeta([meta(6000)], 6).save()
+    with monkeypatch.context() as patch:
+        patch.setattr(read, "get_file_names", None)
+        assert Chunk.list_ids() == {3, 4, 5}
+        assert [game["id"] for game in GamesIterator()] == [3000, 3001, 3002, 3003, 6000]
+        assert get_last_game() == 5002
+        chunk_manifest = Chunk.get_manifest()
+        assert chunk_manifest.has_game(4002) and chunk_manifest.has_game(3001)
+        assert not chunk_manifest.has_game(3002) and not chunk_manifest.has_game(4003)
+
+    recorded = dict(chunk_manifest.chunks)
+    Manifest._loaded.clear()
+    build_manifest(Chunk, rebuild=True)
+    assert Chunk.get_manifest().chunks == recorded
+
+def test_missing_games_from_manifest(store, meta, monkeypatch):
+    """Missing games of a user are found from the manifest alone."""
+    User([{"id": game_id} for game_id in (3005, 3001, 3002, 9000)], "alice").save()
+    Chunk([meta(3000 + i) if i % 2 else None for i in range(10)], 3).save()
+    build_manifest(Chunk)
+    monkeypatch.setattr(read, "read_games_from_chunk", None)
+    assert update._find_missing_games("alice") == [3002, 9000]
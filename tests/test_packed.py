@@ -0,0 +1,44 @@
+"""Tests the packed encoding of decks and actions."""
+
+import json
+import pytest
+from hanabdata.game import packed
+from hanabdata.game.gamestate import GameState
+from hanabdata.tools.structures import Chunk, ChunkMeta, FullGamesIterator, Game
+
+def test_round_trip(export):
+    """Every form converts back to the exported dicts."""
+    game = export(3000, num_suits=6)
+    stored = json.loads(json.dumps(packed.encode_game(game)))
+    assert isinstance(stored["deck"], str) and isinstance(stored["actions"], str)
+    assert packed.unpack_game(stored) == packed.unpack_game(packed.pack_game(game)) == game
+    assert list(packed.pack_game(stored)["actions"]) == \
+        [(action["type"], action["target"], action["value"]) for action in game["actions"]]
+    odd = dict(game, actions=[{"type": 0, "target": 1, "value": -1}])
+    assert packed.unpack_game(json.loads(json.dumps(packed.encode_game(odd)))) == odd
+    with pytest.raises(ValueError):
+        packed.PackedDeck.from_cards([{"suitIndex": 0, "rank": 1, "order": 0}])
+
+def test_game_state_reads_every_form(export):
+    """GameState replays packed and stored games like dict games."""
+    game = export(3001, num_actions=30)
+    states = [GameState(form, 20) for form in (game, packed.pack_game(game), packed.encode_game(game))]
+    assert len({repr(state) for state in states}) == 1
+    assert len({(state.score, state.strike_count, state.clue_token_count) for state in states}) == 1
+    assert states[0].card(states[0].hands[0][0]) == dict(game["deck"][states[0].hands[0][0]],
+                                                         order=states[0].hands[0][0])
+
+def test_packed_chunks(store, meta, export, monkeypatch):
+    """Packed chunks load as dicts, or packed without building dicts."""
+    monkeypatch.setattr(Chunk, "packed", True)
+    games = [export(4000 + i) for i in range(1000)]
+    Chunk(games, 4).save()
+    Game(export(4000, players=("carol", "dave")), 4000).save()
+    ChunkMeta([meta(4000 + i) for i in range(1000)], 4).save()
+    raw = json.loads((store / "raw/games/4.json").read_text())
+    assert isinstance(raw[3]["deck"], str)
+    assert Game.load(4003).data == games[3]
+    assert Chunk.load(4, use_cache=False).data[1:] == games[1:]
+    assert Chunk.load(4).data[0]["players"] == ["carol", "dave"]
+    full = next(iter(FullGamesIterator(packed=True)))
+    assert isinstance(full["deck"], packed.PackedDeck) and full["players"] == ["carol", "dave"]
@@ -0,0 +1,32 @@
+"""Tests reading chunks ahead in worker processes."""
+
+from itertools import count
+from hanabdata.tools.io.prefetch import read_ahead
+from hanabdata.tools.structures import Chunk, ChunkMeta, FullGamesIterator, GamesIterator
+
+def test_read_ahead_is_ordered_and_bounded():
+    """Results come in task order, with at most depth tasks taken ahead."""
+    taken = []
+    def tasks():
+        for i in count():
+            taken.append(i)
+            yield i
+    results = read_ahead(str, tasks(), workers=2, depth=3)
+    assert [next(results) for _ in range(5)] == ["0", "1", "2", "3", "4"]
+    assert len(taken) == 5 + 3
+    results.close()
+
+def test_iterators_match_with_workers(store, meta, export):
+    """Scans with workers yield the same games, in the same order."""
+    for chunk in range(3, 7):
+        ChunkMeta([meta(chunk * 1000 + i) if i % 3 else None for i in range(1000)], chunk).save()
+        Chunk([export(chunk * 1000 + i) for i in range(1000)], chunk).save()
+    for oldest_to_newest in (True, False):
+        serial = list(GamesIterator(oldest_to_newest))
+        assert list(GamesIterator(oldest_to_newest, workers=2)) == serial
+        assert [game["id"] for game in serial][:2] == ([3001, 3002] if oldest_to_newest else [6001, 6002])
+    fields = ["id", "score"]
+    assert list(GamesIterator(fields=fields, workers=3)) == list(GamesIterator(fields=fields))
+    full = list(FullGamesIterator(oldest_to_newest=False))
+    assert list(FullGamesIterator(oldest_to_newest=False, workers=2)) == full
+    assert len(full) == 4 * 666
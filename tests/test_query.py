@@ -0,0 +1,81 @@
+"""Tests declarative group-by queries."""
+
+import csv
+import pytest
+from hanabdata import query as query_cli
+from hanabdata.tools.query import Query, parse_clause
+from hanabdata.tools.restriction import Restriction
+from hanabdata.tools.structures import ChunkMeta
+
+def _save_games(meta):
+    for chunk in (1, 2):
+        games = []
+        for i in range(40):
+            game = meta(chunk * 1000 + i, players=("alice", "bob", "carol")[:2 + i % 2],
+                        score=20 + i % 6, variant_name=f"v{i % 4}",
+                        date=f"2024-0{chunk}-{10 + i % 10}T00:00:00Z")
+            game["numTurns"] = 40 + i
+            games.append(game)
+        ChunkMeta(games, chunk).save()
+    return [game for chunk in (1, 2) for game in ChunkMeta.load(chunk).data]
+
+def test_group_by_aggregates(store, meta):
+    """Grouped aggregates match a direct computation, in parallel too."""
+    games = _save_games(meta)
+    query = Query(group_by=["options.numPlayers"],
+                  aggregates=["count", "sum:score", "mean:numTurns", "min:numTurns", "max:score", "top2:numTurns"],
+                  order_by="options.numPlayers")
+    rows = query.run()
+    assert rows[0] == ["options.numPlayers", "count", "sum:score", "mean:numTurns", "min:numTurns",
+                       "max:score", "top2:numTurns"]
+    for row in rows[1:]:
+        group = [game for game in games if game["options"]["numPlayers"] == row[0]]
+        longest = sorted(group, key=lambda game: game["numTurns"])[-2:]
+        assert row[1:] == [len(group), sum(game["score"] for game in group),
+                           sum(game["numTurns"] for game in group) / len(group),
+                           min(game["numTurns"] for game in group), max(game["score"] for game in group),
+                           " ".join(f'{game["id"]}:{game["numTurns"]}' for game in reversed(longest))]
+    assert [row[0] for row in rows[1:]] == [2, 3]
+    assert query.run(processes=2) == rows
+
+def test_where_order_and_limit(store, meta):
+    """Where clauses filter games, including on nested fields, and rows
+    are ordered and limited."""
+    games = _save_games(meta)
+    where = Restriction({}, {})
+    for clause in ("datetimeStarted>2024-02-01", "options.numPlayers>2", "score<25"):
+        where.add_clause(*parse_clause(clause))
+    rows = Query(where, group_by=["options.variantName"], aggregates=["count"],
+                 order_by="count", descending=True, limit=1).run()
+    matching = [game for game in games if game["id"] >= 2000 and game["options"]["numPlayers"] == 3
+                and game["score"] < 25]
+    counts = {}
+    for game in matching:
+        counts[game["options"]["variantName"]] = counts.get(game["options"]["variantName"], 0) + 1
+    assert rows[1:] == [[max(counts, key=counts.get), max(counts.values())]]
+
+    listed = Query(where, select=["id", "score"], order_by="id").run()
+    assert listed[1:] == [[game["id"], game["score"]] for game in matching]
+
+def test_invalid_queries():
+    """Malformed clauses and aggregates are rejected."""
+    with pytest.raises(ValueError):
+        parse_clause("score")
+    with pytest.raises(ValueError):
+        Query(aggregates=["mean"])
+    with pytest.raises(ValueError):
+        Query(aggregates=["top0:numTurns"])
+    with pytest.raises(ValueError):
+        Query(aggregates=["count"], order_by="score")
+    with pytest.raises(ValueError):
+        Restriction({}, {}).add_clause("options.numPlayers", "~", 3)
+
+def test_command_line(store, meta, tmp_path):
+    """The command line writes the rows of its query to CSV."""
+    _save_games(meta)
+    output = tmp_path / "variants.csv"
+    rows = query_cli.main(["--where", "playerNames~carol", "--group-by", "options.variantName",
+                           "--agg", "count", "--order", "count", "--desc", "--output", str(output)])
+    with open(output, newline='', encoding='utf-8') as csv_file:
+        assert list(csv.reader(csv_file)) == [[str(value) for value in row] for row in rows]
+    assert rows == [["options.variantName", "count"], ["v1", 20], ["v3", 20]]
@@ -0,0 +1,28 @@
+"""Tests the repair of legacy metadata shapes."""
+
+from hanabdata.build_manifest import build_manifest
+from hanabdata.repair_chunks import repair_chunks
+from hanabdata.tools.structures import Chunk, ChunkMeta, FullGamesIterator, GamesIterator
+
+def test_repair_normalizes_and_resumes(store, meta, export):
+    """Repair unwraps legacy entries once, and iteration over repaired
+    chunks yields the same games as before."""
+    padding = [None] * 994
+    ChunkMeta([meta(3000), [meta(3001)], [], None, "Error", {"tags": ""}] + padding, 3).save()
+    ChunkMeta([meta(4000), None, meta(4002)] + padding + [None] * 3, 4).save()
+    Chunk([export(3000 + i) for i in range(1000)], 3).save()
+    Chunk([export(4000 + i) for i in range(1000)], 4).save()
+    build_manifest(Chunk)
+    build_manifest(ChunkMeta)
+    chunk_manifest = ChunkMeta.get_manifest()
+    assert not chunk_manifest.is_repaired(3) and chunk_manifest.is_repaired(4)
+    games = list(GamesIterator())
+    full_games = [game["id"] for game in FullGamesIterator()]
+    assert [game["id"] for game in games] == [3000, 3001, 4000, 4002]
+
+    assert repair_chunks(workers=2) == {"unwrapped": 1, "cleared": 2}
+    assert ChunkMeta.load(3).data == [meta(3000), meta(3001), None, None, "Error", None] + padding
+    assert ChunkMeta.get_manifest().is_repaired(3)
+    assert list(GamesIterator()) == games
+    assert [game["id"] for game in FullGamesIterator()] == full_games == [3000, 3001, 4000, 4002]
+    assert repair_chunks(workers=2) == {}
@@ -0,0 +1,82 @@
+"""Tests compiled restrictions against validate and benchmarks them."""
+
+import random
+import pytest
+from hanabdata.tools.io import columnar
+from hanabdata.tools.restriction import STANDARD_GAME_RESTRICTION, Restriction, get_standard_restrictions
+from hanabdata.tools.structures import ChunkMeta, GamesIterator
+
+def _mutations(meta):
+    """Yields metadata in the shapes scans see, valid and not."""
+    rng = random.Random(0)
+    for game_id in range(300):
+        game = meta(game_id, score=rng.choice([10, 25]), speedrun=rng.random() < 0.2,
+                    startingPlayer=rng.choice([0, 0, 0, 1]))
+        game["numTurns"] = rng.choice([1, 3, 40])
+        yield game
+    game = meta(1)
+    del game["options"]["deckPlays"]
+    yield game
+    yield {"id": 2, "numTurns": 40}
+    yield {"id": 3, "options": 5, "numTurns": 40}
+
+def _restrictions():
+    custom = get_standard_restrictions(2)
+    custom.add_filter("playerNames", "alice")
+    custom.add_contains("playerNames")
+    custom.add_filter("score", 20)
+    custom.add_less_than("score")
+    custom.add_filter("id", 1)
+    custom.add_special_case("id", lambda x, y: x % 2 == y)
+    return [STANDARD_GAME_RESTRICTION, custom, Restriction({"score": 25}, {})]
+
+def test_compiled_matches_validate(meta):
+    """Compiled restrictions agree with validate on every game."""
+    for restriction in _restrictions():
+        compiled = restriction.compile()
+        for game in _mutations(meta):
+            assert compiled(game) == restriction.validate(game)
+
+def test_compiled_keeps_errors(meta):
+    """Shapes validate rejects with an error raise the same error."""
+    panicking = Restriction({"options": {"speedrun": False}}, {}, panic=True)
+    with pytest.raises(KeyError):
+        panicking.compile()({"id": 1})
+    with pytest.raises(KeyError):
+        STANDARD_GAME_RESTRICTION.compile()(meta(1) | {"numTurns": 40, "cheated": False})
+
+@pytest.mark.parametrize("mode", ["validate", "compiled", "mask"])
+def test_standard_restriction(benchmark, meta, mode):
+    """Benchmarks STANDARD_GAME_RESTRICTION over metadata, interpreted,
+    compiled and over column arrays."""
+    games = list(_mutations(meta))
+    if mode == "mask":
+        columns = columnar.to_arrays(columnar.columns_from_games(games))
+        benchmark(STANDARD_GAME_RESTRICTION.mask, columns)
+        return
+    validate = STANDARD_GAME_RESTRICTION.compile() if mode == "compiled" else STANDARD_GAME_RESTRICTION.validate
+    benchmark(lambda: [validate(game) for game in games])
+
+def test_mask_matches_validate(store, meta):
+    """Masks over columns agree with validate on the rows."""
+    games = list(_mutations(meta))
+    columns = columnar.columns_from_games(games)
+    rows = list(columnar.iter_rows(columns))
+    for restriction in _restrictions():
+        assert list(restriction.mask(columns)) == [restriction.validate(row) for row in rows]
+        assert list(restriction.mask(columnar.to_arrays(columns))) == [restriction.validate(row) for row in rows]
+
+def test_batched_iteration(store, meta):
+    """Batches hold the columns of the games the restriction accepts."""
+    games = list(_mutations(meta))
+    ChunkMeta(games, 3).save()
+    restriction = get_standard_restrictions(2)
+    batches = list(GamesIterator(fields=["id", "options.variantName"], restriction=restriction, batched=True))
+    assert len(batches) == 1
+    expected = [game["id"] for game in games if restriction.validate(game)]
+    assert list(batches[0]["id"]) == expected
+    assert set(batches[0]) == {"id", "options.variantName", "numTurns"} | {
+        f"options.{key}" for key in restriction.necessary_constraints["options"]}
+    symbol_batch = next(iter(GamesIterator(restriction=restriction, symbols=True, batched=True)))
+    assert list(symbol_batch["options.variantName"]) == [0] * len(expected)
+    assert list(GamesIterator(restriction=Restriction({"score": 5}, {}), batched=True)) == []
@@ -0,0 +1,92 @@
+"""Tests the cached partial results of analyses."""
+
+from hanabdata.tools.accumulators import Counts
+from hanabdata.tools.analysis import Analysis, run_analyses
+from hanabdata.tools.io import results
+from hanabdata.tools.restriction import Restriction
+from hanabdata.tools.structures import ChunkColumns, ChunkMeta
+
+def _save_chunks(meta, chunks, score=25):
+    for chunk in chunks:
+        ChunkMeta([meta(chunk * 1000 + i, score=score, variant_name=f"v{i % 3}")
+                   for i in range(30)], chunk).save()
+
+def _variant_analysis(restriction=None):
+    analysis = Analysis(None)
+    analysis.set_filter(restriction)
+    analysis.set_accumulator(Counts, lambda counts, game: counts.add(game["options"]["variantName"]),
+                             dict, ["options.variantName"])
+    return analysis
+
+def _first_seen_analysis():
+    """Records the chunk each variant first appears in, which depends on
+    the order of games across chunks."""
+    def step(seen, game):
+        seen.setdefault(game["options"]["variantName"], game["id"] // 1000)
+    analysis = Analysis(None)
+    analysis.set_accumulator(dict, step, fields=["id", "options.variantName"])
+    return analysis
+
+def _count_loads(monkeypatch):
+    """Records the chunks projected scans read."""
+    opened = []
+    load = ChunkColumns.load.__func__
+    monkeypatch.setattr(ChunkColumns, "load", classmethod(
+        lambda cls, chunk, *args, **kwargs: opened.append(chunk) or load(cls, chunk, *args, **kwargs)))
+    return opened
+
+def test_rerun_scans_only_changed_chunks(store, meta, monkeypatch):
+    """A cached rerun scans new and changed chunks and gives the result
+    of a full scan."""
+    _save_chunks(meta, [1, 2, 3])
+    analysis = _variant_analysis()
+    assert analysis.scan(cache=True) == {"v0": 30, "v1": 30, "v2": 30}
+
+    with monkeypatch.context() as patch:
+        opened = _count_loads(patch)
+        assert analysis.scan(cache=True) == {"v0": 30, "v1": 30, "v2": 30}
+        assert not opened
+
+        ChunkMeta([meta(2000 + i, variant_name="v0") for i in range(30)], 2).save()
+        _save_chunks(meta, [4])
+        assert analysis.scan(cache=True) == analysis.scan() == {"v0": 60, "v1": 30, "v2": 30}
+        assert sorted(opened[:2]) == [2, 4]
+
+def test_cache_keys_follow_analysis_and_filter(store, meta):
+    """Analyses differing in filter or code keep separate results."""
+    _save_chunks(meta, [1])
+    _save_chunks(meta, [2], score=20)
+    wins = _variant_analysis(Restriction({"score": 25}, {}))
+    assert wins.cache_key() == _variant_analysis(Restriction({"score": 25}, {})).cache_key()
+    assert wins.cache_key() != _variant_analysis(Restriction({"score": 20}, {})).cache_key()
+    assert wins.cache_key() != _variant_analysis().cache_key()
+    assert run_analyses([wins, _variant_analysis()], cache=True) == [
+        {"v0": 10, "v1": 10, "v2": 10}, {"v0": 20, "v1": 20, "v2": 20}]
+
+def test_ordered_analysis_resumes_from_checkpoint(store, meta, monkeypatch):
+    """Analyses that cannot merge rescan from the newest chunk while
+    older chunks are unchanged, and from the start otherwise."""
+    _save_chunks(meta, [1, 2, 3])
+    analysis = _first_seen_analysis()
+    assert analysis.scan(cache=True) == {"v0": 1, "v1": 1, "v2": 1}
+
+    with monkeypatch.context() as patch:
+        opened = _count_loads(patch)
+        ChunkMeta([meta(3000 + i, variant_name="v3") for i in range(30)], 3).save()
+        ChunkMeta([meta(4000 + i, variant_name="v4") for i in range(30)], 4).save()
+        assert analysis.scan(cache=True) == {"v0": 1, "v1": 1, "v2": 1, "v3": 3, "v4": 4}
+        assert opened == [3, 4]
+
+        opened.clear()
+        ChunkMeta([meta(1000 + i, variant_name="v5") for i in range(30)], 1).save()
+        assert analysis.scan(cache=True) == analysis.scan()
+        assert sorted(set(opened)) == [1, 2, 3, 4]
+
+def test_unreadable_entries_are_recomputed(store, meta):
+    """A corrupt cached state counts as missing."""
+    _save_chunks(meta, [1])
+    analysis = _variant_analysis()
+    analysis.scan(cache=True)
+    with open(f'{results.RESULT_PATH}/{analysis.cache_key()}/1.pkl', 'wb') as state_file:
+        state_file.write(b'garbage')
+    assert analysis.scan(cache=True) == {"v0": 10, "v1": 10, "v2": 10}
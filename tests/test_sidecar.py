@@ -0,0 +1,50 @@
+"""Tests the pickled sidecars of decoded chunks."""
+
+import os
+from hanabdata.build_sidecars import build_sidecars, prune_sidecars, verify_sidecars
+from hanabdata.tools.io import read, sidecar
+from hanabdata.tools.structures import Chunk, ChunkMeta
+
+def test_loads_use_current_sidecars(store, meta, monkeypatch):
+    """Sidecars are written on first load, read while current and
+    ignored once the chunk changes."""
+    monkeypatch.setattr(ChunkMeta, "sidecars", True)
+    ChunkMeta([meta(3000), None], 3).save()
+    path = str(store / "preprocessed/games/3.json")
+    assert ChunkMeta.load(3, use_cache=False).data == [meta(3000), None]
+    assert sidecar.load(path) == [meta(3000), None]
+
+    with monkeypatch.context() as patch:
+        patch.setattr(read, "read_json", None)
+        assert ChunkMeta.load(3, use_cache=False).data == [meta(3000), None]
+
+    ChunkMeta([meta(3000), meta(3001)], 3).save()
+    assert sidecar.load(path) is None
+    assert ChunkMeta.load(3, use_cache=False).data == [meta(3000), meta(3001)]
+    assert sidecar.load(path) == [meta(3000), meta(3001)]
+
+def test_sidecars_follow_segments(store, export, monkeypatch):
+    """Appending to a chunk makes its sidecar stale."""
+    monkeypatch.setattr(Chunk, "sidecars", True)
+    Chunk([export(3000), None], 3).save()
+    Chunk.load(3, use_cache=False)
+    Chunk.append(3, {1: export(3001)})
+    assert Chunk.load(3, use_cache=False).data == [export(3000), export(3001)]
+
+def test_build_verify_prune(store, meta, export):
+    """The management commands build, check and delete sidecars."""
+    ChunkMeta([meta(3000)], 3).save()
+    ChunkMeta([meta(4000)], 4).save()
+    Chunk([export(3000)], 3).save()
+    assert verify_sidecars() == {"missing": 3}
+    assert build_sidecars() == 3
+    assert build_sidecars() == 0 and not Chunk.sidecars
+    assert verify_sidecars() == {"current": 3}
+
+    ChunkMeta([meta(4000), meta(4001)], 4).save()
+    (store / "preprocessed/games/5.pkl").write_bytes(b"junk")
+    with open(store / "raw/games/3.pkl", "r+b") as sidecar_file:
+        sidecar_file.truncate(os.path.getsize(store / "raw/games/3.pkl") - 1)
+    assert verify_sidecars() == {"current": 1, "stale": 1, "unreadable": 1}
+    assert prune_sidecars() == 3
+    assert verify_sidecars() == {"current": 1, "missing": 2}
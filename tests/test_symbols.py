@@ -0,0 +1,34 @@
+"""Tests the player and variant symbol tables."""
+
+from hanabdata.tools.io.symbols import PLAYERS, VARIANTS, SymbolTable
+from hanabdata.tools.structures import ChunkMeta, GamesIterator
+
+def test_iterator_yields_symbol_ids(store, meta):
+    """Names become stable IDs that are saved and map back to names."""
+    ChunkMeta([meta(3000, players=("alice", "bob")), meta(3001, players=("bob", "carol"))], 3).save()
+    ChunkMeta([meta(4000, players=("carol", "dave"), variant_id=1, variant_name="6 Suits")], 4).save()
+    games = list(GamesIterator(symbols=True))
+    assert [game["playerNames"] for game in games] == [[0, 1], [1, 2], [2, 3]]
+    assert [game["options"]["variantName"] for game in games] == [0, 0, 1]
+    projected = list(GamesIterator(fields=["playerNames", "options.variantName"], symbols=True))
+    assert projected == [{"playerNames": game["playerNames"],
+                          "options": {"variantName": game["options"]["variantName"]}} for game in games]
+
+    SymbolTable._loaded.clear()
+    players = SymbolTable.load(PLAYERS)
+    assert [players.name(i) for i in range(len(players))] == ["alice", "bob", "carol", "dave"]
+    assert SymbolTable.load(VARIANTS).get("6 Suits") == 1
+
+def test_interrupted_save_is_dropped(store):
+    """A partially written name is discarded and its ID reused."""
+    players = SymbolTable.load(PLAYERS)
+    players.intern("alice")
+    players.save()
+    with open(players.path, "a", encoding="utf8") as table_file:
+        table_file.write("bo")
+    SymbolTable._loaded.clear()
+    players = SymbolTable.load(PLAYERS)
+    assert len(players) == 1 and players.intern("bob") == 1
+    players.save()
+    SymbolTable._loaded.clear()
+    assert SymbolTable.load(PLAYERS).names == ["alice", "bob"]
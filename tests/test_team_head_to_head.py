@@ -0,0 +1,13 @@
+"""Tests head-to-head scorecards."""
+
+from scripts import team_head_to_head
+from hanabdata.tools.structures import User
+
+def test_compare_players_without_index(store, meta):
+    """Players are compared from their histories before any index is built."""
+    User([meta(1, players=("alice", "carol"), score=25), meta(2, players=("alice", "carol"), score=18)],
+         "alice").save()
+    User([meta(8, players=("bob", "dave"), score=20), meta(9, players=("bob", "dave"), score=19)],
+         "bob").save()
+    info = team_head_to_head.compare_players("alice", "bob", save=False)
+    assert info == {"team1": "alice", "team2": "bob", "No Variant": [3, 1]}
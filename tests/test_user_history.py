@@ -0,0 +1,37 @@
+"""Tests the append-only store of user histories."""
+
+import json
+from hanabdata.tools.io import fetch, read, update
+from hanabdata.tools.structures import User
+
+def test_update_user_appends(store, monkeypatch):
+    """Updates fetch from the header's newest ID and append only new
+    games; legacy JSON histories are converted on the way."""
+    read.write_json(str(store / "raw/users/alice.json"), [{"id": 5}, {"id": 3}])
+    requested = []
+    def fake_fetch(username, start):
+        requested.append(start)
+        return [{"id": game_id} for game_id in (9, 8, 7) if game_id >= start]
+    monkeypatch.setattr(fetch, "fetch_user", fake_fetch)
+    monkeypatch.setattr(update, "update_metagames", lambda username: None)
+
+    update.update_user("alice", download_games=False)
+    assert not (store / "raw/users/alice.json").exists()
+    assert User.load_header("alice")["newest_id"] == 9
+    with monkeypatch.context() as patch:
+        patch.setattr(read, "read_history", None)
+        update.update_user("alice", download_games=False)
+    assert requested == [6, 10]
+    assert [row["id"] for row in User.load("alice").data] == [9, 8, 7, 5, 3]
+    assert read.get_users() == ["alice"]
+
+def test_interrupted_append_is_ignored(store):
+    """Rows past the committed size are dropped and overwritten."""
+    User.append("bob", [{"id": 2}, {"id": 1}])
+    path = store / "raw/users/bob.hist"
+    with open(path, "a", encoding="utf8") as history_file:
+        history_file.write(json.dumps({"id": 4}) + "\n{\"id\"")
+    assert [row["id"] for row in User.load("bob").data] == [2, 1]
+    User.append("bob", [{"id": 3}])
+    assert [row["id"] for row in User.load("bob").data] == [3, 2, 1]
+    assert User.load_header("bob")["count"] == 3
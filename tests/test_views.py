@@ -0,0 +1,41 @@
+"""Tests the incrementally maintained player and seed counts."""
+
+from hanabdata import process_games
+from hanabdata.tools.io import views
+from hanabdata.tools.structures import Chunk, Games
+
+def _rescan():
+    """Returns the counts of every stored game, computed from scratch."""
+    games = {}
+    for chunk in Chunk.list_ids():
+        games.update({chunk * 1000 + i: game for i, game in enumerate(Chunk.load(chunk, use_cache=False).data)})
+    counts = views.count_games(games)
+    return {kind: {key: {"num_games": count, "last_game": last}
+                   for (key_kind, key), (count, last) in counts.items() if key_kind == kind}
+            for kind in ("player", "seed")}
+
+def test_view_follows_saves_and_appends(store, export):
+    """Once built, the view matches a rescan after every kind of write."""
+    Chunk([export(1000 + i, players=("alice", "bob")) for i in range(20)] + [None] * 980, 1).save()
+    assert views.get_view() is None
+    process_games.get_player_and_seed_info()
+    assert process_games.get_players_with_x_games(20) == {
+        "alice": {"num_games": 20, "last_game": 1019}, "bob": {"num_games": 20, "last_game": 1019}}
+
+    Games([export(1020 + i, players=("alice", "carol")) for i in range(5)]
+          + [export(2000, players=("dave", "carol"))]).save()
+    Chunk([export(3000 + i, players=("erin", "bob")) for i in range(3)], 3).save()
+    expected = _rescan()
+    view = views.get_view()
+    assert view.at_least("player", 1) == expected["player"]
+    assert view.at_least("seed", 1) == expected["seed"]
+    assert view.get("player", "carol") == {"num_games": 6, "last_game": 2000}
+
+    # replacing counted games, by append or by save, drops their old counts
+    Games([export(1000, players=("frank", "gina"))]).save()
+    Chunk([export(3000, players=("erin", "hal"))], 3).save()
+    expected = _rescan()
+    assert view.at_least("player", 1) == expected["player"]
+    assert view.get("player", "alice") == {"num_games": 24, "last_game": 1024}
+    assert view.at_least("player", 25) == {}
+    assert view.histogram("player", [1, 2, 10, 100]) == [5, 1, 2, 0]